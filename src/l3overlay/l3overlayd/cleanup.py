@@ -0,0 +1,276 @@
+#
+# IPsec overlay network manager (l3overlay)
+# l3overlay/l3overlayd/cleanup.py - leftover overlay state cleanup planner
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Cleanup planner for the state left behind by previous l3overlay instances.
+'''
+
+
+import errno
+import hashlib
+import os
+import signal
+
+import pyroute2
+import pyroute2.netns
+
+from l3overlay import util
+
+from l3overlay.l3overlayd.network import interface
+
+
+# Owner tagged on interfaces shared between overlays. Names can not
+# contain whitespace, so this can not clash with an overlay name.
+SHARED_OWNER = "shared underlay"
+
+
+class RunningOverlay(object):
+    '''
+    Running state of an overlay left behind by a previous l3overlay
+    instance, read from the overlay's saved running configuration.
+    '''
+
+    def __init__(self, name, root_dir, config_hash, links, interfaces):
+        '''
+        Set up running overlay internal fields.
+        '''
+
+        self.name = name
+        self.root_dir = root_dir
+        self.config_hash = config_hash
+
+        # Names of the overlays or network namespaces this overlay links to.
+        self.links = frozenset(links)
+
+        # (interface name, network namespace name) tuples,
+        # where the namespace name is None for the root namespace.
+        self.interfaces = tuple(interfaces)
+
+        self.bird_pids = (
+            os.path.join(self.root_dir, "run", "bird", "bird.pid"),
+            os.path.join(self.root_dir, "run", "bird", "bird6.pid"),
+        )
+
+
+def read(logger, overlays_dir):
+    '''
+    Read the saved running configuration of each overlay in the given
+    overlays directory, and return a dictionary of RunningOverlay objects.
+    '''
+
+    running_overlays = {}
+
+    for overlay_name in os.listdir(overlays_dir):
+        root_dir = os.path.join(overlays_dir, overlay_name)
+        overlay_conf = os.path.join(root_dir, "overlay.conf")
+
+        if not os.path.isfile(overlay_conf):
+            logger.warning(
+                "unable to find running config for overlay '%s', "
+                "skipping cleanup" % overlay_name
+            )
+            continue
+
+        with open(overlay_conf, "rb") as fil:
+            config_hash = hashlib.sha256(fil.read()).hexdigest()
+
+        config = util.config(overlay_conf)
+
+        name = util.name_get(config["overlay"]["name"])
+
+        links = []
+        interfaces = []
+
+        for sect, con in config.items():
+            if sect == "DEFAULT" or sect == "overlay":
+                continue
+            head = util.section_type_get(sect)
+            if head == "static-overlay-link":
+                links.append(util.name_get(con["inner-overlay-name"]))
+            elif head == "static-veth" and "inner-namespace" in con:
+                links.append(util.name_get(con["inner-namespace"]))
+            elif head == "active-interface":
+                interfaces.append((
+                    util.name_get(con["interface-name"]),
+                    util.name_get(con["netns-name"]) if "netns-name" in con else None,
+                ))
+
+        running_overlays[name] = RunningOverlay(name, root_dir, config_hash, links, interfaces)
+
+    return running_overlays
+
+
+def remove(logger, running_overlays):
+    '''
+    Remove the state of the given running overlays from the system.
+
+    BIRD daemons are all signalled before waiting for them to terminate.
+    Interfaces in the root namespace are removed in one pass, using a single
+    netlink socket. Interfaces inside overlay namespaces are not removed
+    individually, as they get removed along with the namespace itself.
+    '''
+
+    netns_names = set(ove.name for ove in running_overlays)
+
+    _bird_kill(logger, running_overlays)
+
+    # Group interfaces to remove by network namespace, skipping those
+    # which live in an overlay namespace being removed.
+    interfaces = {}
+    for ove in running_overlays:
+        for interface_name, netns_name in ove.interfaces:
+            if netns_name in netns_names:
+                continue
+            interfaces.setdefault(netns_name, set()).add(interface_name)
+
+    if None in interfaces:
+        root_interfaces_remove(logger, interfaces.pop(None))
+
+    existing_netns = set(pyroute2.netns.listnetns())
+
+    for netns_name, interface_names in interfaces.items():
+        if netns_name not in existing_netns:
+            continue
+        logger.debug("removing %i interfaces from network namespace '%s'" %
+                     (len(interface_names), netns_name))
+        # pylint: disable=no-member
+        nsr = pyroute2.NetNS(netns_name)
+        try:
+            _interfaces_remove(nsr, interface_names)
+        finally:
+            nsr.close()
+
+    for netns_name in sorted(netns_names & existing_netns):
+        logger.debug("removing network namespace '%s'" % netns_name)
+        pyroute2.netns.remove(netns_name)
+
+    for ove in running_overlays:
+        logger.debug("removing overlay dir for '%s'" % ove.name)
+        util.directory_remove(ove.root_dir)
+
+
+def owned_interfaces(ipr, excluded_names=frozenset()):
+    '''
+    Return a dictionary of the indexes of the interfaces tagged as owned by
+    each owner, found using one link dump from the given netlink socket.
+    Interfaces with the given excluded names are skipped.
+    '''
+
+    owned = {}
+
+    for link in ipr.get_links():
+        if link.get_attr("IFLA_IFNAME") in excluded_names:
+            continue
+        owner = interface.owner_get(link.get_attr("IFLA_IFALIAS"))
+        if owner is not None:
+            owned.setdefault(owner, []).append(link["index"])
+
+    return owned
+
+
+def remove_owned(logger, excluded, excluded_names=frozenset()):
+    '''
+    Remove the interfaces in the root namespace tagged as owned by overlays
+    other than the given excluded overlays, along with the network
+    namespaces of those overlays. This finds state left behind by previous
+    l3overlay instances even if their saved configuration has been lost.
+    Interfaces with the given excluded names are kept, whatever their owner.
+    '''
+
+    # pylint: disable=no-member
+    ipr = pyroute2.IPRoute()
+    try:
+        owned = dict(
+            (owner, indexes) for owner, indexes in owned_interfaces(ipr, excluded_names).items()
+            if owner not in excluded
+        )
+        for owner, indexes in sorted(owned.items()):
+            logger.info("removing %i leftover interfaces owned by overlay '%s'" %
+                        (len(indexes), owner))
+            _links_remove(ipr, indexes)
+    finally:
+        ipr.close()
+
+    for netns_name in sorted(set(owned.keys()) & set(pyroute2.netns.listnetns())):
+        logger.info("removing leftover network namespace '%s'" % netns_name)
+        pyroute2.netns.remove(netns_name)
+
+
+def root_interfaces_remove(logger, interface_names):
+    '''
+    Remove the interfaces with the given names from the root namespace
+    in one pass, using a single netlink socket.
+    '''
+
+    logger.debug("removing %i interfaces from root namespace" % len(interface_names))
+
+    # pylint: disable=no-member
+    ipr = pyroute2.IPRoute()
+    try:
+        _interfaces_remove(ipr, interface_names)
+    finally:
+        ipr.close()
+
+
+def _bird_kill(logger, running_overlays):
+    '''
+    Terminate the BIRD daemons of the given running overlays, signalling
+    all of them before waiting for them to exit.
+    '''
+
+    pids = []
+
+    for ove in running_overlays:
+        for bird_pid in ove.bird_pids:
+            pid = util.pid_get(pid_file=bird_pid)
+            if pid:
+                logger.debug("terminating BIRD daemon with PID %i for overlay '%s'" %
+                             (pid, ove.name))
+                os.kill(pid, signal.SIGTERM)
+                pids.append(pid)
+
+    util.pids_wait(pids, sign=signal.SIGTERM)
+
+
+def _interfaces_remove(ipr, interface_names):
+    '''
+    Remove the interfaces with the given names, using the given
+    netlink socket. Interfaces which do not exist, such as veth peers
+    removed along with the other end, are ignored.
+    '''
+
+    _links_remove(ipr, [
+        link["index"] for link in ipr.get_links()
+        if link.get_attr("IFLA_IFNAME") in interface_names
+    ])
+
+
+def _links_remove(ipr, indexes):
+    '''
+    Remove the interfaces with the given indexes, using the given netlink
+    socket, ignoring interfaces which no longer exist.
+    '''
+
+    for index in indexes:
+        try:
+            ipr.link("del", index=index)
+        except pyroute2.NetlinkError as exc:
+            if exc.code != errno.ENODEV:
+                raise
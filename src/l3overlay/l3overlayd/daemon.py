@@ -23,22 +23,30 @@ Daemon class for overlay management.
 '''
 
 
+import hashlib
 import os
 import re
 import shutil
-
-import pyroute2
+import threading
 
 from l3overlay import util
 
+from l3overlay.l3overlayd import cleanup
 from l3overlay.l3overlayd import overlay
 
+from l3overlay.l3overlayd.network import interface
+from l3overlay.l3overlayd.network import mirror
+from l3overlay.l3overlayd.network import netns
+
+from l3overlay.l3overlayd.network.interface import gre
+
 from l3overlay.l3overlayd.overlay.static_interface.overlay_link import OverlayLink
 from l3overlay.l3overlayd.overlay.static_interface.veth import VETH
 
 from l3overlay.l3overlayd.process import ipsec as ipsec_process
 
 from l3overlay.util import logger
+from l3overlay.util import scheduler
 
 from l3overlay.util.exception import L3overlayError
 
@@ -52,6 +60,14 @@ class KeyAddedTwiceError(L3overlayError):
     def __init__(self, local, remote, key):
         super().__init__("key '%s' added twice for link (%s, %s)" % (key, local, remote))
 
+class VLANAddedTwiceError(L3overlayError):
+    '''
+    Exception to raise when a shared tunnel VLAN ID has been added for use twice.
+    '''
+    def __init__(self, local, remote, vlan_id):
+        super().__init__("VLAN ID '%s' added twice for shared tunnel (%s, %s)" %
+                         (vlan_id, local, remote))
+
 class NoOverlayConfError(L3overlayError):
     '''
     Exception to raise when no overlay configuration files are found.
@@ -92,6 +108,16 @@ class ReadError(L3overlayError):
     pass
 
 
+# Global configuration values which cannot be changed
+# when reloading a running daemon.
+RELOAD_GLOBAL_KEYS = (
+    "dry_run", "log", "log_level",
+    "use_ipsec", "ipsec_manage", "ipsec_psk", "netns_backend",
+    "lib_dir", "overlay_dir", "fwbuilder_script_dir", "template_dir",
+    "pid", "ipsec_conf", "ipsec_secrets",
+)
+
+
 # pylint: disable=too-many-instance-attributes
 class Daemon(Worker):
     '''
@@ -104,6 +130,7 @@ class Daemon(Worker):
     # pylint: disable=too-many-arguments,too-many-locals
     def __init__(self, dry_run, logg,
                  log, log_level, use_ipsec, ipsec_manage, ipsec_psk,
+                 start_workers, stop_workers, warm_restart, fast_stop, netns_backend,
                  lib_dir, overlay_dir,
                  fwbuilder_script_dir, overlay_conf_dir, template_dir,
                  pid, ipsec_conf, ipsec_secrets,
@@ -124,6 +151,12 @@ class Daemon(Worker):
         self.ipsec_manage = ipsec_manage
         self.ipsec_psk = ipsec_psk
 
+        self.start_workers = start_workers
+        self.stop_workers = stop_workers
+        self.warm_restart = warm_restart
+        self.fast_stop = fast_stop
+        self.netns_backend = netns_backend
+
         self.lib_dir = lib_dir
         self.overlay_dir = overlay_dir
         self.fwbuilder_script_dir = fwbuilder_script_dir
@@ -136,14 +169,22 @@ class Daemon(Worker):
 
         self.overlays = overlays.copy()
         self.sorted_overlays = Daemon.overlays_sorted(self.overlays)
+        self.overlay_dependencies = Daemon.overlays_dependencies(self.sorted_overlays)
+        self.overlay_dependents = Daemon.overlays_dependents(self.overlay_dependencies)
+
+        # Lock for the shared registries, which get modified by
+        # overlays being started concurrently.
+        self.registry_lock = threading.RLock()
 
         # Initialised in setup().
         self.interface_names = None
         self.gre_keys = None
+        self.shared_tunnels = None
         self.mesh_links = None
         self.ipsec_tunnels = None
         self.ipsec_process = None
         self.root_ipdb = None
+        self.netns_pool = None
 
 
     @staticmethod
@@ -202,6 +243,54 @@ class Daemon(Worker):
         sorted_overlays.append(ove)
 
 
+    @staticmethod
+    def overlays_dependencies(sorted_overlays):
+        '''
+        Return a dictionary mapping each overlay in the given sorted
+        iterable to the set of overlays which need to be started before it.
+        Only dependencies on overlays earlier in the iterable are included,
+        so the resulting graph is always acyclic.
+        '''
+
+        overlays = {}
+        dependencies = {}
+
+        for ove in sorted_overlays:
+            dependencies[ove] = set()
+
+            for sta in ove.static_interfaces:
+                if isinstance(sta, VETH):
+                    name = sta.inner_namespace
+                elif isinstance(sta, OverlayLink):
+                    name = sta.inner_overlay_name
+                else:
+                    continue
+
+                if name in overlays:
+                    dependencies[ove].add(overlays[name])
+
+            overlays[ove.name] = ove
+
+        return dependencies
+
+
+    @staticmethod
+    def overlays_dependents(dependencies):
+        '''
+        Invert the given overlay dependency dictionary, returning
+        a dictionary mapping each overlay to the set of overlays which
+        depend on it, and therefore need to be stopped before it.
+        '''
+
+        dependents = dict((ove, set()) for ove in dependencies.keys())
+
+        for ove, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].add(ove)
+
+        return dependents
+
+
     def setup(self):
         '''
         Set up daemon runtime state.
@@ -213,12 +302,13 @@ class Daemon(Worker):
             self.interface_names = set()
 
             self.gre_keys = dict()
+            self.shared_tunnels = dict()
 
             self.mesh_links = dict()
             self.ipsec_tunnels = dict()
 
-            # pylint: disable=no-member
-            self.root_ipdb = pyroute2.IPDB() if not self.dry_run else None
+            self.root_ipdb = mirror.ipdb_create() if not self.dry_run else None
+            self.netns_pool = netns.Pool(self.logger, self.netns_backend)
         except Exception as exc:
             if self.logger.is_running():
                 self.logger.exception(exc)
@@ -258,14 +348,12 @@ class Daemon(Worker):
                 self.logger.exception(exc)
             raise
 
-        for ove in self.sorted_overlays:
-            try:
-                ove.start()
-
-            except Exception as exc:
-                if ove.logger.is_running():
-                    ove.logger.exception(exc)
-                raise
+        scheduler.run(
+            self.sorted_overlays,
+            self.overlay_dependencies,
+            Daemon._overlay_start,
+            max_workers=self.start_workers,
+        )
 
         try:
             self.ipsec_process.start()
@@ -277,41 +365,61 @@ class Daemon(Worker):
             raise
 
 
+    @staticmethod
+    def _overlay_start(ove):
+        '''
+        Start the given overlay, logging any exceptions raised.
+        '''
+
+        try:
+            ove.start()
+
+        except Exception as exc:
+            if ove.logger.is_running():
+                ove.logger.exception(exc)
+            raise
+
+
     def cleanup(self):
         '''
         Find and clean up any leftover unused state from previous l3overlay instances.
+
+        If warm restart is enabled, running overlays with the same configuration
+        as the overlays to be started are adopted instead of being cleaned up.
         '''
 
         if not self.dry_run:
+            adopted = set()
+
             overlays_dir = os.path.join(self.lib_dir, "overlays")
             if os.path.isdir(overlays_dir):
                 overlay_names = os.listdir(overlays_dir)
                 if overlay_names:
                     self.logger.info("cleaning up existing lib dir '%s'" % self.lib_dir)
-                    for overlay_name in overlay_names:
-                        self.logger.info("cleaning up overlay '%s'" % overlay_name)
 
-                        overlay_conf = os.path.join(overlays_dir, overlay_name, "overlay.conf")
+                    running_overlays = cleanup.read(self.logger, overlays_dir)
+                    adopted = self._overlays_adoptable(running_overlays)
 
-                        if not os.path.isfile(overlay_conf):
-                            self.logger.warning(
-                                "unable to find running config for overlay '%s', "
-                                "skipping cleanup" % overlay_name
-                            )
-                            continue
+                    for name in sorted(adopted):
+                        self.logger.info("adopting running overlay '%s'" % name)
+                        self.overlays[name].adopted = True
 
-                        ove = overlay.read(self.log, self.log_level, conf=overlay_conf)
+                    removed = [
+                        ove for name, ove in sorted(running_overlays.items())
+                        if name not in adopted
+                    ]
+                    for ove in removed:
+                        self.logger.info("cleaning up overlay '%s'" % ove.name)
 
-                        ove.setup(self)
-                        ove.start()
+                    cleanup.remove(self.logger, removed)
 
-                        ove.stop()
-                        ove.remove()
-
-                        self.logger.info("finished cleaning up overlay '%s'" % overlay_name)
-
-                    self.logger.debug("removing lib dir '%s'" % self.lib_dir)
-                    shutil.rmtree(self.lib_dir)
+                    if adopted:
+                        for overlay_name in overlay_names:
+                            if overlay_name not in adopted:
+                                util.directory_remove(os.path.join(overlays_dir, overlay_name))
+                    else:
+                        self.logger.debug("removing lib dir '%s'" % self.lib_dir)
+                        shutil.rmtree(self.lib_dir)
 
                     self.logger.info("finished cleaning up existing lib dir '%s'" % self.lib_dir)
 
@@ -319,6 +427,48 @@ class Daemon(Worker):
                 self.logger.debug("removing file at lib dir path '%s'" % self.lib_dir)
                 os.remove(self.lib_dir)
 
+            # Remove any interfaces still tagged as owned by overlays which
+            # have not been adopted, such as those left behind after the
+            # lib dir was lost. Shared tunnels are only kept if adopted
+            # overlays are still using them.
+            shared_names = set()
+            with self.registry_lock:
+                for name in adopted:
+                    ove = self.overlays[name]
+                    if ove.mesh_datapath != "shared":
+                        continue
+                    for mesh in ove.mesh_tunnels:
+                        link = (mesh.physical_local, mesh.physical_remote)
+                        shared_names.add(self.shared_tunnels[link]["name"])
+            cleanup.remove_owned(self.logger, adopted, shared_names)
+
+
+    def _overlays_adoptable(self, running_overlays):
+        '''
+        Return the set of names of running overlays which can be adopted
+        by this daemon on warm restart. A running overlay can be adopted if
+        its saved running configuration hash matches the hash of the
+        overlay to be started, and all overlays linked to it can also
+        be adopted.
+        '''
+
+        if not self.warm_restart:
+            return set()
+
+        adoptable = set(
+            name for name, ove in running_overlays.items()
+            if name in self.overlays and self.overlays[name].config_hash() == ove.config_hash
+        )
+
+        links = Daemon._dependency_links(self.overlay_dependencies)
+        for ove in running_overlays.values():
+            links.extend((ove.name, link) for link in ove.links)
+
+        return adoptable - Daemon._overlays_closure(
+            (set(running_overlays.keys()) | set(self.overlays.keys())) - adoptable,
+            links,
+        )
+
 
     def create_lib_dir(self):
         '''
@@ -344,31 +494,228 @@ class Daemon(Worker):
                 self.logger.exception(exc)
             raise
 
-        for ove in reversed(self.sorted_overlays):
+        scheduler.run(
+            reversed(self.sorted_overlays),
+            self.overlay_dependents,
+            self._overlay_stop,
+            max_workers=self.stop_workers,
+        )
+
+        try:
+            self.logger.debug("removing lib dir '%s'" % self.lib_dir)
+            if not self.dry_run:
+                util.directory_remove(self.lib_dir)
+            self.set_stopped()
+        except Exception as exc:
+            if self.logger.is_running():
+                self.logger.exception(exc)
+            raise
+
+
+    def detach(self):
+        '''
+        Stop the daemon without stopping any of the overlays or the
+        IPsec process, leaving their network state and processes in place
+        to be adopted by the next daemon started with warm restart.
+        '''
+
+        try:
+            self.set_stopping()
+            self.logger.info("detaching from running overlays")
+            self.set_stopped()
+        except Exception as exc:
+            if self.logger.is_running():
+                self.logger.exception(exc)
+            raise
+
+
+    def _overlay_stop(self, ove):
+        '''
+        Stop and remove the given overlay, logging any exceptions raised.
+        '''
+
+        try:
+            ove.stop()
+        except Exception as exc:
+            if ove.logger.is_running():
+                ove.logger.exception(exc)
+            raise
+
+        try:
+            ove.remove()
+        except Exception as exc:
+            if self.logger.is_running():
+                self.logger.exception(exc)
+            raise
+
+
+    def reload(self, daemon):
+        '''
+        Reload the running daemon in place, using the configuration of the
+        given daemon object, which should not be set up. Overlays where
+        only mesh nodes and static interfaces have changed get reloaded in
+        place, and other changed overlays (and any overlays linked to them)
+        get restarted. Unchanged overlays are left running.
+
+        Returns False without doing anything if the global configuration
+        has changed, in which case the daemon needs to be restarted.
+        '''
+
+        for key in RELOAD_GLOBAL_KEYS:
+            if getattr(self, key) != getattr(daemon, key):
+                self.logger.info("global configuration changed, unable to reload daemon")
+                return False
+
+        try:
+            self.logger.info("reloading daemon")
+
+            configs = dict(
+                (name, overlay.config_get(ove)) for name, ove in self.overlays.items()
+            )
+            new_configs = dict(
+                (name, overlay.config_get(ove)) for name, ove in daemon.overlays.items()
+            )
+
+            changed = set(
+                name for name in set(configs.keys()) | set(new_configs.keys())
+                if configs.get(name) != new_configs.get(name)
+            )
+
+            reloaded = set(
+                name for name in changed
+                if name in self.overlays and name in daemon.overlays and
+                self.overlays[name].reloadable(daemon.overlays[name])
+            )
+
+            restarted = Daemon._overlays_closure(
+                changed - reloaded,
+                Daemon._dependency_links(self.overlay_dependencies) +
+                Daemon._dependency_links(daemon.overlay_dependencies),
+            )
+            reloaded -= restarted
+
+            for name in sorted(changed | restarted):
+                self.logger.debug("%s overlay '%s'" %
+                                  ("reloading" if name in reloaded else "restarting", name))
+
+            # Stop the overlays to restart, in reverse dependency order.
+            scheduler.run(
+                (ove for ove in reversed(self.sorted_overlays) if ove.name in restarted),
+                self.overlay_dependents,
+                self._overlay_stop,
+                max_workers=daemon.stop_workers,
+            )
+
+        except Exception as exc:
+            if self.logger.is_running():
+                self.logger.exception(exc)
+            raise
+
+        for name in sorted(reloaded):
+            ove = self.overlays[name]
             try:
-                ove.stop()
+                ove.reload(daemon.overlays[name])
             except Exception as exc:
                 if ove.logger.is_running():
                     ove.logger.exception(exc)
                 raise
 
+        try:
+            # Replace the overlay database with the running overlays
+            # which were kept, and the new overlays which get started.
+            overlays = {}
+
+            for name, ove in daemon.overlays.items():
+                if name in restarted:
+                    overlays[name] = ove
+                else:
+                    overlays[name] = self.overlays[name]
+                    ove.logger.stop()
+
+            self.overlays = overlays
+            self.sorted_overlays = Daemon.overlays_sorted(self.overlays)
+            self.overlay_dependencies = Daemon.overlays_dependencies(self.sorted_overlays)
+            self.overlay_dependents = Daemon.overlays_dependents(self.overlay_dependencies)
+
+            self.start_workers = daemon.start_workers
+            self.stop_workers = daemon.stop_workers
+            self.warm_restart = daemon.warm_restart
+            self.fast_stop = daemon.fast_stop
+
+        except Exception as exc:
+            if self.logger.is_running():
+                self.logger.exception(exc)
+            raise
+
+        started_overlays = tuple(ove for ove in self.sorted_overlays if ove.name in restarted)
+
+        for ove in started_overlays:
             try:
-                ove.remove()
+                ove.setup(self)
             except Exception as exc:
-                if self.logger.is_running():
-                    self.logger.exception(exc)
+                if ove.logger.is_running():
+                    ove.logger.exception(exc)
                 raise
 
+        scheduler.run(
+            started_overlays,
+            self.overlay_dependencies,
+            Daemon._overlay_start,
+            max_workers=self.start_workers,
+        )
+
         try:
-            self.logger.debug("removing lib dir '%s'" % self.lib_dir)
-            if not self.dry_run:
-                util.directory_remove(self.lib_dir)
-            self.set_stopped()
+            process = ipsec_process.create(self)
+            process.reload(self.ipsec_process)
+            self.ipsec_process = process
+
+            daemon.logger.stop()
+
+            self.logger.info("finished reloading daemon")
+
         except Exception as exc:
             if self.logger.is_running():
                 self.logger.exception(exc)
             raise
 
+        return True
+
+
+    @staticmethod
+    def _dependency_links(dependencies):
+        '''
+        Return a list of (overlay name, dependency name) links from
+        the given overlay dependency dictionary.
+        '''
+
+        return [(ove.name, dep.name) for ove, deps in dependencies.items() for dep in deps]
+
+
+    @staticmethod
+    def _overlays_closure(names, links):
+        '''
+        Return the set of the given overlay names, and the names of
+        all overlays connected to them, directly or indirectly, in either
+        direction by the given (name, name) links.
+        '''
+
+        linked = {}
+
+        for name, other in links:
+            linked.setdefault(name, set()).add(other)
+            linked.setdefault(other, set()).add(name)
+
+        closure = set(names)
+        pending = list(names)
+
+        while pending:
+            for name in linked.get(pending.pop(), ()):
+                if name not in closure:
+                    closure.add(name)
+                    pending.append(name)
+
+        return closure
+
 
     def remove(self):
         '''
@@ -378,6 +725,8 @@ class Daemon(Worker):
         try:
             self.set_removing()
             if not self.dry_run:
+                self.logger.debug("closing network namespace handle pool")
+                self.netns_pool.close()
                 self.logger.debug("releasing root IPDB")
                 self.root_ipdb.release()
             self.logger.stop()
@@ -395,28 +744,39 @@ class Daemon(Worker):
         based on the given base name string
         '''
 
-        ifname_num = 0
+        with self.registry_lock:
+            ifname_num = 0
 
-        while True:
-            digits = len(str(ifname_num))
+            while True:
+                digits = len(str(ifname_num))
 
-            if suffix:
-                ifname_base = "%s%s" % (
-                    re.sub("[^A-Za-z0-9]", "", name)[:limit - len(suffix) - digits],
-                    suffix,
-                )
-            else:
-                ifname_base = re.sub("[^A-Za-z0-9]", "", name)[:limit - digits]
+                if suffix:
+                    ifname_base = "%s%s" % (
+                        re.sub("[^A-Za-z0-9]", "", name)[:limit - len(suffix) - digits],
+                        suffix,
+                    )
+                else:
+                    ifname_base = re.sub("[^A-Za-z0-9]", "", name)[:limit - digits]
 
-            ifname = "%s%i" % (ifname_base, ifname_num)
+                ifname = "%s%i" % (ifname_base, ifname_num)
 
-            if ifname not in self.interface_names:
-                break
+                if ifname not in self.interface_names:
+                    break
 
-            ifname_num += 1
+                ifname_num += 1
 
-        self.interface_names.add(ifname)
-        return ifname
+            self.interface_names.add(ifname)
+            return ifname
+
+
+    def interface_name_remove(self, name):
+        '''
+        Release an interface name reserved using interface_name(),
+        so it can be used again.
+        '''
+
+        with self.registry_lock:
+            self.interface_names.discard(name)
 
 
     def gre_key_add(self, local, remote, key):
@@ -425,15 +785,16 @@ class Daemon(Worker):
         (local, remote) link.
         '''
 
-        link = (local, remote)
+        with self.registry_lock:
+            link = (local, remote)
 
-        if link not in self.gre_keys:
-            self.gre_keys[link] = set()
+            if link not in self.gre_keys:
+                self.gre_keys[link] = set()
 
-        if key in self.gre_keys[link]:
-            raise KeyAddedTwiceError(local, remote, key)
-        else:
-            self.gre_keys[link].add(key)
+            if key in self.gre_keys[link]:
+                raise KeyAddedTwiceError(local, remote, key)
+            else:
+                self.gre_keys[link].add(key)
 
 
     def gre_key_remove(self, local, remote, key):
@@ -442,13 +803,95 @@ class Daemon(Worker):
         (local, remote) link.
         '''
 
-        link = (local, remote)
+        with self.registry_lock:
+            link = (local, remote)
+
+            if link not in self.gre_keys:
+                return
+
+            if key in self.gre_keys[link]:
+                self.gre_keys[link].remove(key)
+
+
+    def shared_tunnel_add(self, local, remote, vlan_id):
+        '''
+        Add a unique (to this daemon) VLAN ID to the shared tunnel for
+        the given (local, remote) link, and return the shared tunnel's
+        interface name.
+        '''
+
+        with self.registry_lock:
+            link = (local, remote)
+
+            if link not in self.shared_tunnels:
+                # Derive the name from the link, so it stays the same
+                # across restarts regardless of the overlays using it.
+                name = "mu%s" % hashlib.sha256(
+                    ("%s %s" % (local, remote)).encode("UTF-8"),
+                ).hexdigest()[:12]
+                self.interface_names.add(name)
+                self.shared_tunnels[link] = {
+                    "name": name,
+                    "vlan-ids": set(),
+                }
+
+            if vlan_id in self.shared_tunnels[link]["vlan-ids"]:
+                raise VLANAddedTwiceError(local, remote, vlan_id)
+            else:
+                self.shared_tunnels[link]["vlan-ids"].add(vlan_id)
+
+            return self.shared_tunnels[link]["name"]
+
+
+    def shared_tunnel_create(self, local, remote):
+        '''
+        Create the shared tunnel for the given (local, remote) link in
+        the root namespace, if it does not exist already, and return it.
+        '''
+
+        with self.registry_lock:
+            tunnel_if = gre.create(
+                self.dry_run,
+                self.logger,
+                self.shared_tunnels[(local, remote)]["name"],
+                "gretap",
+                local,
+                remote,
+                root_ipdb=self.root_ipdb,
+            )
+            with interface.batch(tunnel_if):
+                tunnel_if.owner_set(cleanup.SHARED_OWNER)
+                tunnel_if.up()
 
-        if link not in self.gre_keys:
-            return
+            return tunnel_if
 
-        if key in self.gre_keys[link]:
-            self.gre_keys[link].remove(key)
+
+    def shared_tunnel_remove(self, local, remote, vlan_id):
+        '''
+        Remove a VLAN ID from the shared tunnel for the given
+        (local, remote) link. The shared tunnel itself is removed
+        along with its last VLAN ID.
+        '''
+
+        with self.registry_lock:
+            link = (local, remote)
+
+            if link not in self.shared_tunnels:
+                return
+
+            self.shared_tunnels[link]["vlan-ids"].discard(vlan_id)
+
+            if not self.shared_tunnels[link]["vlan-ids"]:
+                name = self.shared_tunnels.pop(link)["name"]
+                self.interface_names.discard(name)
+                if not self.dry_run and mirror.interface_exists(self.root_ipdb, name):
+                    gre.get(
+                        self.dry_run,
+                        self.logger,
+                        name,
+                        "gretap",
+                        root_ipdb=self.root_ipdb,
+                    ).remove()
 
 
     def mesh_link_add(self, local, remote):
@@ -457,12 +900,13 @@ class Daemon(Worker):
         by the IPsec process.
         '''
 
-        link = (local, remote)
+        with self.registry_lock:
+            link = (local, remote)
 
-        if link not in self.mesh_links:
-            self.mesh_links[link] = 0
+            if link not in self.mesh_links:
+                self.mesh_links[link] = 0
 
-        self.mesh_links[link] += 1
+            self.mesh_links[link] += 1
 
 
     def mesh_link_remove(self, local, remote):
@@ -470,15 +914,16 @@ class Daemon(Worker):
         Remove a link from the mesh tunnel database.
         '''
 
-        link = (local, remote)
+        with self.registry_lock:
+            link = (local, remote)
 
-        if link in self.mesh_links:
-            if self.mesh_links[link] <= 1:
-                del self.mesh_links[link]
+            if link in self.mesh_links:
+                if self.mesh_links[link] <= 1:
+                    del self.mesh_links[link]
+                else:
+                    self.mesh_links[link] -= 1
             else:
-                self.mesh_links[link] -= 1
-        else:
-            raise MeshLinkNonexistentError(local, remote)
+                raise MeshLinkNonexistentError(local, remote)
 
 
     def ipsec_tunnel_add(self, local, remote, ipsec_psk=None):
@@ -487,23 +932,24 @@ class Daemon(Worker):
         by the IPsec process.
         '''
 
-        link = (local, remote)
+        with self.registry_lock:
+            link = (local, remote)
 
-        if link not in self.ipsec_tunnels:
-            self.ipsec_tunnels[link] = {
-                "ipsec-psk": ipsec_psk,
-                "num": 0,
-            }
+            if link not in self.ipsec_tunnels:
+                self.ipsec_tunnels[link] = {
+                    "ipsec-psk": ipsec_psk,
+                    "num": 0,
+                }
 
-        if self.ipsec_tunnels[link]["ipsec-psk"] == ipsec_psk:
-            self.ipsec_tunnels[link]["num"] += 1
-        else:
-            raise IPsecTunnelMismatchedPSKError(
-                local,
-                remote,
-                self.ipsec_tunnels[link]["ipsec-psk"],
-                ipsec_psk,
-            )
+            if self.ipsec_tunnels[link]["ipsec-psk"] == ipsec_psk:
+                self.ipsec_tunnels[link]["num"] += 1
+            else:
+                raise IPsecTunnelMismatchedPSKError(
+                    local,
+                    remote,
+                    self.ipsec_tunnels[link]["ipsec-psk"],
+                    ipsec_psk,
+                )
 
 
     def ipsec_tunnel_remove(self, local, remote):
@@ -511,15 +957,16 @@ class Daemon(Worker):
         Remove a link from the IPsec tunnel database.
         '''
 
-        link = (local, remote)
+        with self.registry_lock:
+            link = (local, remote)
 
-        if link in self.ipsec_tunnels:
-            if self.ipsec_tunnels[link]["num"] <= 1:
-                del self.ipsec_tunnels[link]
+            if link in self.ipsec_tunnels:
+                if self.ipsec_tunnels[link]["num"] <= 1:
+                    del self.ipsec_tunnels[link]
+                else:
+                    self.ipsec_tunnels[link]["num"] -= 1
             else:
-                self.ipsec_tunnels[link]["num"] -= 1
-        else:
-            raise IPsecTunnelNonexistentError(local, remote)
+                raise IPsecTunnelNonexistentError(local, remote)
 
 # pylint: disable=no-member
 Worker.register(Daemon)
@@ -669,6 +1116,23 @@ def read(args):
         else:
             ipsec_psk = None
 
+        start_workers = util.integer_get(
+            reader.get("start-workers", args_optional=True, default=1),
+            minval=1,
+        )
+        stop_workers = util.integer_get(
+            reader.get("stop-workers", args_optional=True, default=1),
+            minval=1,
+        )
+
+        warm_restart = reader.boolean_get("warm-restart", args_optional=True, default=False)
+        fast_stop = reader.boolean_get("fast-stop", args_optional=True, default=False)
+
+        netns_backend = util.enum_get(
+            reader.get("netns-backend", args_optional=True, default="process"),
+            netns.NETNS_BACKENDS,
+        )
+
         # Get required directory paths.
         lib_dir = reader.path_get(
             "lib-dir",
@@ -740,6 +1204,11 @@ def read(args):
         logg.debug("  ipsec-manage = %s" % ipsec_manage)
         logg.debug("  ipsec-psk = %s" %
                    ("<redacted, length %i>" % len(ipsec_psk) if ipsec_psk else None))
+        logg.debug("  start-workers = %i" % start_workers)
+        logg.debug("  stop-workers = %i" % stop_workers)
+        logg.debug("  warm-restart = %s" % warm_restart)
+        logg.debug("  fast-stop = %s" % fast_stop)
+        logg.debug("  netns-backend = %s" % netns_backend)
         logg.debug("  lib-dir = %s" % lib_dir)
         logg.debug("  fwbuilder-script-dir = %s" % fwbuilder_script_dir)
         logg.debug("  overlay-conf-dir = %s" % overlay_conf_dir)
@@ -763,6 +1232,7 @@ def read(args):
         return Daemon(
             dry_run, logg,
             log, log_level, use_ipsec, ipsec_manage, ipsec_psk,
+            start_workers, stop_workers, warm_restart, fast_stop, netns_backend,
             lib_dir, overlay_dir,
             fwbuilder_script_dir, overlay_conf_dir, template_dir,
             pid, ipsec_conf, ipsec_secrets,
@@ -789,6 +1259,12 @@ def write(daemon, global_conf, overlay_conf_dir):
     global_config["ipsec-manage"] = str(daemon.ipsec_manage).lower()
     global_config["ipsec-psk"] = daemon.ipsec_psk
 
+    global_config["start-workers"] = str(daemon.start_workers)
+    global_config["stop-workers"] = str(daemon.stop_workers)
+    global_config["warm-restart"] = str(daemon.warm_restart).lower()
+    global_config["fast-stop"] = str(daemon.fast_stop).lower()
+    global_config["netns-backend"] = daemon.netns_backend
+
     global_config["lib-dir"] = daemon.lib_dir
     global_config["overlay-dir"] = daemon.overlay_dir
 
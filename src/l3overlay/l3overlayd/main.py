@@ -100,22 +100,58 @@ class Main(object):
         sys.exit(0)
 
 
+    # pylint: disable=unused-argument
+    def sigusr1(self, signum, frame):
+        '''
+        Detach from the running overlays without shutting them down, and exit.
+        The next daemon started with warm restart enabled adopts them.
+        '''
+
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+        self.daemon.logger.info("handling SIGUSR1")
+
+        self.daemon.logger.debug("detaching daemon")
+        self.daemon.detach()
+
+        try:
+            self.daemon.logger.debug("removing PID file")
+            util.file_remove(self.daemon.pid)
+        except Exception as exc:
+            if self.daemon.logger.is_started():
+                self.daemon.logger.exception(exc)
+            raise
+
+        self.daemon.remove()
+
+        sys.exit(0)
+
+
     # pylint: disable=unused-argument
     def sighup(self, signum, frame):
         '''
-        Shut down the daemon, make a new daemon to reload the configuration,
-        and start the new daemon.
+        Read the configuration into a new daemon, and reload the running
+        daemon using it. If the global configuration has changed, shut down
+        the running daemon and start the new daemon in its place.
         '''
 
         signal.signal(signal.SIGHUP, signal.SIG_IGN)
 
         self.daemon.logger.info("handling SIGHUP")
 
+        new_daemon = daemon.read(self.args)
+
+        self.daemon.logger.debug("reloading daemon")
+        if self.daemon.reload(new_daemon):
+            signal.signal(signal.SIGHUP, self.sighup)
+            self.daemon.logger.info("finished handling SIGHUP")
+            return
+
         self.daemon.logger.debug("stopping daemon")
         self.daemon.stop()
         self.daemon.remove()
 
-        self.daemon = daemon.read(self.args)
+        self.daemon = new_daemon
         self.daemon.setup()
 
         try:
@@ -128,6 +164,7 @@ class Main(object):
         self.daemon.logger.debug("starting daemon")
         self.daemon.start()
 
+        signal.signal(signal.SIGHUP, self.sighup)
         self.daemon.logger.info("finished handling SIGHUP")
 
 
@@ -187,6 +224,54 @@ class Main(object):
 
         # No way we're having ipsec-psk as an argument, for obvious reasons.
 
+        argparser.add_argument(
+            "-sw", "--start-workers",
+            metavar="NUM",
+            type=str,
+            default=None,
+            help="start at most NUM overlays concurrently",
+        )
+
+        argparser.add_argument(
+            "-Sw", "--stop-workers",
+            metavar="NUM",
+            type=str,
+            default=None,
+            help="stop at most NUM overlays concurrently",
+        )
+
+        warm_restart = argparser.add_mutually_exclusive_group(required=False)
+        warm_restart.add_argument(
+            "-wr", "--warm-restart",
+            action="store_true",
+            help="adopt running overlays with unchanged configuration on startup",
+        )
+        warm_restart.add_argument(
+            "-nwr", "--no-warm-restart",
+            action="store_false",
+            help="do NOT adopt running overlays with unchanged configuration on startup",
+        )
+
+        fast_stop = argparser.add_mutually_exclusive_group(required=False)
+        fast_stop.add_argument(
+            "-fs", "--fast-stop",
+            action="store_true",
+            help="remove overlay network namespaces wholesale when stopping overlays",
+        )
+        fast_stop.add_argument(
+            "-nfs", "--no-fast-stop",
+            action="store_false",
+            help="do NOT remove overlay network namespaces wholesale when stopping overlays",
+        )
+
+        argparser.add_argument(
+            "-Nb", "--netns-backend",
+            metavar="BACKEND",
+            type=str,
+            default=None,
+            help="use BACKEND to manage network namespaces, either 'process' or 'setns'",
+        )
+
         # Directory paths.
         argparser.add_argument(
             "-ocd", "--overlay-conf-dir",
@@ -306,6 +391,7 @@ class Main(object):
             signal.signal(signal.SIGTERM, self.sigterm)
             signal.signal(signal.SIGINT, self.sigint)
             signal.signal(signal.SIGHUP, self.sighup)
+            signal.signal(signal.SIGUSR1, self.sigusr1)
         except Exception as exc:
             if self.daemon.logger.is_started():
                 self.daemon.logger.exception(exc)
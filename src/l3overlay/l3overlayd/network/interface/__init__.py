@@ -23,7 +23,12 @@ Network interface functions.
 '''
 
 
+import contextlib
+
+from l3overlay.l3overlayd.network import mirror
+
 from l3overlay.l3overlayd.network.interface.base import Interface
+from l3overlay.l3overlayd.network.interface.base import OWNER_PREFIX
 
 from l3overlay.l3overlayd.network.interface.exception import GetError
 from l3overlay.l3overlayd.network.interface.exception import NotFoundError
@@ -82,17 +87,65 @@ def interface_get(name, ipdb, *types):
     chosen namespace and returns it.
     '''
 
-    if name not in ipdb.by_name.keys():
-        return None
-
-    existing_if = ipdb.interfaces[name]
+    existing_if = mirror.interface_lookup(ipdb, name)
 
     if existing_if and types and existing_if.kind not in types:
-        raise UnexpectedTypeError(name, existing_if.kind, types)
+        raise UnexpectedTypeError(name, existing_if.kind, *types)
 
     return existing_if
 
 
+def owner_get(ifalias):
+    '''
+    Return the owner an interface has been tagged with, given its
+    interface alias, or None if it has not been tagged.
+    '''
+
+    if ifalias and ifalias.startswith(OWNER_PREFIX):
+        return ifalias[len(OWNER_PREFIX):]
+
+    return None
+
+
+@contextlib.contextmanager
+def batch(*interfaces):
+    '''
+    Collect the changes made to the given interfaces within the context,
+    and apply them on exit, in one IPDB transaction per interface. If an
+    exception is raised within the context, the changes are abandoned.
+    If applying the changes to an interface fails, the changes to it and
+    the interfaces after it are abandoned, and the exception is re-raised.
+    Either way, no interface is left collecting changes.
+    '''
+
+    try:
+        for iface in interfaces:
+            iface.begin()
+
+        yield
+
+    except Exception:
+        for iface in interfaces:
+            iface.abort()
+        raise
+
+    error = None
+
+    for iface in interfaces:
+        try:
+            if error is None:
+                iface.commit()
+        # pylint: disable=broad-except
+        except Exception as exc:
+            error = exc
+        finally:
+            if error is not None:
+                iface.abort()
+
+    if error is not None:
+        raise error
+
+
 def get(dry_run, logger, name, netns=None, root_ipdb=None):
     '''
     Tries to find an interface with the given name in the
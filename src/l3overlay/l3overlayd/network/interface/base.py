@@ -23,14 +23,24 @@ Network interface base class.
 '''
 
 
+import ipaddress
+import threading
 import time
 
+from pyroute2.netlink.rtnl.ifinfmsg import IFF_UP
+
+from l3overlay.l3overlayd.network import mirror
+
 from l3overlay.l3overlayd.network.interface.exception import NotRemovedError
 from l3overlay.l3overlayd.network.interface.exception import RemovedThenModifiedError
+from l3overlay.l3overlayd.network.interface.exception import WaitTimeoutError
 
 
 REMOVE_WAIT_MAX = 1.0
-REMOVE_WAIT_PERIOD = 0.001
+NETNS_SET_WAIT_MAX = 10.0
+
+# Prefix of the interface alias used to tag interfaces with their owner.
+OWNER_PREFIX = "l3overlay:"
 
 
 class Interface(object):
@@ -58,6 +68,10 @@ class Interface(object):
 
         self.removed = False
 
+        # Set by begin(), to collect changes until commit() is called.
+        self.batched = False
+        self.pending = False
+
 
     def _check_state(self):
         '''
@@ -68,6 +82,109 @@ class Interface(object):
             raise RemovedThenModifiedError(self)
 
 
+    def _wait(self, ipdb, condition, timeout, description):
+        '''
+        Wait for the given condition to become true, checking it each time
+        the given IPDB processes a netlink message, rather than polling.
+        Returns True if the condition became true before the timeout.
+        '''
+
+        event = threading.Event()
+        start = time.monotonic()
+
+        # pylint: disable=unused-argument
+        def callback(ipdb, msg, action):
+            '''
+            Wake up the waiting thread after IPDB processed a message.
+            '''
+            event.set()
+
+        cuid = ipdb.register_callback(callback)
+
+        try:
+            while True:
+                event.clear()
+                if condition():
+                    result = True
+                    break
+                remaining = start + timeout - time.monotonic()
+                if remaining <= 0.0:
+                    result = False
+                    break
+                event.wait(remaining)
+        finally:
+            ipdb.unregister_callback(cuid)
+
+        if self.logger:
+            self.logger.debug("waited %.3f seconds for %s '%s' %s" %
+                              (time.monotonic() - start, self.description, self.name, description))
+
+        return result
+
+
+    def wait(self, ipdb, condition, timeout, description):
+        '''
+        Wait for the given condition to become true, checking it each time
+        the given IPDB processes a netlink message. Raises WaitTimeoutError
+        if the condition did not become true before the timeout.
+        '''
+
+        if not self._wait(ipdb, condition, timeout, description):
+            raise WaitTimeoutError(self, description, timeout)
+
+
+    def _commit(self):
+        '''
+        Commit the changes made to the interface. If a batch has been
+        started using begin(), leave them pending until commit() is called.
+        '''
+
+        if self.batched:
+            self.pending = True
+        else:
+            self.interface.commit()
+
+
+    def begin(self):
+        '''
+        Start a batch of changes to the interface. Changes are collected
+        in the interface's IPDB transaction, and applied together when
+        commit() is called, rather than one at a time.
+        '''
+
+        self._check_state()
+
+        self.batched = True
+
+
+    def commit(self):
+        '''
+        Apply the batch of changes collected since begin() was called.
+        '''
+
+        self._check_state()
+
+        self.batched = False
+
+        if self.pending:
+            self.pending = False
+            self._commit()
+
+
+    def abort(self):
+        '''
+        Abandon the batch of changes collected since begin() was called,
+        dropping them from the interface's IPDB transaction, so they do
+        not get applied by a later commit.
+        '''
+
+        self.batched = False
+        self.pending = False
+
+        if self.interface and self.interface.current_tx is not None:
+            self.interface.drop()
+
+
     def add_ip(self, address, netmask):
         '''
         Add the given IP address (either a string, IPv4Address or IPv6Address)
@@ -84,7 +201,67 @@ class Interface(object):
         ip_string = "%s/%i" % ip_tuple
 
         if self.interface and ip_tuple not in self.interface.ipaddr:
-            self.interface.add_ip(ip_string).commit()
+            self.interface.add_ip(ip_string)
+            self._commit()
+
+
+    def ips_set(self, *ips):
+        '''
+        Set the IP addresses of the chosen interface to the given
+        (address, netmask) tuples, adding any missing addresses and removing
+        any other addresses, apart from kernel-assigned IPv6 link-local
+        addresses. An interface which already has exactly the given
+        addresses is left untouched.
+        '''
+
+        self._check_state()
+
+        ip_tuples = set((str(address), netmask) for address, netmask in ips)
+
+        if self.logger:
+            self.logger.debug("setting IP addresses to [%s] on %s '%s'" % (
+                ", ".join("%s/%i" % ip_tuple for ip_tuple in sorted(ip_tuples)),
+                self.description,
+                self.name,
+            ))
+
+        if self.interface:
+            changed = False
+
+            for ip_tuple in sorted(set(self.interface.ipaddr) - ip_tuples):
+                address = ipaddress.ip_address(ip_tuple[0])
+                if address.version == 6 and address.is_link_local:
+                    continue
+                if self.logger:
+                    self.logger.debug("removing unexpected IP address '%s/%i' from %s '%s'" %
+                                      (ip_tuple[0], ip_tuple[1], self.description, self.name))
+                self.interface.del_ip("%s/%i" % ip_tuple)
+                changed = True
+
+            for ip_tuple in sorted(ip_tuples - set(self.interface.ipaddr)):
+                self.interface.add_ip("%s/%i" % ip_tuple)
+                changed = True
+
+            if changed:
+                self._commit()
+
+
+    def owner_set(self, owner):
+        '''
+        Tag the interface as owned by the given owner, so it can be found
+        without any other saved state, using its interface alias.
+        '''
+
+        self._check_state()
+
+        if self.logger:
+            self.logger.debug("tagging %s '%s' with owner '%s'" % (self.description, self.name, owner))
+
+        ifalias = "%s%s" % (OWNER_PREFIX, owner)
+
+        if self.interface and self.interface.ifalias != ifalias:
+            self.interface.set_ifalias(ifalias)
+            self._commit()
 
 
     def set_mtu(self, mtu):
@@ -92,14 +269,14 @@ class Interface(object):
         Set the maximum transmission unit size on the chosen interface.
         '''
 
-
         self._check_state()
 
         if self.logger:
             self.logger.debug("setting MTU to %i on %s '%s'" % (mtu, self.description, self.name))
 
-        if self.interface:
-            self.interface.set_mtu(mtu).commit()
+        if self.interface and self.interface.mtu != mtu:
+            self.interface.set_mtu(mtu)
+            self._commit()
 
 
     def netns_set(self, netns):
@@ -117,26 +294,26 @@ class Interface(object):
             if self.netns == netns:
                 return
 
-            if self.name in netns.ipdb.by_name.keys():
+            if mirror.interface_exists(netns.ipdb, self.name):
                 if self.logger:
                     self.logger.debug("removing existing interface with name '%s' in %s" %
                                       (self.name, netns.description))
                 netns.interface_get(self.name).remove()
 
             self.interface.net_ns_fd = netns.name
-            self.ipdb.commit()
+            self.interface.commit()
 
-            # Busy wait in this thread until the moved interface appears in the
+            # Wait in this thread until the moved interface appears in the
             # new namespace. Apparently needed to overcome a race condition
             # between moving an interface to a new netns and the ipdb noticing
             # the change in this thread.
             # TODO: create a pyroute2 issue for this?
-            if self.name not in netns.ipdb.interfaces:
-                waited = 0.0
-                while self.name not in netns.ipdb.interfaces and waited < 10.0:
-                    waited += 0.001
-                    time.sleep(0.001)
-                assert self.name in netns.ipdb.interfaces
+            self.wait(
+                netns.ipdb,
+                lambda: mirror.interface_exists(netns.ipdb, self.name),
+                NETNS_SET_WAIT_MAX,
+                "to appear in %s" % netns.description,
+            )
 
             self.root_ipdb = None
 
@@ -161,7 +338,7 @@ class Interface(object):
                 return
 
             self.interface.net_ns_fd = None
-            self.ipdb.commit()
+            self.interface.commit()
 
             self.netns = None
 
@@ -181,8 +358,9 @@ class Interface(object):
         if self.logger:
             self.logger.debug("bringing up %s '%s'" % (self.description, self.name))
 
-        if self.interface:
-            self.interface.up().commit()
+        if self.interface and not self.interface.flags & IFF_UP:
+            self.interface.up()
+            self._commit()
 
 
     def down(self):
@@ -195,8 +373,9 @@ class Interface(object):
         if self.logger:
             self.logger.debug("bringing down %s '%s'" % (self.description, self.name))
 
-        if self.interface:
-            self.interface.down().commit()
+        if self.interface and self.interface.flags & IFF_UP:
+            self.interface.down()
+            self._commit()
 
 
     def remove(self):
@@ -211,8 +390,6 @@ class Interface(object):
             self.logger.debug("removing %s '%s'" % (self.description, self.name))
 
         if self.interface:
-            waited = 0.0
-
             self.interface.down()
             self.interface.remove().commit()
 
@@ -220,12 +397,12 @@ class Interface(object):
             # an interface removal. Wait for the IPDB to register that the
             # interface no longer exists.
             # This stops waiting after a while, to prevent infinite loops.
-            while waited < REMOVE_WAIT_MAX:
-                if self.name not in self.ipdb.by_name.keys():
-                    self.removed = True
-                    break
-                time.sleep(REMOVE_WAIT_PERIOD)
-                waited += REMOVE_WAIT_PERIOD
+            self.removed = self._wait(
+                self.ipdb,
+                lambda: not mirror.interface_exists(self.ipdb, self.name),
+                REMOVE_WAIT_MAX,
+                "to be removed",
+            )
 
             if not self.removed:
                 raise NotRemovedError(self)
@@ -23,8 +23,6 @@ Bridge interface class and functions.
 '''
 
 
-import time
-
 from l3overlay.l3overlayd.network import interface
 
 from l3overlay.l3overlayd.network.interface.base import Interface
@@ -35,6 +33,8 @@ from l3overlay.l3overlayd.network.interface.exception import NotFoundError
 IF_TYPE = "bridge"
 IF_DESCRIPTION = "%s interface" % IF_TYPE
 
+ADD_PORT_WAIT_MAX = 10.0
+
 
 class Bridge(Interface):
     '''
@@ -45,6 +45,46 @@ class Bridge(Interface):
     description = IF_DESCRIPTION
 
 
+    # pylint: disable=too-many-arguments
+    def __init__(self, logger, name, inter, netns, root_ipdb):
+        '''
+        Set up bridge interface internal fields.
+        '''
+
+        super().__init__(logger, name, inter, netns, root_ipdb)
+
+        # Ports added since the last commit.
+        self.added_ifs = []
+
+
+    def _commit(self):
+        '''
+        Commit the changes made to the bridge, and wait for the MTU of the
+        bridge to be updated to match any added ports.
+        '''
+
+        super()._commit()
+
+        if self.batched:
+            return
+
+        # FIXME: get rid of this workaround of pyroute2 issue #280
+        # once it is fixed.
+        #
+        # https://github.com/svinota/pyroute2/issues/280
+        for added_if in self.added_ifs:
+            if self.interface.mtu > added_if.interface.mtu:
+                mtu = added_if.interface.mtu
+                self.wait(
+                    self.ipdb,
+                    lambda: self.interface.mtu == mtu,
+                    ADD_PORT_WAIT_MAX,
+                    "to change MTU to %i" % mtu,
+                )
+
+        self.added_ifs = []
+
+
     def add_port(self, added_if):
         '''
         Add the given interface to the list of ports for this bridge.
@@ -64,18 +104,32 @@ class Bridge(Interface):
                                    (added_if.name, self.name))
 
             if added_if.interface.index not in self.interface.ports:
-                self.interface.add_port(added_if.interface).commit()
+                self.interface.add_port(added_if.interface)
+                self.added_ifs.append(added_if)
+                self._commit()
+
+
+    def ports_set(self, *port_ifs):
+        '''
+        Set the ports of this bridge to the given interfaces, adding any
+        missing ports and removing any other ports. A bridge which already
+        has exactly the given ports is left untouched.
+        '''
+
+        self._check_state()
+
+        if self.interface:
+            port_indexes = set(port_if.interface.index for port_if in port_ifs)
+
+            for index in sorted(set(self.interface.ports) - port_indexes):
+                if self.logger:
+                    self.logger.debug("removing unexpected port with index %i from %s '%s'" %
+                                      (index, self.description, self.name))
+                self.interface.del_port(index)
+                self._commit()
 
-                # FIXME: get rid of this workaround of pyroute2 issue #280
-                # once it is fixed.
-                #
-                # https://github.com/svinota/pyroute2/issues/280
-                if self.interface.mtu > added_if.interface.mtu:
-                    waited = 0.0
-                    while self.interface.mtu != added_if.interface.mtu and waited < 10.0:
-                        waited += 0.001
-                        time.sleep(0.001)
-                    assert self.interface.mtu == added_if.interface.mtu
+        for port_if in port_ifs:
+            self.add_port(port_if)
 
 
 def get(dry_run, logger, name, netns=None, root_ipdb=None):
@@ -111,14 +165,14 @@ def create(dry_run, logger, name, netns=None, root_ipdb=None):
     ipdb = interface.ipdb_get(name, IF_DESCRIPTION, netns, root_ipdb)
     existing_if = interface.interface_get(name, ipdb)
 
-    # Always remove any existing interfaces with the given name.
-    # Even if it is already a bridge, it could have ports attached
-    # to it already. Ideally, this function should be idempotent, but
-    # it's not really possible for bridges.
+    # Reuse an existing bridge with the given name, so it does not flap
+    # on restart. Its ports should be set using ports_set(), which only
+    # changes the ports which differ. Remove any other existing interface.
     if existing_if:
+        if existing_if.kind == IF_TYPE:
+            return Bridge(logger, name, existing_if, netns, root_ipdb)
         Interface(None, name, existing_if, netns, root_ipdb).remove()
 
-    new_if = ipdb.create(ifname=name, kind=IF_TYPE)
-    ipdb.commit()
+    new_if = ipdb.create(ifname=name, kind=IF_TYPE).commit()
 
     return Bridge(logger, name, new_if, netns, root_ipdb)
@@ -81,7 +81,6 @@ def create(dry_run, logger, name, netns=None, root_ipdb=None):
         else:
             return Dummy(logger, name, existing_if, netns, root_ipdb)
 
-    new_if = ipdb.create(ifname=name, kind=IF_TYPE)
-    ipdb.commit()
+    new_if = ipdb.create(ifname=name, kind=IF_TYPE).commit()
 
     return Dummy(logger, name, new_if, netns, root_ipdb)
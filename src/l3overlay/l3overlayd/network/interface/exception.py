@@ -98,6 +98,30 @@ class NotRemovedError(L3overlayError):
                 ))
 
 
+class NotOwnedError(L3overlayError):
+    '''
+    Exception to raise when an interface in the way of one being created
+    is not owned by the expected owner, and can not be removed.
+    '''
+    def __init__(self, name, owner, netns=None, root_ipdb=None):
+        if netns:
+            super().__init__("interface with name '%s' in %s is not owned by '%s'" % (
+                name,
+                netns.description,
+                owner,
+            ))
+        elif root_ipdb:
+            super().__init__("interface with name '%s' in root namespace is not owned by '%s'" % (
+                name,
+                owner,
+            ))
+        else:
+            super().__init__("interface with name '%s' is not owned by '%s'" % (
+                name,
+                owner,
+            ))
+
+
 class RemovedThenModifiedError(L3overlayError):
     '''
     Exception to raise when an interface was removed and then modified afterwards.
@@ -148,3 +172,33 @@ class UnexpectedTypeError(L3overlayError):
                     typ,
                     str.join("/", expected_types),
                 ))
+
+
+class WaitTimeoutError(L3overlayError):
+    '''
+    Exception to raise when waiting for an interface timed out.
+    '''
+    def __init__(self, interface, description, timeout):
+        if interface.netns:
+            super().__init__("timed out after waiting %.1f seconds for %s '%s' in %s %s" % (
+                timeout,
+                interface.description,
+                interface.name,
+                interface.netns.description,
+                description,
+            ))
+        elif interface.root_ipdb:
+            super().__init__(
+                "timed out after waiting %.1f seconds for %s '%s' in root namespace %s" % (
+                    timeout,
+                    interface.description,
+                    interface.name,
+                    description,
+                ))
+        else:
+            super().__init__("timed out after waiting %.1f seconds for %s '%s' %s" % (
+                timeout,
+                interface.description,
+                interface.name,
+                description,
+            ))
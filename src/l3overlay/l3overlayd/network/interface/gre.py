@@ -77,9 +77,16 @@ def get(dry_run, logger, name, kind, netns=None, root_ipdb=None):
 def create(dry_run, logger, name, kind,
            # for other parameters, look in pyroute2/netlink/rtnl/ifinfmsg.py
            local, remote, link=None, iflags=32, oflags=32, key=None, ikey=None, okey=None, ttl=16,
-           netns=None, root_ipdb=None):
+           netns=None, root_ipdb=None, underlay_root_ipdb=None):
     '''
     Create a gre/gretap interface object, using a given interface name.
+
+    If underlay_root_ipdb is given along with netns, the tunnel is created
+    in the root namespace and then moved into netns. The kernel keeps
+    sending and receiving the tunnel's encapsulated packets in the root
+    namespace, while the tunnel interface itself lives in netns. If netns
+    is backed by the root namespace, such as a VRF, the tunnel is simply
+    created in place.
     '''
 
     # pylint: disable=too-many-locals
@@ -103,11 +110,12 @@ def create(dry_run, logger, name, kind,
         raise CreateError("ikey '%i' specified, missing corresponding okey" % ikey)
 
     if existing_if:
+        # The kernel reports an unset underlay link as index 0.
         # pylint: disable=too-many-boolean-expressions
         if (existing_if.kind != kind or
                 existing_if.gre_local != str(local) or
                 existing_if.gre_remote != str(remote) or
-                existing_if.gre_link != link or
+                (existing_if.gre_link or None) != link or
                 existing_if.gre_ttl != ttl or
                 (ikey is not None and existing_if.gre_iflags != iflags) or
                 (ikey is not None and existing_if.gre_oflags != oflags) or
@@ -132,7 +140,19 @@ def create(dry_run, logger, name, kind,
         kwargs["gre_iflags"] = iflags
         kwargs["gre_oflags"] = oflags
 
-    new_if = ipdb.create(**kwargs)
-    ipdb.commit()
+    if not underlay_root_ipdb or ipdb is underlay_root_ipdb:
+        new_if = ipdb.create(**kwargs).commit()
+        return GRE(logger, name, new_if, netns, root_ipdb, kind)
+
+    # Make way for the new tunnel in the root namespace.
+    leftover_if = interface.interface_get(name, underlay_root_ipdb)
+    if leftover_if:
+        logger.debug("removing interface '%s' from root namespace" % name)
+        Interface(None, name, leftover_if, None, underlay_root_ipdb).remove()
+
+    new_if = underlay_root_ipdb.create(**kwargs).commit()
+
+    gre_if = GRE(logger, name, new_if, None, underlay_root_ipdb, kind)
+    gre_if.netns_set(netns)
 
-    return GRE(logger, name, new_if, netns, root_ipdb, kind)
+    return gre_if
@@ -32,6 +32,14 @@ from l3overlay.l3overlayd.network.interface.exception import NotFoundError
 
 IF_TYPES = ["tun", "tap"]
 
+# The kernel reports both tun and tap interfaces as this kind.
+# They are told apart by their link layer type.
+IF_KIND = "tun"
+ARPHRD_TYPES = {
+    "tun": 65534,  # ARPHRD_NONE
+    "tap": 1,  # ARPHRD_ETHER
+}
+
 
 class Tuntap(Interface):
     '''
@@ -49,6 +57,29 @@ class Tuntap(Interface):
         self.description = "%s interface" % mode
 
 
+def owner_get(ipdb, existing_if):
+    '''
+    Return the (uid, gid) tuple of the user and group owning the given
+    tun/tap interface, or None if they are not reported by the kernel.
+
+    IPDB does not decode the link info data of tun/tap interfaces, so the
+    owner is read from the IFLA_TUN_OWNER and IFLA_TUN_GROUP attributes
+    of the link message, which are only sent by the kernel if set.
+    '''
+
+    for msg in ipdb.nl.get_links(existing_if.index):
+        linkinfo = msg.get_attr("IFLA_LINKINFO")
+        data = linkinfo.get_attr("IFLA_INFO_DATA") if linkinfo else None
+
+        if data:
+            uid = data.get_attr("IFLA_TUN_OWNER")
+            gid = data.get_attr("IFLA_TUN_GROUP")
+            if uid is not None and gid is not None:
+                return (uid, gid)
+
+    return None
+
+
 # pylint: disable=too-many-arguments
 def get(dry_run, logger, name, mode, netns=None, root_ipdb=None):
     '''
@@ -64,9 +95,9 @@ def get(dry_run, logger, name, mode, netns=None, root_ipdb=None):
         return Tuntap(logger, name, None, netns, root_ipdb, mode)
 
     ipdb = interface.ipdb_get(name, description, netns, root_ipdb)
-    existing_if = interface.interface_get(name, ipdb, mode)
+    existing_if = interface.interface_get(name, ipdb, IF_KIND)
 
-    if existing_if:
+    if existing_if and existing_if.ifi_type == ARPHRD_TYPES[mode]:
         return Tuntap(logger, name, existing_if, netns, root_ipdb, mode)
     else:
         raise NotFoundError(name, mode, netns, root_ipdb)
@@ -90,15 +121,17 @@ def create(dry_run, logger, name, mode,
     ipdb = interface.ipdb_get(name, description, netns, root_ipdb)
     existing_if = interface.interface_get(name, ipdb)
 
+    # Reuse an existing tun/tap interface with the given mode, if the
+    # kernel reports it is owned by the given user and group. Interfaces
+    # with any other owner, or whose owner is not reported, are replaced.
     if existing_if:
-        if (existing_if.kind != mode or
-                existing_if.uid != uid or
-                existing_if.gid != gid or
-                existing_if.ifr != ifr):
-            Interface(None, name, existing_if, netns, root_ipdb).remove()
-        else:
+        if (existing_if.kind == IF_KIND and
+                existing_if.ifi_type == ARPHRD_TYPES[mode] and
+                owner_get(ipdb, existing_if) == (uid, gid)):
             return Tuntap(logger, name, existing_if, netns, root_ipdb, mode)
 
+        Interface(None, name, existing_if, netns, root_ipdb).remove()
+
     new_if = ipdb.create(
         ifname=name,
         kind="tuntap",
@@ -106,7 +139,6 @@ def create(dry_run, logger, name, mode,
         uid=uid,
         gid=gid,
         ifr=ifr,
-    )
-    ipdb.commit()
+    ).commit()
 
     return Tuntap(logger, name, new_if, netns, root_ipdb, mode)
@@ -23,7 +23,10 @@ veth pair interface class and functions.
 '''
 
 
+import os
+
 from l3overlay.l3overlayd.network import interface
+from l3overlay.l3overlayd.network import mirror
 
 from l3overlay.l3overlayd.network.interface.base import Interface
 
@@ -33,6 +36,8 @@ from l3overlay.l3overlayd.network.interface.exception import NotFoundError
 IF_TYPE = "veth"
 IF_DESCRIPTION = "%s interface" % IF_TYPE
 
+PEER_CREATE_WAIT_MAX = 10.0
+
 
 class VETH(Interface):
     '''
@@ -56,11 +61,12 @@ class VETH(Interface):
     def peer_get(self, peer_netns=None, peer_root_ipdb=None):
         '''
         Get the peer interface for this veth interface, if it is in the
-        same namespace. Return None if this is not the case.
+        same namespace or the given peer namespace. Return None if this
+        is not the case.
         '''
 
         if self.interface:
-            if self.peer in self.ipdb.by_name.keys():
+            if mirror.interface_exists(self.ipdb, self.peer):
                 if self.logger:
                     self.logger.debug("getting %s '%s' peer '%s' in %s" % (
                         self.description,
@@ -71,30 +77,30 @@ class VETH(Interface):
                 return VETH(
                     self.logger,
                     self.peer,
-                    self.ipdb.interfaces[self.peer],
+                    interface.interface_get(self.peer, self.ipdb),
                     self.netns,
                     self.root_ipdb,
                     self.name,
                 )
 
-            elif peer_netns and self.peer in peer_netns.ipdb.by_name.keys():
+            elif peer_netns and mirror.interface_exists(peer_netns.ipdb, self.peer):
                 if self.logger:
                     self.logger.debug("getting %s '%s' peer '%s' in remote %s" % (
                         self.description,
                         self.name,
                         self.peer,
-                        self.netns.description,
+                        peer_netns.description,
                     ))
                 return VETH(
                     self.logger,
                     self.peer,
-                    peer_netns.ipdb.interfaces[self.peer],
+                    interface.interface_get(self.peer, peer_netns.ipdb),
                     peer_netns,
                     None,
                     self.name,
                 )
 
-            elif peer_root_ipdb and self.peer in peer_root_ipdb.by_name.keys():
+            elif peer_root_ipdb and mirror.interface_exists(peer_root_ipdb, self.peer):
                 if self.logger:
                     self.logger.debug("getting %s '%s' peer '%s' in remote root namespace'" % (
                         self.description,
@@ -104,7 +110,7 @@ class VETH(Interface):
                 return VETH(
                     self.logger,
                     self.peer,
-                    peer_root_ipdb.interfaces[self.peer],
+                    interface.interface_get(self.peer, peer_root_ipdb),
                     None,
                     peer_root_ipdb,
                     self.name,
@@ -112,19 +118,22 @@ class VETH(Interface):
 
         # dry-run = true
         else:
+            if not peer_netns and not peer_root_ipdb:
+                peer_netns = self.netns
+                peer_root_ipdb = self.root_ipdb
             if self.logger:
                 self.logger.debug("getting %s '%s' peer '%s' in %s" % (
                     self.description,
                     self.name,
                     self.peer,
-                    self.netns.description if self.netns else "root namespace",
+                    peer_netns.description if peer_netns else "root namespace",
                 ))
             return VETH(
                 self.logger,
                 self.peer,
                 None,
-                self.netns,
-                self.root_ipdb,
+                peer_netns,
+                peer_root_ipdb,
                 self.name,
             )
 
@@ -150,10 +159,15 @@ def get(dry_run, logger, name, peer, netns=None, root_ipdb=None):
         raise NotFoundError(name, IF_DESCRIPTION, netns, root_ipdb)
 
 
-# pylint: disable=too-many-arguments
-def create(dry_run, logger, name, peer, netns=None, root_ipdb=None):
+# pylint: disable=too-many-arguments,too-many-locals
+def create(dry_run, logger, name, peer, netns=None, root_ipdb=None,
+           peer_netns=None, peer_root_ipdb=None):
     '''
     Create a veth interface object, using a given interface name.
+    If peer_netns or peer_root_ipdb is given, the peer is created directly
+    in that namespace, rather than in the same namespace as the interface.
+    An existing veth pair is reused if its peer has the given name, and is
+    in the chosen peer namespace.
     '''
 
     interface.log_create(logger, name, IF_DESCRIPTION, netns, root_ipdb)
@@ -162,15 +176,49 @@ def create(dry_run, logger, name, peer, netns=None, root_ipdb=None):
         return VETH(logger, name, None, netns, root_ipdb, peer)
 
     ipdb = interface.ipdb_get(name, IF_DESCRIPTION, netns, root_ipdb)
+
+    if not peer_netns and not peer_root_ipdb:
+        peer_netns = netns
+        peer_root_ipdb = root_ipdb
+    peer_ipdb = interface.ipdb_get(peer, IF_DESCRIPTION, peer_netns, peer_root_ipdb)
+
     existing_if = interface.interface_get(name, ipdb)
+    peer_if = mirror.interface_lookup(peer_ipdb, peer)
 
     if existing_if:
-        if existing_if.kind != IF_TYPE or existing_if.peer != peer:
-            Interface(None, name, existing_if, netns, root_ipdb).remove()
-        else:
+        # The peer name is only known by IPDB for veth pairs it created
+        # itself, so find the peer by name, and check the pair is linked.
+        if (existing_if.kind == IF_TYPE and
+                peer_if is not None and
+                peer_if.kind == IF_TYPE and
+                existing_if.link == peer_if.index):
             return VETH(logger, name, existing_if, netns, root_ipdb, peer)
 
-    new_if = ipdb.create(ifname=name, kind=IF_TYPE, peer=peer)
-    ipdb.commit()
+        Interface(None, name, existing_if, netns, root_ipdb).remove()
+        peer_if = mirror.interface_lookup(peer_ipdb, peer)
 
-    return VETH(logger, name, new_if, netns, root_ipdb, peer)
+    if peer_if:
+        Interface(None, peer, peer_if, peer_netns, peer_root_ipdb).remove()
+
+    if peer_ipdb is ipdb:
+        peer_spec = peer
+    elif peer_netns:
+        peer_spec = {"ifname": peer, "net_ns_fd": peer_netns.name}
+    else:
+        # l3overlayd itself always runs in the root namespace.
+        peer_spec = {"ifname": peer, "net_ns_pid": os.getpid()}
+
+    new_if = ipdb.create(ifname=name, kind=IF_TYPE, peer=peer_spec).commit()
+    veth_if = VETH(logger, name, new_if, netns, root_ipdb, peer)
+
+    # The peer shows up in the IPDB for its namespace asynchronously.
+    if peer_ipdb is not ipdb:
+        veth_if.wait(
+            peer_ipdb,
+            lambda: mirror.interface_exists(peer_ipdb, peer),
+            PEER_CREATE_WAIT_MAX,
+            "peer '%s' to appear in %s" %
+            (peer, peer_netns.description if peer_netns else "root namespace"),
+        )
+
+    return veth_if
@@ -63,9 +63,15 @@ def get(dry_run, logger, name, netns=None, root_ipdb=None):
 
 
 # pylint: disable=too-many-arguments
-def create(dry_run, logger, name, link, vlan_id, netns=None, root_ipdb=None):
+def create(dry_run, logger, name, link, vlan_id, netns=None, root_ipdb=None,
+           underlay_root_ipdb=None):
     '''
     Create a vlan interface object, using a given interface name.
+
+    If underlay_root_ipdb is given along with netns, the vlan interface is
+    created on its link in the root namespace and then moved into netns,
+    where it stays attached to its link. If netns is backed by the root
+    namespace, such as a VRF, the vlan interface is simply created in place.
     '''
 
     interface.log_create(logger, name, IF_DESCRIPTION, netns, root_ipdb)
@@ -78,13 +84,30 @@ def create(dry_run, logger, name, link, vlan_id, netns=None, root_ipdb=None):
 
     if existing_if:
         if (existing_if.kind != IF_TYPE or
-                ipdb.by_index[existing_if.link] != link or
+                existing_if.link != link.interface.index or
                 existing_if.vlan_id != vlan_id):
             Interface(None, name, existing_if, netns, root_ipdb).remove()
         else:
             return VLAN(logger, name, existing_if, netns, root_ipdb)
 
-    new_if = ipdb.create(ifname=name, kind=IF_TYPE, link=link.interface, vlan_id=vlan_id)
-    ipdb.commit()
+    if not underlay_root_ipdb or ipdb is underlay_root_ipdb:
+        new_if = ipdb.create(ifname=name, kind=IF_TYPE, link=link.interface, vlan_id=vlan_id).commit()
+        return VLAN(logger, name, new_if, netns, root_ipdb)
+
+    # Make way for the new vlan interface in the root namespace.
+    leftover_if = interface.interface_get(name, underlay_root_ipdb)
+    if leftover_if:
+        logger.debug("removing interface '%s' from root namespace" % name)
+        Interface(None, name, leftover_if, None, underlay_root_ipdb).remove()
+
+    new_if = underlay_root_ipdb.create(
+        ifname=name,
+        kind=IF_TYPE,
+        link=link.interface,
+        vlan_id=vlan_id,
+    ).commit()
+
+    vlan_if = VLAN(logger, name, new_if, None, underlay_root_ipdb)
+    vlan_if.netns_set(netns)
 
-    return VLAN(logger, name, new_if, netns, root_ipdb)
+    return vlan_if
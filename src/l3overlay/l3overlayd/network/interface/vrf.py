@@ -0,0 +1,113 @@
+#
+# IPsec overlay network manager (l3overlay)
+# l3overlay/l3overlayd/network/interface/vrf.py - vrf interface class and functions
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+VRF interface class and functions.
+'''
+
+
+from l3overlay.l3overlayd.network import interface
+
+from l3overlay.l3overlayd.network.interface.base import Interface
+
+from l3overlay.l3overlayd.network.interface.exception import NotFoundError
+from l3overlay.l3overlayd.network.interface.exception import NotOwnedError
+
+
+IF_TYPE = "vrf"
+IF_DESCRIPTION = "%s interface" % IF_TYPE
+
+
+class VRF(Interface):
+    '''
+    VRF interface class. Subclass of the Interface class, adding
+    VRF-specific functions.
+    '''
+
+    description = IF_DESCRIPTION
+
+
+    def add_port(self, added_if):
+        '''
+        Enslave the given interface to this VRF, if it is not already.
+        '''
+
+        self._check_state()
+
+        if self.logger:
+            self.logger.debug("adding port for %s '%s' to %s '%s'" %
+                              (added_if.description, added_if.name, self.description, self.name))
+
+        if self.interface and added_if.interface:
+            if added_if.interface.index not in self.interface.ports:
+                self.interface.add_port(added_if.interface)
+                self._commit()
+
+
+def get(dry_run, logger, name, netns=None, root_ipdb=None):
+    '''
+    Tries to find a vrf interface with the given name in the
+    chosen namespace and returns it.
+    '''
+
+    interface.log_get(logger, name, IF_DESCRIPTION, netns, root_ipdb)
+
+    if dry_run:
+        return VRF(logger, name, None, netns, root_ipdb)
+
+    ipdb = interface.ipdb_get(name, IF_DESCRIPTION, netns, root_ipdb)
+    existing_if = interface.interface_get(name, ipdb, IF_TYPE)
+
+    if existing_if:
+        return VRF(logger, name, existing_if, netns, root_ipdb)
+    else:
+        raise NotFoundError(name, IF_DESCRIPTION, netns, root_ipdb)
+
+
+# pylint: disable=too-many-arguments
+def create(dry_run, logger, name, table, owner, netns=None, root_ipdb=None):
+    '''
+    Create a vrf interface object, using a given interface name
+    and routing table. An existing interface with the same name
+    is only reused or replaced if it is tagged with the given owner,
+    otherwise a NotOwnedError is raised.
+    '''
+
+    interface.log_create(logger, name, IF_DESCRIPTION, netns, root_ipdb)
+
+    if dry_run:
+        return VRF(logger, name, None, netns, root_ipdb)
+
+    ipdb = interface.ipdb_get(name, IF_DESCRIPTION, netns, root_ipdb)
+    existing_if = interface.interface_get(name, ipdb)
+
+    # Reuse an existing VRF using the same routing table, so its
+    # ports are not released on restart. Never touch interfaces
+    # which were not created for the owner.
+    if existing_if:
+        if interface.owner_get(existing_if.ifalias) != owner:
+            raise NotOwnedError(name, owner, netns, root_ipdb)
+        if existing_if.kind == IF_TYPE and existing_if.vrf_table == table:
+            return VRF(logger, name, existing_if, netns, root_ipdb)
+        Interface(None, name, existing_if, netns, root_ipdb).remove()
+
+    new_if = ipdb.create(ifname=name, kind=IF_TYPE, vrf_table=table).commit()
+
+    return VRF(logger, name, new_if, netns, root_ipdb)
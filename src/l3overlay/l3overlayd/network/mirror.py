@@ -0,0 +1,72 @@
+#
+# IPsec overlay network manager (l3overlay)
+# l3overlay/l3overlayd/network/mirror.py - scoped IPDB network state mirror
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Scoped IPDB network state mirror, and functions for looking up its state.
+'''
+
+
+import pyroute2
+
+import pyroute2.ipdb.interfaces
+
+
+# Only the IPDB interfaces plugin is used. Routes and rules are never
+# looked up, and on hosts carrying full BGP tables, mirroring them
+# costs a lot of memory and startup time.
+IPDB_PLUGINS = ("interfaces",)
+
+# Only subscribe to the netlink multicast groups used by the
+# interfaces plugin, so route updates are never received at all.
+IPDB_GROUPS = pyroute2.ipdb.interfaces.groups
+
+
+def ipdb_create(nl=None):
+    '''
+    Create an IPDB object which only mirrors the links, addresses and
+    neighbours of a network namespace, using the given netlink socket
+    if specified.
+    '''
+
+    # pylint: disable=no-member
+    return pyroute2.IPDB(nl=nl, plugins=IPDB_PLUGINS, nl_bind_groups=IPDB_GROUPS)
+
+
+def interface_lookup(ipdb, key):
+    '''
+    Return the IPDB interface object with the given name or index
+    from the given IPDB, or None if it does not exist.
+
+    The IPDB interfaces dictionary is indexed by both name and index,
+    and kept up to date by our own commits and by kernel notifications,
+    so this is a constant time lookup. The IPDB by_name and by_index views
+    filter the whole interfaces dictionary on every access instead.
+    '''
+
+    return ipdb.interfaces.get(key)
+
+
+def interface_exists(ipdb, key):
+    '''
+    Return True if an interface with the given name or index
+    exists in the given IPDB.
+    '''
+
+    return key in ipdb.interfaces
@@ -23,7 +23,9 @@ Network namespace class and functions.
 '''
 
 
+import os
 import subprocess
+import threading
 
 import pyroute2
 
@@ -34,6 +36,7 @@ import pyroute2.netns.process.proxy
 from l3overlay import util
 
 from l3overlay.l3overlayd.network import interface
+from l3overlay.l3overlayd.network import mirror
 
 from l3overlay.util.exception import L3overlayError
 
@@ -41,12 +44,244 @@ from l3overlay.util.worker import Worker
 from l3overlay.util.worker import NotYetStartedError
 
 
+# Time to keep an unused network namespace handle open in the pool.
+NETNS_IDLE_TIMEOUT = 5.0
+
+# Ways of opening netlink sockets inside a network namespace.
+NETNS_BACKENDS = ("process", "setns")
+
+
 class UnableToCreateNetnsError(L3overlayError):
     '''
     Exception to raise when a network namespace was unable to be created.
     '''
-    def __init__(self, netns, message):
-        super().__init__("unable to create network namespace '%s': %s" % (netns.name, message))
+    def __init__(self, name, message):
+        super().__init__("unable to create network namespace '%s': %s" % (name, message))
+
+
+class PoolHandle(object):
+    '''
+    Shared pyroute2 NetNS and IPDB objects for a network namespace,
+    held in a network namespace handle pool.
+    '''
+
+    def __init__(self, name, netns, ipdb):
+        '''
+        Set up pool handle internal fields.
+        '''
+
+        self.name = name
+
+        self.netns = netns
+        self.ipdb = ipdb
+
+        self.refcount = 0
+        self.timer = None
+
+        # Set when the handle is discarded from the pool while in use,
+        # to close it when the last reference is released.
+        self.discarded = False
+
+
+class Pool(object):
+    '''
+    Daemon-wide pool of network namespace handles. Handles are reference
+    counted, so network namespace objects for the same namespace share the
+    same pyroute2 NetNS process and IPDB. Handles no longer in use are kept
+    open for NETNS_IDLE_TIMEOUT seconds, in case they are used again, before
+    being closed to reduce memory consumption.
+    '''
+
+    def __init__(self, logger, backend="process", idle_timeout=NETNS_IDLE_TIMEOUT):
+        '''
+        Set up network namespace pool internal fields.
+        '''
+
+        self.logger = logger
+        self.backend = backend
+        self.idle_timeout = idle_timeout
+
+        self.lock = threading.Lock()
+        self.handles = {}
+
+
+    def acquire(self, name):
+        '''
+        Return the pool handle for the given network namespace, opening
+        one if it is not in the pool.
+        '''
+
+        with self.lock:
+            handle = self.handles.get(name)
+            if handle:
+                if handle.timer:
+                    handle.timer.cancel()
+                    handle.timer = None
+                handle.refcount += 1
+                self.logger.debug("reusing pooled NetNS and IPDB objects for '%s'" % name)
+                return handle
+
+        # Open the new handle outside of the lock, as it spawns a process.
+        # If another thread opened one for the same namespace in the
+        # meantime, use that one instead.
+        new_handle = PoolHandle(name, *_open(self.logger, name, self.backend))
+
+        with self.lock:
+            handle = self.handles.setdefault(name, new_handle)
+            if handle.timer:
+                handle.timer.cancel()
+                handle.timer = None
+            handle.refcount += 1
+
+        if handle is not new_handle:
+            _close(new_handle.netns, new_handle.ipdb)
+
+        return handle
+
+
+    def release(self, handle):
+        '''
+        Release a reference to the given pool handle, closing it after
+        the idle timeout if it is unused. Handles discarded from the pool
+        are closed as soon as they are unused.
+        '''
+
+        with self.lock:
+            handle.refcount -= 1
+            if handle.refcount > 0:
+                return
+            if not handle.discarded:
+                handle.timer = threading.Timer(self.idle_timeout, self._evict, args=(handle,))
+                handle.timer.daemon = True
+                handle.timer.start()
+                return
+
+        self.logger.debug("closing discarded NetNS and IPDB objects for '%s'" % handle.name)
+        _close(handle.netns, handle.ipdb)
+
+
+    def _evict(self, handle):
+        '''
+        Close the given pool handle, if it is still unused.
+        '''
+
+        with self.lock:
+            if self.handles.get(handle.name) is not handle or handle.refcount > 0:
+                return
+            del self.handles[handle.name]
+
+        self.logger.debug("closing idle NetNS and IPDB objects for '%s'" % handle.name)
+        _close(handle.netns, handle.ipdb)
+
+
+    def discard(self, name):
+        '''
+        Remove the pool handle for the given network namespace from the
+        pool, if one exists. Used when the network namespace is removed.
+        The handle is closed now if it is unused, otherwise it is closed
+        when the last reference to it is released.
+        '''
+
+        with self.lock:
+            handle = self.handles.pop(name, None)
+            if not handle:
+                return
+            if handle.timer:
+                handle.timer.cancel()
+                handle.timer = None
+            if handle.refcount > 0:
+                handle.discarded = True
+                return
+
+        _close(handle.netns, handle.ipdb)
+
+
+    def close(self):
+        '''
+        Close all pool handles.
+        '''
+
+        with self.lock:
+            handles = list(self.handles.values())
+            self.handles.clear()
+            for handle in handles:
+                if handle.timer:
+                    handle.timer.cancel()
+
+        for handle in handles:
+            _close(handle.netns, handle.ipdb)
+
+
+def _open(logger, name, backend="process"):
+    '''
+    Create the given network namespace if it doesn't exist, and return
+    newly created pyroute2 netlink socket and IPDB objects for it.
+
+    The 'process' backend uses a pyroute2 NetNS object, which forks a
+    proxy process running inside the network namespace. The 'setns'
+    backend opens the netlink sockets directly inside the network
+    namespace, without any extra processes.
+    '''
+
+    if name not in pyroute2.netns.listnetns():
+        try:
+            pyroute2.netns.create(name)
+        except FileExistsError:
+            # Network namespace already exists
+            pass
+        except Exception as exc:
+            # pylint: disable=no-member
+            raise UnableToCreateNetnsError(name, exc.message)
+
+    if backend == "setns":
+        logger.debug("creating IPRoute and IPDB objects inside '%s'" % name)
+        nsr, ipdb = _setns_open(name)
+    else:
+        # pylint: disable=no-member
+        logger.debug("creating NetNS and IPDB objects for '%s'" % name)
+        nsr = pyroute2.NetNS(name)
+        ipdb = mirror.ipdb_create(nl=nsr)
+
+    # Bring up the loopback interface inside the namespace, if it is not
+    # already up from an earlier instance.
+    interface.Interface(None, "lo", mirror.interface_lookup(ipdb, "lo"), None, ipdb).up()
+
+    return (nsr, ipdb)
+
+
+def _setns_open(name):
+    '''
+    Switch the calling thread into the given network namespace, create
+    pyroute2 IPRoute and IPDB objects, and switch back to the original
+    network namespace. Netlink sockets stay bound to the namespace they
+    were created in, so they can be used from any namespace afterwards.
+    '''
+
+    orig_fd = os.open("/proc/thread-self/ns/net", os.O_RDONLY)
+
+    try:
+        pyroute2.netns.setns(name, flags=0)
+        try:
+            # IPDB clones its monitoring socket from the given one when
+            # it is created, so it has to be created inside the namespace too.
+            # pylint: disable=no-member
+            ipr = pyroute2.IPRoute()
+            ipdb = mirror.ipdb_create(nl=ipr)
+        finally:
+            pyroute2.netns.setns(orig_fd)
+    finally:
+        os.close(orig_fd)
+
+    return (ipr, ipdb)
+
+
+def _close(nsr, ipdb):
+    '''
+    Close the given pyroute2 NetNS and IPDB objects.
+    '''
+
+    ipdb.release()
+    nsr.close()
 
 
 class NetNS(Worker):
@@ -55,7 +290,7 @@ class NetNS(Worker):
     convenient functions.
     '''
 
-    def __init__(self, dry_run, logger, name):
+    def __init__(self, dry_run, logger, name, pool=None):
         '''
         Set up network namespace internal fields.
         '''
@@ -68,6 +303,12 @@ class NetNS(Worker):
         self.name = name
         self.description = "network namespace '%s'" % self.name
 
+        # Name of the network namespace interfaces of the overlay are in.
+        self.netns_name = self.name
+
+        self.pool = pool
+        self.handle = None
+
         self.netns = None
         self.ipdb = None
 
@@ -83,24 +324,12 @@ class NetNS(Worker):
         self.logger.debug("starting network namespace '%s'" % self.name)
 
         if not self.dry_run:
-            if self.name not in pyroute2.netns.listnetns():
-                try:
-                    pyroute2.netns.create(self.name)
-                except FileExistsError:
-                    # Network namespace already exists
-                    pass
-                except Exception as exc:
-                    # pylint: disable=no-member
-                    raise UnableToCreateNetnsError(self, exc.message)
-
-            # pylint: disable=no-member
-            self.logger.debug("creating NetNS and IPDB objects for '%s'" % self.name)
-            self.netns = pyroute2.NetNS(self.name)
-            self.ipdb = pyroute2.IPDB(nl=self.netns)
-
-            # Bring up the loopback interface inside the namespace.
-            lo_if = interface.get(self.dry_run, self.logger, "lo", netns=self)
-            lo_if.up()
+            if self.pool:
+                self.handle = self.pool.acquire(self.name)
+                self.netns = self.handle.netns
+                self.ipdb = self.handle.ipdb
+            else:
+                self.netns, self.ipdb = _open(self.logger, self.name)
 
         self.logger.debug("finished starting network namespace '%s'" % self.name)
 
@@ -117,8 +346,13 @@ class NetNS(Worker):
         self.logger.debug("stopping network namespace '%s'" % self.name)
 
         if not self.dry_run:
-            self.ipdb.release()
-            self.netns.close()
+            if self.pool:
+                self.pool.release(self.handle)
+                self.handle = None
+            else:
+                _close(self.netns, self.ipdb)
+            self.netns = None
+            self.ipdb = None
 
         self.set_stopped()
 
@@ -133,6 +367,8 @@ class NetNS(Worker):
         self.logger.debug("removing network namespace '%s'" % self.name)
 
         if not self.dry_run:
+            if self.pool:
+                self.pool.discard(self.name)
             pyroute2.netns.remove(self.name)
 
         self.set_removed()
@@ -146,6 +382,17 @@ class NetNS(Worker):
         return interface.get(self.dry_run, self.logger, name, netns=self)
 
 
+    # pylint: disable=unused-argument,no-self-use
+    def attach(self, *interfaces):
+        '''
+        Attach the given interfaces to this namespace. Interfaces are
+        attached to a network namespace simply by being in it, so there
+        is nothing to do.
+        '''
+
+        pass
+
+
     # pylint: disable=invalid-name
     def Popen(self, *args, **kwargs):
         '''
@@ -181,10 +428,11 @@ class NetNS(Worker):
 Worker.register(NetNS)
 
 
-def get(dry_run, logger, name):
+def get(dry_run, logger, name, pool=None):
     '''
     Get the network namespace runtime state for the given name, creating it
-    if it doesn't exist.
+    if it doesn't exist. If a network namespace handle pool is given, the
+    pyroute2 objects for the namespace are shared through it.
     '''
 
-    return NetNS(dry_run, logger, name)
+    return NetNS(dry_run, logger, name, pool=pool)
@@ -0,0 +1,196 @@
+#
+# IPsec overlay network manager (l3overlay)
+# l3overlay/l3overlayd/network/vrf.py - VRF class and functions
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+VRF class and functions.
+'''
+
+
+import subprocess
+
+from l3overlay import util
+
+from l3overlay.l3overlayd.network import interface
+from l3overlay.l3overlayd.network import mirror
+
+from l3overlay.l3overlayd.network.interface import vrf
+
+from l3overlay.util.worker import Worker
+from l3overlay.util.worker import NotYetStartedError
+
+
+class Popen(subprocess.Popen):
+    '''
+    Popen class with a stub release() method, to be API compatible
+    with the NSPopen objects used for network namespaces.
+    '''
+
+    def release(self):
+        '''
+        Stub release method.
+        '''
+
+        pass
+
+
+# pylint: disable=too-many-instance-attributes
+class VRF(Worker):
+    '''
+    VRF device in the root namespace, used in place of a network
+    namespace to isolate the routing of an overlay. Interfaces are
+    created in the root namespace, and attached to the VRF.
+    '''
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dry_run, logger, name, table, owner, root_ipdb):
+        '''
+        Set up VRF internal fields.
+        '''
+
+        super().__init__(use_remove=True)
+
+        self.dry_run = dry_run
+
+        self.logger = logger
+        self.name = name
+        self.description = "VRF '%s'" % self.name
+
+        self.table = table
+        self.owner = owner
+
+        # Interfaces attached to a VRF are in the root namespace.
+        self.netns_name = None
+
+        self.root_ipdb = root_ipdb
+
+        self.vrf_if = None
+        self.ipdb = None
+
+
+    def start(self):
+        '''
+        Start the VRF object, and create the VRF device
+        if it doesn't exist.
+        '''
+
+        self.set_starting()
+
+        self.logger.debug("starting VRF '%s'" % self.name)
+
+        self.ipdb = self.root_ipdb
+
+        self.vrf_if = vrf.create(
+            self.dry_run,
+            self.logger,
+            self.name,
+            self.table,
+            self.owner,
+            root_ipdb=self.root_ipdb,
+        )
+        with interface.batch(self.vrf_if):
+            self.vrf_if.owner_set(self.owner)
+            self.vrf_if.up()
+
+        self.logger.debug("finished starting VRF '%s'" % self.name)
+
+        self.set_started()
+
+
+    def stop(self):
+        '''
+        Stop the VRF object. The VRF device is left in place.
+        '''
+
+        self.set_stopping()
+
+        self.logger.debug("stopping VRF '%s'" % self.name)
+
+        self.vrf_if = None
+        self.ipdb = None
+
+        self.set_stopped()
+
+
+    def remove(self):
+        '''
+        Remove the VRF device from the system, if it exists and is
+        tagged with the owner of this VRF.
+        '''
+
+        self.set_removing()
+
+        self.logger.debug("removing VRF '%s'" % self.name)
+
+        if not self.dry_run and mirror.interface_exists(self.root_ipdb, self.name):
+            vrf_if = vrf.get(self.dry_run, self.logger, self.name, root_ipdb=self.root_ipdb)
+            if interface.owner_get(vrf_if.interface.ifalias) == self.owner:
+                vrf_if.remove()
+            else:
+                self.logger.warning("not removing VRF '%s', as it is not owned by '%s'" %
+                                    (self.name, self.owner))
+
+        self.set_removed()
+
+
+    def attach(self, *interfaces):
+        '''
+        Attach the given interfaces to this VRF, by enslaving them to
+        the VRF device.
+        '''
+
+        if not self.is_started():
+            raise NotYetStartedError(self)
+
+        for iface in interfaces:
+            self.vrf_if.add_port(iface)
+
+
+    # pylint: disable=invalid-name
+    def Popen(self, *args, **kwargs):
+        '''
+        Start a process in the root namespace using the Popen interface.
+        Processes bind to the VRF themselves where required.
+        '''
+
+        if not self.is_started():
+            raise NotYetStartedError(self)
+
+        if self.dry_run:
+            return Popen(
+                [util.command_path("true")],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+
+        return Popen(*args, **kwargs)
+
+# pylint: disable=no-member
+Worker.register(VRF)
+
+
+# pylint: disable=too-many-arguments
+def get(dry_run, logger, name, table, owner, root_ipdb):
+    '''
+    Get the VRF runtime state for the given name and routing table,
+    creating the VRF device on start if it doesn't exist. The VRF
+    device is tagged with the given owner.
+    '''
+
+    return VRF(dry_run, logger, name, table, owner, root_ipdb)
@@ -23,20 +23,34 @@ Overlay class and functions.
 '''
 
 
+import collections
 import configparser
 import copy
+import hashlib
+import io
+import ipaddress
+import itertools
 import math
 import os
 
 from l3overlay import util
 
+from l3overlay.l3overlayd import cleanup
+
 from l3overlay.l3overlayd.network import netns
+from l3overlay.l3overlayd.network import vrf
 
 from l3overlay.l3overlayd.overlay import active_interface
 from l3overlay.l3overlayd.overlay import static_interface
 
 from l3overlay.l3overlayd.overlay.static_interface import bgp
+from l3overlay.l3overlayd.overlay.static_interface import dummy
 from l3overlay.l3overlayd.overlay.static_interface import mesh_tunnel
+from l3overlay.l3overlayd.overlay.static_interface import overlay_link
+from l3overlay.l3overlayd.overlay.static_interface import tunnel
+from l3overlay.l3overlayd.overlay.static_interface import tuntap
+from l3overlay.l3overlayd.overlay.static_interface import veth
+from l3overlay.l3overlayd.overlay.static_interface import vlan
 
 from l3overlay.l3overlayd.overlay.process import bgp as bgp_process
 from l3overlay.l3overlayd.overlay.process import firewall as firewall_process
@@ -48,6 +62,29 @@ from l3overlay.util.exception import L3overlayError
 from l3overlay.util.worker import Worker
 
 
+# Overlay backends. 'netns' gives each overlay its own network namespace.
+# 'vrf' gives each overlay a VRF device in the root namespace, with the
+# overlay's interfaces attached to it.
+BACKENDS = ("netns", "vrf")
+
+# Static interface types which can be attached to a VRF.
+VRF_STATIC_INTERFACES = (bgp.BGP, dummy.Dummy, tunnel.Tunnel, tuntap.Tuntap, vlan.VLAN)
+
+# Routing tables reserved by the kernel, which can not be used by a VRF.
+RESERVED_TABLES = (0, 253, 254, 255)
+
+# Linknet allocation methods. 'sequential' addresses the mesh tunnels in
+# the order of the links which are part of the topology. 'stable' gives
+# every node pair a fixed slot in the linknet pool, using the numbers of
+# the node keys in the node list.
+LINKNET_ALLOCATIONS = ("sequential", "stable")
+
+# Overlay topologies. 'full-mesh' links every node to every other node.
+# 'hub-and-spoke' links every node to every hub. 'partial-mesh' only
+# links the nodes listed as adjacent to each other.
+TOPOLOGIES = ("full-mesh", "hub-and-spoke", "partial-mesh")
+
+
 class LinknetPoolOverflowError(L3overlayError):
     '''
     Exception to raise when the number of linknet pool nodes overflows its address space.
@@ -80,6 +117,46 @@ class MissingThisNodeError(L3overlayError):
         super().__init__(
             "this node '%s' is missing from node list of overlay '%s'" % (this_node, name))
 
+class DuplicateNodeError(L3overlayError):
+    '''
+    Exception to raise when a node name is used more than once in the node list.
+    '''
+    def __init__(self, name, node):
+        super().__init__(
+            "node '%s' is specified more than once in node list of overlay '%s'" % (node, name))
+
+class LinknetSlotError(L3overlayError):
+    '''
+    Exception to raise when two node keys have the same linknet slot.
+    '''
+    def __init__(self, name, slot):
+        super().__init__(
+            "linknet slot %i used by more than one node in overlay '%s'" % (slot, name))
+
+class NoMeshVLANIDError(L3overlayError):
+    '''
+    Exception to raise when the shared mesh datapath is used without a mesh VLAN ID.
+    '''
+    def __init__(self, name):
+        super().__init__(
+            "mesh-vlan-id missing from overlay '%s' using mesh-datapath 'shared'" % name)
+
+class VRFConfigError(L3overlayError):
+    '''
+    Exception to raise when an overlay using the VRF backend is misconfigured.
+    '''
+    def __init__(self, name, message):
+        super().__init__(
+            "invalid configuration for VRF backend in overlay '%s': %s" % (name, message))
+
+class TopologyError(L3overlayError):
+    '''
+    Exception to raise when the topology of an overlay is misconfigured.
+    '''
+    def __init__(self, name, message):
+        super().__init__(
+            "invalid topology configuration in overlay '%s': %s" % (name, message))
+
 class UnsupportedSectionTypeError(L3overlayError):
     '''
     Exception to raise when an unsupported section type was found.
@@ -97,8 +174,9 @@ class Overlay(Worker):
 
     # pylint: disable=too-many-arguments
     def __init__(self, logg, name,
-                 enabled, active, asn, linknet_pool, fwbuilder_script_file, nodes, this_node,
-                 static_interfaces, active_interfaces):
+                 enabled, active, asn, linknet_pool, linknet_allocation, backend, vrf_table,
+                 mesh_datapath, mesh_vlan_id, topology, hubs, adjacencies, fwbuilder_script_file,
+                 nodes, node_slots, this_node, static_interfaces, active_interfaces):
         '''
         Set up the overlay internal fields.
         '''
@@ -113,13 +191,38 @@ class Overlay(Worker):
         self.active = active
         self.asn = asn
         self.linknet_pool = linknet_pool
+        self.linknet_allocation = linknet_allocation
+        self.backend = backend
+        self.vrf_table = vrf_table
+        self.mesh_datapath = mesh_datapath
+        self.mesh_vlan_id = mesh_vlan_id
+        self.topology = topology
+        self.hubs = tuple(hubs)
+        self.adjacencies = tuple(tuple(adjacency) for adjacency in adjacencies)
+
+        # Unordered node pairs linked together in a partial mesh,
+        # with the first node of each adjacency list adjacent to the others.
+        self.adjacent_nodes = frozenset(
+            frozenset((adjacency[0], node)) for adjacency in self.adjacencies
+            for node in adjacency[1:]
+        )
         self.fwbuilder_script_file = fwbuilder_script_file
         self.nodes = nodes
         self.this_node = this_node
 
+        # Node address and linknet slot indexes, keyed by node name.
+        # Linknet slots are the node positions in the node list, or
+        # the node key numbers with stable linknet allocation.
+        self.node_addresses = dict(self.nodes)
+        self.node_slots = dict(zip((node[0] for node in self.nodes), node_slots))
+
         self.static_interfaces = tuple(static_interfaces)
         self.active_interfaces = tuple(active_interfaces)
 
+        # Set by the daemon if the overlay is already running,
+        # and should be adopted on warm restart.
+        self.adopted = False
+
         # Initialised in setup().
         self.firewall_process = None
         self.daemon = None
@@ -127,6 +230,7 @@ class Overlay(Worker):
         self.netns = None
         self.root_dir = None
         self.mesh_tunnels = None
+        self.router_id = None
         self.fwbuilder_script = None
         self.bgp_process = None
 
@@ -164,18 +268,73 @@ class Overlay(Worker):
 
         self.root_dir = os.path.join(self.daemon.overlay_dir, self.name)
 
-        # Overlay network namespace.
-        self.netns = netns.get(self.dry_run, self.logger, self.name)
+        # Overlay network namespace, or the VRF used in its place.
+        # The VRF device is in the root namespace, so it gets a name
+        # reserved by the daemon, and is tagged as owned by the overlay.
+        if self.backend == "vrf":
+            self.netns = vrf.get(
+                self.dry_run,
+                self.logger,
+                self.daemon.interface_name(self.name, suffix="vrf"),
+                self.vrf_table,
+                self.name,
+                self.daemon.root_ipdb,
+            )
+        else:
+            self.netns = netns.get(
+                self.dry_run,
+                self.logger,
+                self.name,
+                pool=self.daemon.netns_pool,
+            )
 
         # Create the mesh tunnel interfaces.
-        mesh_tunnels = []
+        self.mesh_tunnels = self._mesh_tunnels_create()
 
-        for i, node_link in enumerate(self._node_links()):
-            # Check if this link requires a tunnel on this host. If not,
-            # continue.
-            if node_link[0] != self.this_node[0]:
-                continue
+        # BGP router ID, which is kept when the overlay is reloaded,
+        # so BIRD never restarts every BGP session on reload.
+        self.router_id = self._router_id_get()
+
+        # Set up each mesh tunnel and static interface,
+        # with this overlay as the context... if not in
+        # active mode.
+        if not self.active:
+            for mesh in self.mesh_tunnels:
+                mesh.setup(self.daemon, self)
+
+            for stat in self.static_interfaces:
+                stat.setup(self.daemon, self)
+
+        # If in active mode, set up the active interface objects,
+        # which covers network interfaces from both the mesh tunnels and
+        # static interface objects.
+        else:
+            for acti in self.active_interfaces:
+                acti.setup(self.daemon, self)
+
+        # Create the overlay's BGP and firewall process objects,
+        # once the data structures are complete.
+        self.bgp_process = bgp_process.create(self.daemon, self)
+        if not self.active:
+            self.bgp_process.setup()
+        else:
+            self.bgp_process.set_settingup()
+            self.bgp_process.set_setup()
 
+        self.firewall_process = firewall_process.create(self)
+
+        self.set_setup()
+
+
+    def _mesh_tunnels_create(self):
+        '''
+        Create the mesh tunnel objects for the node links
+        starting from this node.
+        '''
+
+        mesh_tunnels = []
+
+        for i, node_link in self._this_node_links():
             # Mesh tunnel interface name, made from the BGP AS number
             # of this overlay and the node pair number.
             name = "m%il%i" % (self.asn, math.floor(i / 2))
@@ -184,11 +343,15 @@ class Overlay(Worker):
             node_remote = node_link[1]
 
             physical_local = self.this_node[1]
-            physical_remote = None
-            for node, address in self.nodes:
-                if node == node_remote:
-                    physical_remote = address
-                    break
+            physical_remote = self.node_addresses[node_remote]
+
+            # Hubs reflect routes between the spokes linked to them. In a
+            # partial mesh, every node reflects routes between its
+            # adjacent nodes, so routes reach nodes without a direct link.
+            if self.topology == "hub-and-spoke":
+                rr_client = node_local in self.hubs and node_remote not in self.hubs
+            else:
+                rr_client = self.topology == "partial-mesh"
 
             virtual_local = self.linknet_pool.network_address + i
             virtual_remote = util.ip_address_remote(virtual_local)
@@ -206,74 +369,98 @@ class Overlay(Worker):
                 physical_remote,
                 virtual_local,
                 virtual_remote,
+                rr_client,
             ))
 
-        self.mesh_tunnels = tuple(mesh_tunnels)
+        return tuple(mesh_tunnels)
 
-        # Set up each mesh tunnel and static interface,
-        # with this overlay as the context... if not in
-        # active mode.
-        if not self.active:
-            for mesh in self.mesh_tunnels:
-                mesh.setup(self.daemon, self)
 
-            for stat in self.static_interfaces:
-                stat.setup(self.daemon, self)
+    def _router_id_get(self):
+        '''
+        Return the BGP router ID of this node. This node's physical
+        address is used if it is an IPv4 address, as it is unique in the
+        overlay and does not depend on the mesh tunnels. Otherwise, the
+        address of the first IPv4 mesh tunnel is used, if there is one.
+        '''
 
-        # If in active mode, set up the active interface objects,
-        # which covers network interfaces from both the mesh tunnels and
-        # static interface objects.
-        else:
-            for acti in self.active_interfaces:
-                acti.setup(self.daemon, self)
+        if not util.ip_address_is_v6(self.this_node[1]):
+            return self.this_node[1]
 
-        # Create the overlay's BGP and firewall process objects,
-        # once the data structures are complete.
-        self.bgp_process = bgp_process.create(self.daemon, self)
-        if not self.active:
-            self.bgp_process.setup()
-        else:
-            self.bgp_process.set_settingup()
-            self.bgp_process.set_setup()
+        for mesh in self.mesh_tunnels:
+            if not mesh.is_ipv6():
+                return mesh.virtual_local
 
-        self.firewall_process = firewall_process.create(self)
+        return ipaddress.ip_address("192.0.2.1")
 
-        self.set_setup()
+
+    def _node_link_allowed(self, link):
+        '''
+        Return True if the overlay topology has a mesh tunnel between
+        the two nodes of the given node link.
+        '''
+
+        if self.topology == "hub-and-spoke":
+            return link[0] in self.hubs or link[1] in self.hubs
+        elif self.topology == "partial-mesh":
+            return frozenset(link) in self.adjacent_nodes
+
+        return True
 
 
     def _node_links(self):
         '''
         Bi-directionally enumerate all of the node links in a mesh, with
-        each node link's reverse immediately following it.
+        each node link's reverse immediately following it. Only node links
+        which are part of the overlay topology are enumerated.
         '''
 
-        # The added nodes list stores the list of nodes with their links
-        # already made in the list. Iterations of the list of nodes will
-        # make links to every node on on this added nodes list before
-        # adding themselves to it for the next iteration.
+        # Each node makes links to every node before it in the node list.
         #
         # Creating links this way allows new nodes to be added without
-        # affecting what the links() method previously generated. In other
-        # words, when new hosts get added, their links get *appended* to the
-        # end of the links list.
+        # affecting what the _node_links() method previously generated. In
+        # other words, when new hosts get added, their links get *appended*
+        # to the end of the links list.
+        #
+        # Node names are unique, so every node pair is enumerated once,
+        # without having to check the links already made.
 
-        links = []
-        added_nodes = []
+        for j, peer_node in enumerate(self.nodes):
+            for node in itertools.islice(self.nodes, j):
+                link = (node[0], peer_node[0])
+                if self._node_link_allowed(link):
+                    yield link
+                    yield link[::-1]
 
-        for peer_node in self.nodes:
-            peer_node_name = peer_node[0]
 
-            # pylint: disable=unused-variable
-            for node_name, node_address in added_nodes:
-                link = (node_name, peer_node_name)
-                if (node_name is not peer_node_name and
-                        link not in links and link[::-1] not in links):
-                    links.append(link)
-                    links.append(link[::-1])
+    def _this_node_links(self):
+        '''
+        Enumerate the node links starting from this node, along with
+        their index in the linknet pool.
+        '''
 
-            added_nodes.append(peer_node)
+        # In a full mesh, or with stable linknet allocation, the link index
+        # is computed directly from the node slots: the nodes in slots
+        # a < b are the node pair number b * (b - 1) / 2 + a, with the
+        # (a, b) link followed by its reverse. The nodes are in slot order,
+        # so the links are enumerated in index order.
+        if self.topology == "full-mesh" or self.linknet_allocation == "stable":
+            this_slot = self.node_slots[self.this_node[0]]
+            for node in self.nodes:
+                link = (self.this_node[0], node[0])
+                slot = self.node_slots[node[0]]
+                if slot == this_slot or not self._node_link_allowed(link):
+                    continue
+                if slot < this_slot:
+                    pair = (this_slot * (this_slot - 1)) // 2 + slot
+                    yield (pair * 2) + 1, link
+                else:
+                    pair = (slot * (slot - 1)) // 2 + this_slot
+                    yield pair * 2, link
+            return
 
-        return links
+        for i, node_link in enumerate(self._node_links()):
+            if node_link[0] == self.this_node[0]:
+                yield i, node_link
 
 
     def start(self):
@@ -292,7 +479,7 @@ class Overlay(Worker):
         # network namespace can be manipulated.
         self.netns.start()
 
-        if not self.active: # Already created in active mode.
+        if not self.active and not self.adopted: # Already created in active mode.
             self.logger.debug("creating overlay root directory")
             if not self.dry_run:
                 util.directory_create(self.root_dir)
@@ -301,17 +488,15 @@ class Overlay(Worker):
         # the appropriate cleanup can be done. Not done in active
         # mode, as there is already a running configuration.
         if not self.active:
-            self.logger.debug("saving overlay configuration to overlay root directory")
-            if not self.dry_run:
-                config = util.config()
-                write(self, config, active=True)
-                with open(os.path.join(self.root_dir, "overlay.conf"), "w") as fil:
-                    config.write(fil)
+            self._config_save()
 
         # Start the mesh tunnels and static interfaces, if the overlay
         # is not in active mode. Otherwise, "start" the active interface
-        # objects.
-        if not self.active:
+        # objects. If the overlay has been adopted on warm restart, its
+        # interfaces are already running with the same configuration.
+        if self.adopted:
+            self.logger.debug("using existing mesh tunnels and static interfaces")
+        elif not self.active:
             for mesh in self.mesh_tunnels:
                 mesh.start()
 
@@ -335,7 +520,9 @@ class Overlay(Worker):
 
         # Shut down the overlay's network namespace object, to
         # reduce memory consumption by the network namespace's
-        # pyroute2 process.
+        # pyroute2 process. The process is kept in the daemon's
+        # network namespace handle pool for a while, in case
+        # other overlays linking to this one need it.
         self.netns.stop()
 
         self.logger.info("finished starting overlay")
@@ -343,6 +530,174 @@ class Overlay(Worker):
         self.set_started()
 
 
+    def _config_save(self):
+        '''
+        Save the running overlay configuration to the overlay root directory.
+        '''
+
+        self.logger.debug("saving overlay configuration to overlay root directory")
+        if not self.dry_run:
+            with open(os.path.join(self.root_dir, "overlay.conf"), "wb") as fil:
+                fil.write(self._config_bytes())
+
+
+    def _config_bytes(self):
+        '''
+        Return the running overlay configuration, as saved to the
+        overlay root directory.
+        '''
+
+        config = util.config()
+        write(self, config, active=True)
+
+        fil = io.StringIO()
+        config.write(fil)
+
+        return fil.getvalue().encode("UTF-8")
+
+
+    def config_hash(self):
+        '''
+        Return the SHA-256 hash of the running overlay configuration,
+        as saved to the overlay root directory.
+        '''
+
+        return hashlib.sha256(self._config_bytes()).hexdigest()
+
+
+    def reloadable(self, overlay):
+        '''
+        Check if this overlay can be reloaded in place using the
+        configuration of the given overlay, without restarting it.
+        This is possible if only the mesh nodes and static interfaces
+        have changed, and none of the changed static interfaces link to
+        other network namespaces.
+        '''
+
+        if not self.is_started() or self.active:
+            return False
+
+        config = config_get(self)
+        new_config = config_get(overlay)
+
+        if _mesh_config_strip(config["overlay"]) != _mesh_config_strip(new_config["overlay"]):
+            return False
+
+        statics = _static_interfaces_get(self)
+        new_statics = _static_interfaces_get(overlay)
+
+        for section in set(statics.keys()) | set(new_statics.keys()):
+            if section in statics and section in new_statics:
+                if statics[section][1] == new_statics[section][1]:
+                    continue
+
+            for entry in (statics.get(section), new_statics.get(section)):
+                if entry is None:
+                    continue
+                stat = entry[0]
+                if isinstance(stat, overlay_link.OverlayLink):
+                    return False
+                if isinstance(stat, veth.VETH) and stat.inner_namespace:
+                    return False
+
+        return True
+
+
+    def reload(self, overlay):
+        '''
+        Reload the overlay in place, using the configuration of the given
+        overlay. Mesh tunnels and static interfaces which have been changed
+        or removed are stopped, new or changed ones are started, and the
+        BGP process is reloaded with the new configuration. Should only be
+        used if reloadable() returns True.
+        '''
+
+        # pylint: disable=too-many-branches
+
+        self.logger.info("reloading overlay")
+
+        meshes = _mesh_tunnels_get(self.mesh_tunnels)
+        # pylint: disable=protected-access
+        new_meshes = _mesh_tunnels_get(overlay._mesh_tunnels_create())
+
+        statics = _static_interfaces_get(self)
+        new_statics = _static_interfaces_get(overlay)
+
+        self.netns.start()
+
+        for section, (stat, config) in statics.items():
+            if section not in new_statics or new_statics[section][1] != config:
+                stat.stop()
+                stat.remove()
+
+        for name, (mesh, config) in meshes.items():
+            if name not in new_meshes or new_meshes[name][1] != config:
+                mesh.stop()
+                mesh.remove()
+
+        # Use the new mesh nodes, so the saved overlay configuration
+        # matches the running mesh tunnels.
+        self.topology = overlay.topology
+        self.hubs = overlay.hubs
+        self.adjacencies = overlay.adjacencies
+        self.adjacent_nodes = overlay.adjacent_nodes
+        self.nodes = overlay.nodes
+        self.this_node = overlay.this_node
+        self.node_addresses = overlay.node_addresses
+        self.node_slots = overlay.node_slots
+
+        mesh_tunnels = []
+        static_interfaces = []
+        started_interfaces = []
+
+        for name, (mesh, config) in new_meshes.items():
+            if name in meshes and meshes[name][1] == config:
+                mesh_tunnels.append(meshes[name][0])
+            else:
+                mesh.logger = self.logger
+                mesh.setup(self.daemon, self)
+                mesh_tunnels.append(mesh)
+                started_interfaces.append(mesh)
+
+        for section, (stat, config) in new_statics.items():
+            if section in statics and statics[section][1] == config:
+                static_interfaces.append(statics[section][0])
+            else:
+                stat.logger = self.logger
+                stat.setup(self.daemon, self)
+                static_interfaces.append(stat)
+                started_interfaces.append(stat)
+
+        self.mesh_tunnels = tuple(mesh_tunnels)
+        self.static_interfaces = tuple(static_interfaces)
+
+        for iface in started_interfaces:
+            iface.start()
+
+        self._config_save()
+
+        # Replace the BGP process with one using the new mesh tunnels and
+        # static interfaces, keeping the router ID. This includes overlay
+        # links from other overlays to this overlay. Starting the new
+        # BGP process reloads the running BIRD daemons.
+        self.bgp_process = bgp_process.create(self.daemon, self)
+        self.bgp_process.setup()
+
+        for ove in self.daemon.overlays.values():
+            if ove is self or not ove.is_setup():
+                continue
+            for stat in ove.static_interfaces:
+                if (isinstance(stat, overlay_link.OverlayLink) and
+                        stat.inner_overlay_name == self.name):
+                    self.bgp_process.overlay_link_add(stat)
+
+        self.bgp_process.start()
+
+        self.netns.stop()
+
+        self.logger.info("finished reloading overlay")
+
+
     def stop(self):
         '''
         Stop the overlay.
@@ -361,7 +716,9 @@ class Overlay(Worker):
 
         self.bgp_process.stop()
 
-        if not self.active:
+        if self.daemon.fast_stop:
+            self._interfaces_fast_remove()
+        elif not self.active:
             for stat in self.static_interfaces:
                 stat.stop()
                 stat.remove()
@@ -379,6 +736,9 @@ class Overlay(Worker):
         self.netns.stop()
         self.netns.remove()
 
+        if self.backend == "vrf":
+            self.daemon.interface_name_remove(self.netns.name)
+
         self.logger.debug("removing overlay root directory")
         util.directory_remove(self.root_dir)
 
@@ -387,6 +747,40 @@ class Overlay(Worker):
         self.set_stopped()
 
 
+    def _interfaces_fast_remove(self):
+        '''
+        Remove the root namespace interfaces of the overlay in one pass,
+        leaving everything else to be removed along with the overlay
+        network namespace. Interfaces in other network namespaces are
+        all veth peers of interfaces in the overlay network namespace,
+        so they get removed along with it as well.
+        '''
+
+        if not self.active:
+            acti_ifaces = [
+                acti
+                for iface in self.static_interfaces + self.mesh_tunnels
+                for acti in iface.active_interfaces()
+            ]
+        else:
+            acti_ifaces = self.active_interfaces
+
+        interface_names = set(
+            acti.interface_name for acti in acti_ifaces if not acti.netns_name
+        )
+
+        if interface_names and not self.dry_run:
+            cleanup.root_interfaces_remove(self.logger, interface_names)
+
+        # Release the runtime state of the static interfaces.
+        if not self.active:
+            for stat in self.static_interfaces:
+                stat.remove()
+
+            for mesh in self.mesh_tunnels:
+                mesh.remove()
+
+
     def remove(self):
         '''
         Remove the overlay runtime state.
@@ -429,6 +823,30 @@ def read(log, log_level, conf=None, config=None):
     active = util.boolean_get(section["active"]) if "active" in section else False
     asn = util.integer_get(section["asn"], minval=0, maxval=65535)
     linknet_pool = util.ip_network_get(section["linknet-pool"])
+    linknet_allocation = util.enum_get(
+        section["linknet-allocation"],
+        LINKNET_ALLOCATIONS,
+    ) if "linknet-allocation" in section else "sequential"
+
+    backend = util.enum_get(section["backend"], BACKENDS) if "backend" in section else "netns"
+    vrf_table = util.integer_get(
+        section["vrf-table"],
+        minval=1,
+        maxval=4294967295,
+    ) if "vrf-table" in section else None
+
+    mesh_datapath = util.enum_get(
+        section["mesh-datapath"],
+        mesh_tunnel.DATAPATHS,
+    ) if "mesh-datapath" in section else ("direct" if backend == "vrf" else "bridged")
+    mesh_vlan_id = util.integer_get(
+        section["mesh-vlan-id"],
+        minval=1,
+        maxval=4094,
+    ) if "mesh-vlan-id" in section else None
+
+    if mesh_datapath == "shared" and mesh_vlan_id is None:
+        raise NoMeshVLANIDError(name)
 
     fwbuilder_script_file = section["fwbuilder-script"] if "fwbuilder-script" in section else None
 
@@ -438,22 +856,68 @@ def read(log, log_level, conf=None, config=None):
     logg = logger.create(log, log_level, "l3overlay", logg_name)
     logg.start()
 
-    # Generate the list of nodes, sorted numerically.
+    # Generate the list of nodes. With stable linknet allocation, the
+    # node key numbers are the linknet slots, and the nodes are sorted
+    # numerically by slot.
     nodes = []
     for key, value in section.items():
         if key.startswith("node-"):
             node = util.list_get(value, length=2, pattern="\\s")
-            nodes.append((util.name_get(node[0]), util.ip_address_get(node[1])))
+            slot = util.integer_get(key[5:], minval=0) if linknet_allocation == "stable" else None
+            nodes.append((slot, util.name_get(node[0]), util.ip_address_get(node[1])))
 
     if not nodes:
         raise NoNodeListError(name)
 
+    if linknet_allocation == "stable":
+        nodes.sort(key=lambda node: node[0])
+        node_slots = [node[0] for node in nodes]
+        for slot, next_slot in zip(node_slots, node_slots[1:]):
+            if slot == next_slot:
+                raise LinknetSlotError(name, slot)
+    else:
+        node_slots = list(range(len(nodes)))
+    nodes = [node[1:] for node in nodes]
+
+    node_names = set()
+    for node in nodes:
+        if node[0] in node_names:
+            raise DuplicateNodeError(name, node[0])
+        node_names.add(node[0])
+
     # Get the node object for this node from the list of nodes.
     this_node = next((n for n in nodes if n[0] == util.name_get(section["this-node"])), None)
 
     if not this_node:
         raise MissingThisNodeError(name, util.name_get(section["this-node"]))
 
+    # Overlay topology.
+    topology = util.enum_get(
+        section["topology"],
+        TOPOLOGIES,
+    ) if "topology" in section else "full-mesh"
+
+    hubs = [
+        util.name_get(hub) for hub in util.list_get(section["hubs"], pattern="\\s+")
+    ] if "hubs" in section else []
+
+    adjacencies = []
+    for key, value in section.items():
+        if key.startswith("adjacency-"):
+            adjacency = [util.name_get(n) for n in util.list_get(value, pattern="\\s+")]
+            if len(adjacency) < 2:
+                raise TopologyError(name, "%s lists no adjacent nodes" % key)
+            adjacencies.append(adjacency)
+
+    for node_name in hubs + [n for adjacency in adjacencies for n in adjacency]:
+        if node_name not in node_names:
+            raise TopologyError(name, "node '%s' is missing from node list" % node_name)
+
+    if topology == "hub-and-spoke" and not hubs:
+        raise TopologyError(name, "hubs missing for topology 'hub-and-spoke'")
+    if topology == "partial-mesh" and not adjacencies:
+        raise TopologyError(name, "adjacency list missing for topology 'partial-mesh'")
+
     # Static and active interfaces.
     static_interfaces = []
     active_interfaces = []
@@ -469,11 +933,118 @@ def read(log, log_level, conf=None, config=None):
         else:
             raise UnsupportedSectionTypeError(name, sect)
 
+    if backend == "vrf":
+        _vrf_config_check(
+            name, vrf_table, mesh_datapath, fwbuilder_script_file, static_interfaces,
+        )
+
     # Return overlay object.
     return Overlay(
         logg, name,
-        enabled, active, asn, linknet_pool, fwbuilder_script_file, nodes, this_node,
-        static_interfaces, active_interfaces,
+        enabled, active, asn, linknet_pool, linknet_allocation, backend, vrf_table,
+        mesh_datapath, mesh_vlan_id, topology, hubs, adjacencies, fwbuilder_script_file,
+        nodes, node_slots, this_node, static_interfaces, active_interfaces,
+    )
+
+
+# pylint: disable=too-many-arguments
+def _vrf_config_check(name, vrf_table, mesh_datapath, fwbuilder_script_file, static_interfaces):
+    '''
+    Check that the given overlay configuration can be used with the
+    VRF backend, where the overlay has no network namespace of its own.
+    '''
+
+    if vrf_table is None:
+        raise VRFConfigError(name, "vrf-table is missing")
+
+    if vrf_table in RESERVED_TABLES:
+        raise VRFConfigError(name, "vrf-table %i is reserved by the kernel" % vrf_table)
+
+    if mesh_datapath == "bridged":
+        raise VRFConfigError(name, "mesh-datapath '%s' is unsupported" % mesh_datapath)
+
+    # fwbuilder scripts expect to configure the firewall of a network
+    # namespace of their own, so they would apply to the whole host.
+    if fwbuilder_script_file:
+        raise VRFConfigError(name, "fwbuilder-script is unsupported")
+
+    for stat in static_interfaces:
+        if (not isinstance(stat, VRF_STATIC_INTERFACES) or
+                (isinstance(stat, vlan.VLAN) and stat.datapath != "direct")):
+            raise VRFConfigError(
+                name,
+                "static interface '%s' of type '%s' is unsupported" %
+                (stat.name, type(stat).__name__),
+            )
+
+
+def _static_interfaces_get(overlay):
+    '''
+    Return an ordered dictionary mapping the configuration section name
+    of each of the given overlay's static interfaces to a tuple of the
+    static interface object and its configuration.
+    '''
+
+    statics = collections.OrderedDict()
+
+    for stat in overlay.static_interfaces:
+        config = util.config()
+        static_interface.write(stat, config)
+        for section in config.sections():
+            statics[section] = (stat, dict(config[section]))
+
+    return statics
+
+
+def _mesh_tunnels_get(mesh_tunnels):
+    '''
+    Return a dictionary of the given mesh tunnels, keyed by name, with
+    their configuration for comparing mesh tunnels.
+    '''
+
+    return collections.OrderedDict(
+        (
+            mesh.name,
+            (
+                mesh,
+                (
+                    mesh.node_local, mesh.node_remote,
+                    mesh.physical_local, mesh.physical_remote,
+                    mesh.virtual_local, mesh.virtual_remote,
+                    mesh.rr_client,
+                ),
+            ),
+        )
+        for mesh in mesh_tunnels
+    )
+
+
+def _mesh_config_strip(section):
+    '''
+    Return the given overlay section without the options which
+    configure the mesh nodes and their node links.
+    '''
+
+    return dict(
+        (key, value) for key, value in section.items()
+        if key not in ("topology", "hubs") and
+        not key.startswith("node-") and not key.startswith("adjacency-")
+    )
+
+
+def config_get(overlay):
+    '''
+    Return the configuration of the given overlay as a dictionary
+    of sections, excluding runtime state, for comparing overlays.
+    '''
+
+    config = util.config()
+    write(overlay, config)
+
+    return dict(
+        (section, dict(config[section]))
+        for section in config.sections()
+        if not section.startswith("active-interface")
     )
 
 
@@ -490,12 +1061,24 @@ def write(overlay, config, active=False):
     section["active"] = str(active).lower()
     section["asn"] = str(overlay.asn)
     section["linknet-pool"] = str(overlay.linknet_pool)
+    section["linknet-allocation"] = overlay.linknet_allocation
+    section["backend"] = overlay.backend
+    if overlay.vrf_table is not None:
+        section["vrf-table"] = str(overlay.vrf_table)
+    section["mesh-datapath"] = overlay.mesh_datapath
+    if overlay.mesh_vlan_id is not None:
+        section["mesh-vlan-id"] = str(overlay.mesh_vlan_id)
+    section["topology"] = overlay.topology
+    if overlay.hubs:
+        section["hubs"] = " ".join(overlay.hubs)
+    for i, adjacency in enumerate(overlay.adjacencies):
+        section["adjacency-%i" % i] = " ".join(adjacency)
     if overlay.fwbuilder_script_file:
         section["fwbuilder-script"] = overlay.fwbuilder_script_file
 
     section["this-node"] = overlay.this_node[0]
-    for i, node in enumerate(overlay.nodes):
-        section["node-%i" % i] = "%s %s" % (node[0], str(node[1]))
+    for node in overlay.nodes:
+        section["node-%i" % overlay.node_slots[node[0]]] = "%s %s" % (node[0], str(node[1]))
 
     for stat in overlay.static_interfaces:
         static_interface.write(stat, config)
@@ -504,3 +1087,8 @@ def write(overlay, config, active=False):
         for inte in overlay.mesh_tunnels + overlay.static_interfaces:
             for acti in inte.active_interfaces():
                 active_interface.write(acti, config)
+        if overlay.backend == "vrf":
+            active_interface.write(
+                active_interface.create(overlay.logger, overlay.netns.name, None),
+                config,
+            )
@@ -24,6 +24,7 @@ Active interface base class.
 
 
 from l3overlay.l3overlayd.network import interface
+from l3overlay.l3overlayd.network import mirror
 from l3overlay.l3overlayd.network import netns
 
 from l3overlay.l3overlayd.overlay.interface import Interface
@@ -72,12 +73,16 @@ class ActiveInterface(Interface):
         # Start a NetNS object for the specific network namespace specified,
         # if it is not the overlay namespace.
         elif self.netns_name != self.netns.name:
-            netn = netns.get(self.dry_run, self.logger, self.netns_name)
+            netn = netns.get(
+                self.dry_run,
+                self.logger,
+                self.netns_name,
+                pool=self.daemon.netns_pool,
+            )
             netn.start()
 
         # Remove the interface, IF it can be found in the appropriate namespace.
-        if ((netn and self.interface_name in netn.ipdb.by_name.keys()) or
-                (not netn and self.interface_name in self.root_ipdb.by_name.keys())):
+        if mirror.interface_exists(netn.ipdb if netn else self.root_ipdb, self.interface_name):
             interface.get(
                 self.dry_run,
                 self.logger,
@@ -86,6 +86,12 @@ class Process(Worker):
         self.asn = overlay.asn
         self.linknet_pool = overlay.linknet_pool
 
+        # BIRD runs in the root namespace for overlays using the VRF
+        # backend, and binds its protocols to the overlay's VRF.
+        self.vrf = overlay.netns.name if overlay.backend == "vrf" else None
+        self.vrf_table = overlay.vrf_table
+
+        self.router_id = overlay.router_id
         self.mesh_tunnels = tuple(overlay.mesh_tunnels)
         self.static_interfaces = tuple(overlay.static_interfaces)
 
@@ -146,6 +152,18 @@ class Process(Worker):
         Process._bird_config_add(self.bird_config, key, value)
 
 
+    def overlay_link_add(self, overlay_link):
+        '''
+        Add the BGP configuration for an overlay link from another overlay,
+        for which this BGP process's overlay is the inner overlay.
+        '''
+
+        if overlay_link.is_ipv6():
+            self.bird_config_add("overlay_links", overlay_link)
+        else:
+            self.bird6_config_add("overlay_links", overlay_link)
+
+
     def setup(self):
         '''
         Setup the BGP process.
@@ -190,10 +208,7 @@ class Process(Worker):
                 # Add the corresponding BGP configuration for
                 # the overlay link to the inner overlay's BGP process.
                 inner_overlay = self.daemon.overlays[stat.inner_overlay_name]
-                if stat.is_ipv6():
-                    inner_overlay.bgp_process.bird_config_add("overlay_links", stat)
-                else:
-                    inner_overlay.bgp_process.bird6_config_add("overlay_links", stat)
+                inner_overlay.bgp_process.overlay_link_add(stat)
 
         self.logger.info("finished setting up BGP process")
 
@@ -226,7 +241,7 @@ class Process(Worker):
             util.directory_create(self.bird_pid_dir)
 
         if self.bird_config:
-            self.bird_config["router_id"] = str(self.mesh_tunnels[0].virtual_local)
+            self.bird_config["router_id"] = str(self.router_id)
             self._start_bird_daemon(
                 self.bird,
                 self.bird_conf,
@@ -235,6 +250,8 @@ class Process(Worker):
                 self.bird_ctl,
                 self.bird_pid,
             )
+        else:
+            self._stop_bird_daemon(self.bird_conf, self.bird_pid)
 
         if self.bird6_config:
             self.bird6_config["router_id"] = "192.0.2.1"
@@ -246,6 +263,8 @@ class Process(Worker):
                 self.bird6_ctl,
                 self.bird6_pid,
             )
+        else:
+            self._stop_bird_daemon(self.bird6_conf, self.bird6_pid)
 
         self.logger.info("finished starting BGP process")
 
@@ -268,6 +287,8 @@ class Process(Worker):
         bird_config["log_level"] = self.log_level
         bird_config["overlay"] = self.name
         bird_config["asn"] = self.asn
+        bird_config["vrf"] = self.vrf
+        bird_config["vrf_table"] = self.vrf_table
 
         if not self.dry_run:
             with open(bird_conf, "w") as fil:
@@ -349,6 +370,23 @@ class Process(Worker):
                 bird_process.release()
 
 
+    def _stop_bird_daemon(self, bird_conf, bird_pid):
+        '''
+        Stop a BIRD daemon started with a previous configuration, which
+        has nothing left to configure after a reload, so it does not keep
+        serving the old routes. Its configuration file is removed as well.
+        '''
+
+        if util.pid_exists(pid_file=bird_pid):
+            self.logger.debug("stopping BIRD daemon with empty configuration '%s'" % bird_conf)
+            if not self.dry_run:
+                util.pid_kill(pid_file=bird_pid)
+
+        if not self.dry_run and os.path.exists(bird_conf):
+            self.logger.debug("removing BIRD configuration file '%s'" % bird_conf)
+            util.file_remove(bird_conf)
+
+
     def stop(self):
         '''
         Stop the BGP process.
@@ -33,6 +33,41 @@ class StaticInterface(Interface):
     Abstract base class for an overlay static interface.
     '''
 
+    def __init__(self, logger, name=None):
+        '''
+        Set internal fields for the static interface to use.
+        '''
+
+        super().__init__(logger, name)
+
+        # Interface names reserved using interface_name().
+        self.interface_names = []
+
+
+    def interface_name(self, name, suffix=None, limit=15):
+        '''
+        Reserve a unique interface name from the daemon, based on the
+        given name. The name is released when the static interface is
+        removed, so it can be used again when it is set up again.
+        '''
+
+        ifname = self.daemon.interface_name(name, suffix=suffix, limit=limit)
+        self.interface_names.append(ifname)
+
+        return ifname
+
+
+    def remove(self):
+        '''
+        Clean up the static interface runtime state, releasing
+        its reserved interface names.
+        '''
+
+        for ifname in self.interface_names:
+            self.daemon.interface_name_remove(ifname)
+
+        self.interface_names = []
+
 
     @abc.abstractmethod
     def is_ipv6(self):
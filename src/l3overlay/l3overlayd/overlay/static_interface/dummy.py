@@ -25,6 +25,8 @@ Dummy overlay static interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
+
 from l3overlay.l3overlayd.network.interface import dummy
 
 from l3overlay.l3overlayd.overlay import active_interface
@@ -59,7 +61,7 @@ class Dummy(StaticInterface):
 
         super().setup(daemon, overlay)
 
-        self.dummy_name = self.daemon.interface_name(self.name)
+        self.dummy_name = self.interface_name(self.name)
 
 
     def start(self):
@@ -75,8 +77,11 @@ class Dummy(StaticInterface):
             self.dummy_name,
             netns=self.netns,
         )
-        dummy_if.add_ip(self.address, self.netmask)
-        dummy_if.up()
+        self.netns.attach(dummy_if)
+        with interface.batch(dummy_if):
+            dummy_if.owner_set(self.overlay.name)
+            dummy_if.ips_set((self.address, self.netmask))
+            dummy_if.up()
 
         self.logger.info("finished starting static dummy '%s'" % self.name)
 
@@ -108,7 +113,7 @@ class Dummy(StaticInterface):
         physical interfaces this static interface uses.
         '''
 
-        return (active_interface.create(self.logger, self.dummy_name, self.netns.name),)
+        return (active_interface.create(self.logger, self.dummy_name, self.netns.netns_name),)
 
 StaticInterface.register(Dummy)
 
@@ -25,6 +25,8 @@ External tunnel overlay static interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
+
 from l3overlay.l3overlayd.network.interface import bridge
 from l3overlay.l3overlayd.network.interface import gre
 from l3overlay.l3overlayd.network.interface import veth
@@ -86,7 +88,7 @@ class ExternalTunnel(StaticInterface):
         if self.use_ipsec:
             self.daemon.ipsec_tunnel_add(self.local, self.remote, self.ipsec_psk)
 
-        self.tunnel_name = self.daemon.interface_name(self.name, limit=13)
+        self.tunnel_name = self.interface_name(self.name, limit=13)
         self.bridge_name = "%sbr" % self.tunnel_name
         self.root_veth_name = "%sv0" % self.tunnel_name
         self.netns_veth_name = "%sv1" % self.tunnel_name
@@ -118,10 +120,10 @@ class ExternalTunnel(StaticInterface):
             self.root_veth_name,
             self.netns_veth_name,
             root_ipdb=self.root_ipdb,
+            peer_netns=self.netns,
         )
 
         netns_veth_if = root_veth_if.peer_get(peer_netns=self.netns)
-        netns_veth_if.netns_set(self.netns)
 
         bridge_if = bridge.create(
             self.dry_run,
@@ -129,15 +131,20 @@ class ExternalTunnel(StaticInterface):
             self.bridge_name,
             root_ipdb=self.root_ipdb,
         )
-        bridge_if.add_port(tunnel_if)
-        bridge_if.add_port(root_veth_if)
 
-        netns_veth_if.add_ip(self.address, self.netmask)
+        with interface.batch(tunnel_if, root_veth_if, netns_veth_if, bridge_if):
+            # Tag the interfaces as owned by this overlay.
+            for iface in (tunnel_if, root_veth_if, netns_veth_if, bridge_if):
+                iface.owner_set(self.overlay.name)
+
+            bridge_if.ports_set(tunnel_if, root_veth_if)
 
-        tunnel_if.up()
-        root_veth_if.up()
-        netns_veth_if.up()
-        bridge_if.up()
+            netns_veth_if.ips_set((self.address, self.netmask))
+
+            tunnel_if.up()
+            root_veth_if.up()
+            netns_veth_if.up()
+            bridge_if.up()
 
         self.logger.info("finished starting static external tunnel '%s'" % self.name)
 
@@ -173,6 +180,8 @@ class ExternalTunnel(StaticInterface):
         Remove the static external tunnel.
         '''
 
+        super().remove()
+
         if self.use_ipsec:
             self.daemon.gre_key_remove(self.local, self.remote, self.key if self.key else self.ikey)
             self.daemon.ipsec_tunnel_remove(self.local, self.remote)
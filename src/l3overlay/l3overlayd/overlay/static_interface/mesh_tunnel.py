@@ -25,15 +25,26 @@ Mesh tunnel interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
+
 from l3overlay.l3overlayd.network.interface import bridge
 from l3overlay.l3overlayd.network.interface import gre
 from l3overlay.l3overlayd.network.interface import veth
+from l3overlay.l3overlayd.network.interface import vlan
 
 from l3overlay.l3overlayd.overlay import active_interface
 
 from l3overlay.l3overlayd.overlay.static_interface.base import StaticInterface
 
 
+# Mesh tunnel datapaths. 'bridged' terminates the gretap in the root
+# namespace, bridging it to a veth pair into the overlay namespace.
+# 'direct' moves the gretap itself into the overlay namespace.
+# 'shared' moves a vlan interface on a gretap shared by all overlays
+# using the same physical link into the overlay namespace.
+DATAPATHS = ("bridged", "direct", "shared")
+
+
 # pylint: disable=too-many-instance-attributes
 class MeshTunnel(StaticInterface):
     '''
@@ -44,7 +55,8 @@ class MeshTunnel(StaticInterface):
     def __init__(self, logger, name,
                  node_local, node_remote,
                  physical_local, physical_remote,
-                 virtual_local, virtual_remote):
+                 virtual_local, virtual_remote,
+                 rr_client):
         '''
         Set up mesh tunnel internal fields.
         '''
@@ -61,8 +73,14 @@ class MeshTunnel(StaticInterface):
         self.virtual_remote = virtual_remote
         self.virtual_netmask = 127 if util.ip_address_is_v6(self.virtual_local) else 31
 
+        # True if the remote node is a route reflector client of this node.
+        self.rr_client = rr_client
+
         # Initialised in setup().
         self.asn = None
+        self.datapath = None
+        self.vlan_id = None
+        self.shared_name = None
         self.bridge_name = None
         self.root_veth_name = None
         self.netns_veth_name = None
@@ -80,8 +98,17 @@ class MeshTunnel(StaticInterface):
         self.netns_veth_name = "%sv1" % self.name
 
         self.asn = self.overlay.asn
-
-        self.daemon.gre_key_add(self.physical_local, self.physical_remote, self.asn)
+        self.datapath = self.overlay.mesh_datapath
+
+        if self.datapath == "shared":
+            self.vlan_id = self.overlay.mesh_vlan_id
+            self.shared_name = self.daemon.shared_tunnel_add(
+                self.physical_local,
+                self.physical_remote,
+                self.vlan_id,
+            )
+        else:
+            self.daemon.gre_key_add(self.physical_local, self.physical_remote, self.asn)
         self.daemon.mesh_link_add(self.physical_local, self.physical_remote)
 
 
@@ -92,6 +119,22 @@ class MeshTunnel(StaticInterface):
 
         self.logger.info("starting mesh tunnel '%s'" % self.name)
 
+        if self.datapath == "shared":
+            self._shared_start()
+        elif self.datapath == "direct":
+            self._direct_start()
+        else:
+            self._bridged_start()
+
+        self.logger.info("finished starting mesh tunnel '%s'" % self.name)
+
+
+    def _bridged_start(self):
+        '''
+        Start the mesh tunnel, bridging the gretap in the root namespace
+        to a veth pair into the overlay network namespace.
+        '''
+
         tunnel_if = gre.create(
             self.dry_run,
             self.logger,
@@ -109,10 +152,10 @@ class MeshTunnel(StaticInterface):
             self.root_veth_name,
             self.netns_veth_name,
             root_ipdb=self.root_ipdb,
+            peer_netns=self.netns,
         )
 
         netns_veth_if = root_veth_if.peer_get(peer_netns=self.netns)
-        netns_veth_if.netns_set(self.netns)
 
         bridge_if = bridge.create(
             self.dry_run,
@@ -120,19 +163,77 @@ class MeshTunnel(StaticInterface):
             self.bridge_name,
             root_ipdb=self.root_ipdb,
         )
-        bridge_if.add_port(tunnel_if)
-        bridge_if.add_port(root_veth_if)
 
-        # Add an address to the network namespace veth interface, so it can
-        # be addressed from either side of the mesh tunnel.
-        netns_veth_if.add_ip(self.virtual_local, self.virtual_netmask)
+        # Collect the changes to the interfaces, and apply them
+        # in one transaction per interface.
+        with interface.batch(tunnel_if, root_veth_if, netns_veth_if, bridge_if):
+            # Tag the interfaces as owned by this overlay.
+            for iface in (tunnel_if, root_veth_if, netns_veth_if, bridge_if):
+                iface.owner_set(self.overlay.name)
 
-        tunnel_if.up()
-        root_veth_if.up()
-        netns_veth_if.up()
-        bridge_if.up()
+            bridge_if.ports_set(tunnel_if, root_veth_if)
 
-        self.logger.info("finished starting mesh tunnel '%s'" % self.name)
+            # Add an address to the network namespace veth interface, so it can
+            # be addressed from either side of the mesh tunnel.
+            netns_veth_if.ips_set((self.virtual_local, self.virtual_netmask))
+
+            tunnel_if.up()
+            root_veth_if.up()
+            netns_veth_if.up()
+            bridge_if.up()
+
+
+    def _direct_start(self):
+        '''
+        Start the mesh tunnel, terminating the gretap directly inside
+        the overlay network namespace. The gretap is created in the root
+        namespace, so its encapsulated packets stay there.
+        '''
+
+        tunnel_if = gre.create(
+            self.dry_run,
+            self.logger,
+            self.name,
+            "gretap",
+            self.physical_local,
+            self.physical_remote,
+            key=self.asn,
+            netns=self.netns,
+            underlay_root_ipdb=self.root_ipdb,
+        )
+        self.netns.attach(tunnel_if)
+
+        with interface.batch(tunnel_if):
+            tunnel_if.owner_set(self.overlay.name)
+            tunnel_if.ips_set((self.virtual_local, self.virtual_netmask))
+            tunnel_if.up()
+
+
+    def _shared_start(self):
+        '''
+        Start the mesh tunnel, as a vlan interface on the tunnel shared
+        by all overlays using the same physical link, moved into the
+        overlay network namespace. The shared tunnel stays in the root
+        namespace, and gets created if it does not exist already.
+        '''
+
+        shared_if = self.daemon.shared_tunnel_create(self.physical_local, self.physical_remote)
+
+        vlan_if = vlan.create(
+            self.dry_run,
+            self.logger,
+            self.name,
+            shared_if,
+            self.vlan_id,
+            netns=self.netns,
+            underlay_root_ipdb=self.root_ipdb,
+        )
+        self.netns.attach(vlan_if)
+
+        with interface.batch(vlan_if):
+            vlan_if.owner_set(self.overlay.name)
+            vlan_if.ips_set((self.virtual_local, self.virtual_netmask))
+            vlan_if.up()
 
 
     def stop(self):
@@ -142,15 +243,25 @@ class MeshTunnel(StaticInterface):
 
         self.logger.info("stopping mesh tunnel '%s'" % self.name)
 
-        bridge.get(self.dry_run, self.logger, self.bridge_name, root_ipdb=self.root_ipdb).remove()
-        veth.get(
-            self.dry_run,
-            self.logger,
-            self.root_veth_name,
-            self.netns_veth_name,
-            root_ipdb=self.root_ipdb,
-        ).remove()
-        gre.get(self.dry_run, self.logger, self.name, "gretap", root_ipdb=self.root_ipdb).remove()
+        if self.datapath == "shared":
+            vlan.get(self.dry_run, self.logger, self.name, netns=self.netns).remove()
+        elif self.datapath == "direct":
+            gre.get(self.dry_run, self.logger, self.name, "gretap", netns=self.netns).remove()
+        else:
+            bridge.get(
+                self.dry_run,
+                self.logger,
+                self.bridge_name,
+                root_ipdb=self.root_ipdb,
+            ).remove()
+            veth.get(
+                self.dry_run,
+                self.logger,
+                self.root_veth_name,
+                self.netns_veth_name,
+                root_ipdb=self.root_ipdb,
+            ).remove()
+            gre.get(self.dry_run, self.logger, self.name, "gretap", root_ipdb=self.root_ipdb).remove()
 
         self.logger.info("finished stopping mesh tunnel '%s'" % self.name)
 
@@ -160,7 +271,16 @@ class MeshTunnel(StaticInterface):
         Remove the mesh tunnel.
         '''
 
-        self.daemon.gre_key_remove(self.physical_local, self.physical_remote, self.asn)
+        super().remove()
+
+        if self.datapath == "shared":
+            self.daemon.shared_tunnel_remove(
+                self.physical_local,
+                self.physical_remote,
+                self.vlan_id,
+            )
+        else:
+            self.daemon.gre_key_remove(self.physical_local, self.physical_remote, self.asn)
         self.daemon.mesh_link_remove(self.physical_local, self.physical_remote)
 
 
@@ -185,6 +305,11 @@ class MeshTunnel(StaticInterface):
         physical interfaces this static interface uses.
         '''
 
+        if self.datapath in ("direct", "shared"):
+            return (
+                active_interface.create(self.logger, self.name, self.netns.netns_name),
+            )
+
         return (
             active_interface.create(self.logger, self.bridge_name, None),
             active_interface.create(self.logger, self.root_veth_name, None),
@@ -198,7 +323,8 @@ StaticInterface.register(MeshTunnel)
 def create(logger, name,
            node_local, node_remote,
            physical_local, physical_remote,
-           virtual_local, virtual_remote):
+           virtual_local, virtual_remote,
+           rr_client):
     '''
     Create a mesh tunnel.
     '''
@@ -208,4 +334,5 @@ def create(logger, name,
         node_local, node_remote,
         physical_local, physical_remote,
         virtual_local, virtual_remote,
+        rr_client,
     )
@@ -25,6 +25,7 @@ Overlay link overlay static interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
 from l3overlay.l3overlayd.network import netns
 
 from l3overlay.l3overlayd.network.interface import bridge
@@ -37,6 +38,20 @@ from l3overlay.l3overlayd.overlay.interface import ReadError
 
 from l3overlay.l3overlayd.overlay.static_interface.base import StaticInterface
 
+from l3overlay.util.exception import L3overlayError
+
+
+class InnerOverlayBackendError(L3overlayError):
+    '''
+    Exception to raise when the inner overlay of an overlay link does not
+    use a network namespace backend.
+    '''
+    def __init__(self, overlay_link):
+        super().__init__(
+            "inner overlay '%s' of static overlay link '%s' uses backend '%s', "
+            "overlay links require backend 'netns'" %
+            (overlay_link.inner_overlay_name, overlay_link.name, overlay_link.inner_overlay.backend))
+
 
 # pylint: disable=too-many-instance-attributes
 class OverlayLink(StaticInterface):
@@ -47,7 +62,8 @@ class OverlayLink(StaticInterface):
 
     # pylint: disable=too-many-arguments
     def __init__(self, logger, name,
-                 outer_address, inner_address, inner_overlay_name, netmask):
+                 outer_address, inner_address, inner_overlay_name, outer_interface_bridged,
+                 netmask):
         '''
         Set up static overlay link internal state.
         '''
@@ -57,6 +73,7 @@ class OverlayLink(StaticInterface):
         self.outer_address = outer_address
         self.inner_address = inner_address
         self.inner_overlay_name = inner_overlay_name
+        self.outer_interface_bridged = outer_interface_bridged
         self.netmask = netmask
 
         # Initialised in setup().
@@ -82,13 +99,21 @@ class OverlayLink(StaticInterface):
         self.outer_asn = overlay.asn
 
         self.inner_overlay = self.daemon.overlays[self.inner_overlay_name]
-        self.inner_netns = netns.get(self.dry_run, self.logger, self.inner_overlay_name)
+        if self.inner_overlay.backend != "netns":
+            raise InnerOverlayBackendError(self)
+
+        self.inner_netns = netns.get(
+            self.dry_run,
+            self.logger,
+            self.inner_overlay_name,
+            pool=self.daemon.netns_pool,
+        )
         self.inner_asn = self.inner_overlay.asn
 
-        self.dummy_name = self.daemon.interface_name(self.name, limit=13)
-        self.bridge_name = self.daemon.interface_name(self.dummy_name, suffix="br")
-        self.outer_name = self.daemon.interface_name(self.dummy_name, suffix="v")
-        self.inner_name = self.daemon.interface_name(self.dummy_name, suffix="v")
+        self.dummy_name = self.interface_name(self.name, limit=13)
+        self.bridge_name = self.interface_name(self.dummy_name, suffix="br")
+        self.outer_name = self.interface_name(self.dummy_name, suffix="v")
+        self.inner_name = self.interface_name(self.dummy_name, suffix="v")
 
 
     def is_ipv6(self):
@@ -111,49 +136,66 @@ class OverlayLink(StaticInterface):
         self.inner_netns.start()
 
         # Create the inner and outer veth interfaces, which link the
-        # overlays together. At the same time, move the inner veth
-        # interface to the inner overlay.
+        # overlays together. The inner veth interface is created
+        # directly inside the inner overlay.
         outer_if = veth.create(
             self.dry_run,
             self.logger,
             self.outer_name,
             self.inner_name,
             netns=self.netns,
+            peer_netns=self.inner_netns,
         )
 
         inner_if = outer_if.peer_get(peer_netns=self.inner_netns)
-        inner_if.netns_set(self.inner_netns)
-
-        # Create a dummy interface for the outer veth interface to be
-        # bridged with.
-        dummy_if = dummy.create(
-            self.dry_run,
-            self.logger,
-            self.dummy_name,
-            netns=self.netns,
-        )
 
-        # Create the bridge interface for the dummy interface and the
-        # veth pair interface, and add the bridge ports.
-        bridge_if = bridge.create(
-            self.dry_run,
-            self.logger,
-            self.bridge_name,
-            netns=self.netns,
-        )
-        bridge_if.add_port(outer_if)
-        bridge_if.add_port(dummy_if)
-
-        # Assign address to the interfaces.
-        bridge_if.add_ip(self.outer_address, self.netmask)
-        inner_if.add_ip(self.inner_address, self.netmask)
-
-        # Bring up both the inner and outer interfaces, and their
-        # linking interfaces.
-        outer_if.up()
-        inner_if.up()
-        dummy_if.up()
-        bridge_if.up()
+        if self.outer_interface_bridged:
+            # Create a dummy interface for the outer veth interface to be
+            # bridged with.
+            dummy_if = dummy.create(
+                self.dry_run,
+                self.logger,
+                self.dummy_name,
+                netns=self.netns,
+            )
+
+            # Create the bridge interface for the dummy interface and the
+            # veth pair interface, and add the bridge ports.
+            bridge_if = bridge.create(
+                self.dry_run,
+                self.logger,
+                self.bridge_name,
+                netns=self.netns,
+            )
+
+            outer_address_if = bridge_if
+            batch_ifs = (outer_if, inner_if, dummy_if, bridge_if)
+        else:
+            outer_address_if = outer_if
+            batch_ifs = (outer_if, inner_if)
+
+        # Collect the changes to the interfaces, and apply them
+        # in one transaction per interface.
+        with interface.batch(*batch_ifs):
+            # Tag the interfaces as owned by this overlay.
+            for iface in batch_ifs:
+                iface.owner_set(self.overlay.name)
+
+            if self.outer_interface_bridged:
+                bridge_if.ports_set(outer_if, dummy_if)
+
+            # Assign address to the interfaces.
+            outer_address_if.ips_set((self.outer_address, self.netmask))
+            inner_if.ips_set((self.inner_address, self.netmask))
+
+            # Bring up both the inner and outer interfaces, and their
+            # linking interfaces.
+            outer_if.up()
+            inner_if.up()
+
+            if self.outer_interface_bridged:
+                dummy_if.up()
+                bridge_if.up()
 
         # Stop the network namespace object for the linked overlay,
         # to remove its process from memory.
@@ -171,8 +213,9 @@ class OverlayLink(StaticInterface):
 
         self.inner_netns.start()
 
-        bridge.get(self.dry_run, self.logger, self.bridge_name, netns=self.netns).remove()
-        dummy.get(self.dry_run, self.logger, self.dummy_name, netns=self.netns).remove()
+        if self.outer_interface_bridged:
+            bridge.get(self.dry_run, self.logger, self.bridge_name, netns=self.netns).remove()
+            dummy.get(self.dry_run, self.logger, self.dummy_name, netns=self.netns).remove()
         veth.get(
             self.dry_run,
             self.logger,
@@ -192,6 +235,11 @@ class OverlayLink(StaticInterface):
         physical interfaces this static interface uses.
         '''
 
+        if not self.outer_interface_bridged:
+            return (
+                active_interface.create(self.logger, self.outer_name, self.inner_netns.name),
+            )
+
         return (
             active_interface.create(self.logger, self.bridge_name, self.inner_netns.name),
             active_interface.create(self.logger, self.dummy_name, self.inner_netns.name),
@@ -211,6 +259,11 @@ def read(logger, name, config):
     inner_overlay_name = util.name_get(config["inner-overlay-name"])
     netmask = util.netmask_get(config["netmask"], util.ip_address_is_v6(inner_address))
 
+    if "outer-interface-bridged" in config:
+        outer_interface_bridged = util.boolean_get(config["outer-interface-bridged"])
+    else:
+        outer_interface_bridged = True
+
     if not isinstance(inner_address, type(outer_address)):
         raise ReadError(
             "inner address '%s' (%s) and outer address '%s' (%s) "
@@ -223,7 +276,7 @@ def read(logger, name, config):
 
     return OverlayLink(
         logger, name,
-        outer_address, inner_address, inner_overlay_name, netmask,
+        outer_address, inner_address, inner_overlay_name, outer_interface_bridged, netmask,
     )
 
 
@@ -235,4 +288,5 @@ def write(overlay_link, config):
     config["outer-address"] = str(overlay_link.outer_address)
     config["inner-address"] = str(overlay_link.inner_address)
     config["inner-overlay-name"] = overlay_link.inner_overlay_name
+    config["outer-interface-bridged"] = str(overlay_link.outer_interface_bridged).lower()
     config["netmask"] = str(overlay_link.netmask)
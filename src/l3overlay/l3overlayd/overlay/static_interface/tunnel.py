@@ -25,6 +25,8 @@ Tunnel overlay static interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
+
 from l3overlay.l3overlayd.network.interface import gre
 
 from l3overlay.l3overlayd.overlay import active_interface
@@ -76,7 +78,7 @@ class Tunnel(StaticInterface):
         if key:
             self.daemon.gre_key_add(self.local, self.remote, key)
 
-        self.tunnel_name = self.daemon.interface_name(self.name)
+        self.tunnel_name = self.interface_name(self.name)
 
 
     def start(self):
@@ -98,8 +100,11 @@ class Tunnel(StaticInterface):
             okey=self.okey,
             netns=self.netns,
         )
-        tunnel_if.add_ip(self.address, self.netmask)
-        tunnel_if.up()
+        self.netns.attach(tunnel_if)
+        with interface.batch(tunnel_if):
+            tunnel_if.owner_set(self.overlay.name)
+            tunnel_if.ips_set((self.address, self.netmask))
+            tunnel_if.up()
 
         self.logger.info("finished starting static tunnel '%s'" % self.name)
 
@@ -121,6 +126,8 @@ class Tunnel(StaticInterface):
         Remove the static tunnel.
         '''
 
+        super().remove()
+
         self.daemon.gre_key_remove(self.local, self.remote, self.key if self.key else self.ikey)
 
 
@@ -139,7 +146,7 @@ class Tunnel(StaticInterface):
         physical interfaces this static interface uses.
         '''
 
-        return (active_interface.create(self.logger, self.tunnel_name, self.netns.name),)
+        return (active_interface.create(self.logger, self.tunnel_name, self.netns.netns_name),)
 
 StaticInterface.register(Tunnel)
 
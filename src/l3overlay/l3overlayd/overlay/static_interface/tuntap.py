@@ -25,6 +25,8 @@ tuntap overlay static interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
+
 from l3overlay.l3overlayd.network.interface import tuntap
 
 from l3overlay.l3overlayd.overlay import active_interface
@@ -63,7 +65,7 @@ class Tuntap(StaticInterface):
 
         super().setup(daemon, overlay)
 
-        self.tuntap_name = self.daemon.interface_name(self.name)
+        self.tuntap_name = self.interface_name(self.name)
 
 
     def start(self):
@@ -82,8 +84,11 @@ class Tuntap(StaticInterface):
             self.gid,
             netns=self.netns,
         )
-        tuntap_if.add_ip(self.address, self.netmask)
-        tuntap_if.up()
+        self.netns.attach(tuntap_if)
+        with interface.batch(tuntap_if):
+            tuntap_if.owner_set(self.overlay.name)
+            tuntap_if.ips_set((self.address, self.netmask))
+            tuntap_if.up()
 
         self.logger.info("finished starting static tuntap '%s'" % self.name)
 
@@ -121,7 +126,7 @@ class Tuntap(StaticInterface):
         physical interfaces this static interface uses.
         '''
 
-        return (active_interface.create(self.logger, self.tuntap_name, self.netns.name),)
+        return (active_interface.create(self.logger, self.tuntap_name, self.netns.netns_name),)
 
 StaticInterface.register(Tuntap)
 
@@ -25,6 +25,7 @@ veth pair overlay static interface.
 
 from l3overlay import util
 
+from l3overlay.l3overlayd.network import interface
 from l3overlay.l3overlayd.network import netns
 
 from l3overlay.l3overlayd.network.interface import bridge
@@ -75,10 +76,10 @@ class VETH(StaticInterface):
 
         super().setup(daemon, overlay)
 
-        self.dummy_name = self.daemon.interface_name(self.name, limit=12)
-        self.bridge_name = self.daemon.interface_name(self.dummy_name, suffix="br")
-        self.inner_name = self.daemon.interface_name(self.dummy_name, suffix="v")
-        self.outer_name = self.daemon.interface_name(self.dummy_name, suffix="v")
+        self.dummy_name = self.interface_name(self.name, limit=12)
+        self.bridge_name = self.interface_name(self.dummy_name, suffix="br")
+        self.inner_name = self.interface_name(self.dummy_name, suffix="v")
+        self.outer_name = self.interface_name(self.dummy_name, suffix="v")
 
         # Get the outer interface network namespace.
         self.outer_netns = self.overlay.netns
@@ -88,7 +89,12 @@ class VETH(StaticInterface):
         if self.inner_namespace:
             self.logger.debug("setting inner namespace to network namespace '%s'" %
                               self.inner_namespace)
-            self.inner_netns = netns.get(self.dry_run, self.logger, self.inner_namespace)
+            self.inner_netns = netns.get(
+                self.dry_run,
+                self.logger,
+                self.inner_namespace,
+                pool=self.daemon.netns_pool,
+            )
         else:
             self.logger.debug("setting inner namespace to root namespace")
             self.inner_netns = None
@@ -111,10 +117,10 @@ class VETH(StaticInterface):
             self.outer_name,
             netns=self.inner_netns if self.inner_namespace else None,
             root_ipdb=self.root_ipdb if not self.inner_namespace else None,
+            peer_netns=self.outer_netns,
         )
 
         outer_if = inner_if.peer_get(peer_netns=self.outer_netns)
-        outer_if.netns_set(self.outer_netns)
 
         self.logger.debug("setting inner veth interface '%s' as the inner address interface" %
                           self.inner_name)
@@ -134,29 +140,39 @@ class VETH(StaticInterface):
                 self.bridge_name,
                 netns=self.outer_netns,
             )
-            bridge_if.add_port(outer_if)
-            bridge_if.add_port(dummy_if)
 
             self.logger.debug("setting bridge interface '%s' as the outer address interface" %
                               self.bridge_name)
             outer_address_if = bridge_if
+            batch_ifs = (inner_if, outer_if, dummy_if, bridge_if)
         else:
             self.logger.debug("setting outer veth interface '%s' as the outer address interface" %
                               self.outer_name)
             outer_address_if = outer_if
+            batch_ifs = (inner_if, outer_if)
 
-        if self.inner_address:
-            inner_address_if.add_ip(self.inner_address, self.netmask)
+        # Collect the changes to the interfaces, and apply them
+        # in one transaction per interface.
+        with interface.batch(*batch_ifs):
+            # Tag the interfaces as owned by this overlay.
+            for iface in batch_ifs:
+                iface.owner_set(self.overlay.name)
 
-        if self.outer_address:
-            outer_address_if.add_ip(self.outer_address, self.netmask)
+            if self.outer_interface_bridged:
+                bridge_if.ports_set(outer_if, dummy_if)
 
-        outer_if.up()
-        inner_if.up()
+            if self.inner_address:
+                inner_address_if.ips_set((self.inner_address, self.netmask))
 
-        if self.outer_interface_bridged:
-            dummy_if.up()
-            bridge_if.up()
+            if self.outer_address:
+                outer_address_if.ips_set((self.outer_address, self.netmask))
+
+            outer_if.up()
+            inner_if.up()
+
+            if self.outer_interface_bridged:
+                dummy_if.up()
+                bridge_if.up()
 
         if self.inner_namespace:
             self.inner_netns.stop()
@@ -36,6 +36,12 @@ from l3overlay.l3overlayd.overlay import active_interface
 from l3overlay.l3overlayd.overlay.static_interface.base import StaticInterface
 
 
+# Static vlan datapaths. 'bridged' bridges the vlan interface in the root
+# namespace to a veth pair into the overlay namespace. 'direct' moves the
+# vlan interface itself into the overlay namespace.
+DATAPATHS = ("bridged", "direct")
+
+
 # pylint: disable=too-many-instance-attributes
 class VLAN(StaticInterface):
     '''
@@ -44,7 +50,7 @@ class VLAN(StaticInterface):
 
     # pylint: disable=too-many-arguments
     def __init__(self, logger, name,
-                 vlan_id, physical_interface, address, netmask):
+                 vlan_id, physical_interface, address, netmask, datapath):
         '''
         Set up static vlan internal fields.
         '''
@@ -55,6 +61,7 @@ class VLAN(StaticInterface):
         self.physical_interface = physical_interface
         self.address = address
         self.netmask = netmask
+        self.datapath = datapath
 
         # Initialised in setup().
         self.vlan_name = None
@@ -70,10 +77,10 @@ class VLAN(StaticInterface):
 
         super().setup(daemon, overlay)
 
-        self.vlan_name = self.daemon.interface_name(self.name, suffix="vl", limit=12)
-        self.root_veth_name = self.daemon.interface_name(self.vlan_name, suffix="v")
-        self.netns_veth_name = self.daemon.interface_name(self.vlan_name, suffix="v")
-        self.bridge_name = self.daemon.interface_name(self.vlan_name, suffix="br")
+        self.vlan_name = self.interface_name(self.name, suffix="vl", limit=12)
+        self.root_veth_name = self.interface_name(self.vlan_name, suffix="v")
+        self.netns_veth_name = self.interface_name(self.vlan_name, suffix="v")
+        self.bridge_name = self.interface_name(self.vlan_name, suffix="br")
 
 
     def start(self):
@@ -83,6 +90,20 @@ class VLAN(StaticInterface):
 
         self.logger.info("starting static vlan '%s'" % self.name)
 
+        if self.datapath == "direct":
+            self._direct_start()
+        else:
+            self._bridged_start()
+
+        self.logger.info("finished starting static vlan '%s'" % self.name)
+
+
+    def _bridged_start(self):
+        '''
+        Start the static vlan, bridging the vlan interface in the root
+        namespace to a veth pair into the overlay network namespace.
+        '''
+
         # Find the physical interface.
         physical_if = interface.get(
             self.dry_run,
@@ -108,15 +129,11 @@ class VLAN(StaticInterface):
             self.root_veth_name,
             self.netns_veth_name,
             root_ipdb=self.root_ipdb,
+            peer_netns=self.netns,
         )
 
-        # Move the netns veth interface to the network namespace.
+        # Get the netns veth interface, created in the network namespace.
         netns_veth_if = root_veth_if.peer_get(peer_netns=self.netns)
-        netns_veth_if.netns_set(self.netns)
-
-        # Add the assigned address for the VLAN to the netns veth
-        # interface.
-        netns_veth_if.add_ip(self.address, self.netmask)
 
         # Create a bridge for the physical interface to connect to the
         # network namespace via the veth pair.
@@ -127,19 +144,62 @@ class VLAN(StaticInterface):
             root_ipdb=self.root_ipdb,
         )
 
-        # Add the physical interface and the root veth interface to the
-        # bridge.
-        bridge_if.add_port(vlan_if)
-        bridge_if.add_port(root_veth_if)
+        # Collect the changes to the interfaces, and apply them
+        # in one transaction per interface.
+        with interface.batch(physical_if, vlan_if, root_veth_if, netns_veth_if, bridge_if):
+            # Tag the interfaces as owned by this overlay.
+            for iface in (vlan_if, root_veth_if, netns_veth_if, bridge_if):
+                iface.owner_set(self.overlay.name)
 
-        # Finally, we're done! Bring up the interfaces!
-        physical_if.up()
-        vlan_if.up()
-        root_veth_if.up()
-        netns_veth_if.up()
-        bridge_if.up()
+            # Add the assigned address for the VLAN to the netns veth
+            # interface.
+            netns_veth_if.ips_set((self.address, self.netmask))
 
-        self.logger.info("finished starting static vlan '%s'" % self.name)
+            # Add the physical interface and the root veth interface to the
+            # bridge.
+            bridge_if.ports_set(vlan_if, root_veth_if)
+
+            # Finally, we're done! Bring up the interfaces!
+            physical_if.up()
+            vlan_if.up()
+            root_veth_if.up()
+            netns_veth_if.up()
+            bridge_if.up()
+
+
+    def _direct_start(self):
+        '''
+        Start the static vlan, moving the vlan interface directly into
+        the overlay network namespace.
+        '''
+
+        # Find the physical interface.
+        physical_if = interface.get(
+            self.dry_run,
+            self.logger,
+            self.physical_interface,
+            root_ipdb=self.root_ipdb,
+        )
+
+        # Create the VLAN interface on the physical interface, and move
+        # it into the network namespace.
+        vlan_if = vlan.create(
+            self.dry_run,
+            self.logger,
+            self.vlan_name,
+            physical_if,
+            self.vlan_id,
+            netns=self.netns,
+            underlay_root_ipdb=self.root_ipdb,
+        )
+        self.netns.attach(vlan_if)
+
+        with interface.batch(physical_if, vlan_if):
+            vlan_if.owner_set(self.overlay.name)
+            vlan_if.ips_set((self.address, self.netmask))
+
+            physical_if.up()
+            vlan_if.up()
 
 
     def stop(self):
@@ -149,15 +209,23 @@ class VLAN(StaticInterface):
 
         self.logger.info("stopping static vlan '%s'" % self.name)
 
-        bridge.get(self.dry_run, self.logger, self.bridge_name, root_ipdb=self.root_ipdb).remove()
-        veth.get(
-            self.dry_run,
-            self.logger,
-            self.root_veth_name,
-            self.netns_veth_name,
-            root_ipdb=self.root_ipdb,
-        ).remove()
-        vlan.get(self.dry_run, self.logger, self.vlan_name, root_ipdb=self.root_ipdb).remove()
+        if self.datapath == "direct":
+            vlan.get(self.dry_run, self.logger, self.vlan_name, netns=self.netns).remove()
+        else:
+            bridge.get(
+                self.dry_run,
+                self.logger,
+                self.bridge_name,
+                root_ipdb=self.root_ipdb,
+            ).remove()
+            veth.get(
+                self.dry_run,
+                self.logger,
+                self.root_veth_name,
+                self.netns_veth_name,
+                root_ipdb=self.root_ipdb,
+            ).remove()
+            vlan.get(self.dry_run, self.logger, self.vlan_name, root_ipdb=self.root_ipdb).remove()
 
         self.logger.info("finished stopping static vlan '%s'" % self.name)
 
@@ -177,6 +245,11 @@ class VLAN(StaticInterface):
         physical interfaces this static interface uses.
         '''
 
+        if self.datapath == "direct":
+            return (
+                active_interface.create(self.logger, self.vlan_name, self.netns.netns_name),
+            )
+
         return (
             active_interface.create(self.logger, self.bridge_name, None),
             active_interface.create(self.logger, self.root_veth_name, None),
@@ -195,9 +268,13 @@ def read(logger, name, config):
     physical_interface = util.name_get(config["physical-interface"])
     address = util.ip_address_get(config["address"])
     netmask = util.netmask_get(config["netmask"], util.ip_address_is_v6(address))
+    datapath = util.enum_get(
+        config["datapath"],
+        DATAPATHS,
+    ) if "datapath" in config else "bridged"
 
     return VLAN(logger, name,
-                vlan_id, physical_interface, address, netmask)
+                vlan_id, physical_interface, address, netmask, datapath)
 
 
 def write(vla, config):
@@ -209,3 +286,4 @@ def write(vla, config):
     config["physical-interface"] = vla.physical_interface
     config["address"] = str(vla.address)
     config["netmask"] = str(vla.netmask)
+    config["datapath"] = vla.datapath
@@ -192,6 +192,27 @@ class Process(Worker):
         self.set_stopped()
 
 
+    def reload(self, process):
+        '''
+        Start the IPsec process in place of the given running IPsec
+        process, and shut down any tunnels which are no longer configured.
+        '''
+
+        if not self.use_ipsec:
+            return
+
+        self.start()
+
+        for conn in process.conns:
+            if conn not in self.conns:
+                self.logger.debug("shutting down IPsec tunnel '%s'" % conn)
+                if not self.dry_run:
+                    subprocess.check_output(
+                        [self.ipsec, "down", conn],
+                        stderr=subprocess.STDOUT,
+                    )
+
+
     def tunnel_add(self, link, psk):
         '''
         Add an IPsec tunnel and its corresponding PSK to the
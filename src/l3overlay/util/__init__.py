@@ -692,13 +692,25 @@ def pid_kill(pid=None, pid_file=None, sign=signal.SIGTERM, increment=0.001, time
     pid_num = pid_get(pid, pid_file)
 
     if pid_num:
-        count = 0.0
         os.kill(pid_num, sign)
-        while count < timeout and pid_exists(pid=pid_num):
-            time.sleep(increment)
-            count += increment
-        if pid_exists(pid=pid_num):
-            raise RuntimeError("unable to terminate PID %s using signal '%s'" % (pid_num, sign))
+        pids_wait((pid_num,), sign=sign, increment=increment, timeout=timeout)
+
+
+def pids_wait(pids, sign=signal.SIGTERM, increment=0.001, timeout=10):
+    '''
+    Wait for the processes of the given PIDs, which have been sent the
+    given signal, to terminate. All of the processes are waited for
+    at once, so they can be signalled before waiting for any of them.
+    '''
+
+    count = 0.0
+    while count < timeout and any(pid_exists(pid=pid) for pid in pids):
+        time.sleep(increment)
+        count += increment
+
+    for pid in pids:
+        if pid_exists(pid=pid):
+            raise RuntimeError("unable to terminate PID %s using signal '%s'" % (pid, sign))
 
 
 #
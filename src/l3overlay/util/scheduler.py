@@ -0,0 +1,113 @@
+#
+# IPsec overlay network manager (l3overlay)
+# l3overlay/util/scheduler.py - dependency graph scheduler
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Dependency graph scheduler.
+'''
+
+
+import concurrent.futures
+
+from l3overlay.util.exception import L3overlayError
+
+
+class DependencyCycleError(L3overlayError):
+    '''
+    Exception to raise when the given items could not all be run,
+    due to a dependency cycle.
+    '''
+    def __init__(self, items):
+        super().__init__(
+            "unable to resolve dependencies for items: %s" %
+            str.join(", ", (str(item) for item in items)),
+        )
+
+
+def run(items, dependencies, function, max_workers=1):
+    '''
+    Call function on each item in the given iterable, on a pool of at
+    most max_workers threads. dependencies is a dictionary mapping an
+    item to the set of items which need to be processed before it.
+    Dependencies on items which are not in the given iterable are ignored.
+
+    Ready items are processed in the order given, so with a single worker
+    and items already in dependency order, this is the same as calling
+    function on each item in turn. Otherwise, with any number of workers,
+    the first ready item in the given order is processed next.
+
+    If function raises an exception, no more items are processed, running
+    items are allowed to finish, and the first exception raised is re-raised.
+    '''
+
+    items = list(items)
+    item_set = set(items)
+
+    waiting = dict(
+        (item, set(dep for dep in dependencies.get(item, ()) if dep in item_set))
+        for item in items
+    )
+
+    done = set()
+
+    if max_workers <= 1:
+        while items:
+            item = next((item for item in items if waiting[item] <= done), None)
+            if item is None:
+                raise DependencyCycleError(items)
+            items.remove(item)
+            function(item)
+            done.add(item)
+        return
+
+    running = {}
+    error = None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while items or running:
+            if error is None:
+                for item in tuple(items):
+                    if len(running) >= max_workers:
+                        break
+                    if waiting[item] <= done:
+                        items.remove(item)
+                        running[executor.submit(function, item)] = item
+
+            if not running:
+                break
+
+            finished, __ = concurrent.futures.wait(
+                running,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+
+            for future in finished:
+                item = running.pop(future)
+                exc = future.exception()
+                if exc is not None:
+                    if error is None:
+                        error = exc
+                else:
+                    done.add(item)
+
+    if error is not None:
+        raise error
+
+    if items:
+        raise DependencyCycleError(items)
@@ -23,14 +23,42 @@ Unit test for reading Daemon objects.
 '''
 
 
+import ipaddress
 import os
+import subprocess
+import sys
+import threading
+import time
+
+from unittest import mock
 
 from l3overlay import util
 
 from l3overlay.l3overlayd import daemon
 
+from l3overlay.l3overlayd.overlay.process import bgp
+
 from tests.l3overlayd.daemon import DaemonBaseTest
 
+from tests.l3overlayd.network import StubIPDB
+
+
+OVERLAY_CONF = """[overlay]
+name=%s
+asn=%i
+linknet-pool=%s
+this-node=test-1
+node-0=test-1 192.0.2.1
+node-1=test-2 192.0.2.2
+"""
+
+OVERLAY_LINK_CONF = """[static-overlay-link:%s]
+outer-address=%s
+inner-address=%s
+inner-overlay-name=%s
+netmask=31
+"""
+
 
 class DaemonTest(DaemonBaseTest):
     '''
@@ -82,6 +110,58 @@ class DaemonTest(DaemonBaseTest):
         self.assert_hex_string("ipsec_psk", mindigits=6, maxdigits=64)
 
 
+    def test_start_workers(self):
+        '''
+        Test that 'start_workers' is properly handled by the daemon.
+        '''
+
+        self.assert_integer("start_workers", minval=1, test_default=True)
+
+
+    def test_stop_workers(self):
+        '''
+        Test that 'stop_workers' is properly handled by the daemon.
+        '''
+
+        self.assert_integer("stop_workers", minval=1, test_default=True)
+
+
+    def test_warm_restart(self):
+        '''
+        Test that 'warm_restart' is properly handled by the daemon.
+        '''
+
+        glob = self.global_conf.copy()
+        glob["warm_restart"] = False
+        glob["no_warm_restart"] = True
+
+        self.assert_boolean("warm_restart", test_default=True, conf=glob)
+
+
+    def test_fast_stop(self):
+        '''
+        Test that 'fast_stop' is properly handled by the daemon.
+        '''
+
+        glob = self.global_conf.copy()
+        glob["fast_stop"] = False
+        glob["no_fast_stop"] = True
+
+        self.assert_boolean("fast_stop", test_default=True, conf=glob)
+
+
+    def test_netns_backend(self):
+        '''
+        Test that 'netns_backend' is properly handled by the daemon.
+        '''
+
+        self.assert_enum(
+            "netns_backend",
+            enum=["process", "setns"],
+            test_default=True,
+        )
+
+
     def test_lib_dir(self):
         '''
         Test that 'lib_dir' is properly handled by the daemon.
@@ -181,3 +261,443 @@ class DaemonTest(DaemonBaseTest):
         self.assert_fail("overlay_conf", value=1, exception=daemon.ReadError, conf=glob)
         self.assert_fail("overlay_conf", value=[""], exception=util.GetError, conf=glob)
         self.assert_fail("overlay_conf", value=[1], exception=util.GetError, conf=glob)
+
+
+    def test_fast_stop_remove(self):
+        '''
+        Test that fast stop removes the root namespace interfaces of an
+        overlay in one pass, leaving interfaces in other namespaces to be
+        removed along with them.
+        '''
+
+        overlay_conf_dir = os.path.join(self.tmp_dir, "overlays")
+        util.directory_create(overlay_conf_dir)
+
+        with open(os.path.join(overlay_conf_dir, "test-fast-stop.conf"), "w") as fil:
+            fil.write(OVERLAY_CONF % ("test-fast-stop", 65000, "198.51.100.0/31"))
+            fil.write(
+                "[static-veth:test-veth]\n"
+                "inner-address=203.0.113.1\n"
+                "netmask=32\n"
+                "outer-interface-bridged=true\n"
+            )
+
+        glob = self.global_conf.copy()
+        glob["overlay_conf_dir"] = overlay_conf_dir
+        glob["overlay_conf"] = None
+
+        daem = daemon.read(glob)
+        daem.setup()
+        daem.start()
+
+        ove = daem.overlays["test-fast-stop"]
+        acti_ifaces = [
+            acti
+            for iface in ove.static_interfaces + ove.mesh_tunnels
+            for acti in iface.active_interfaces()
+        ]
+        root_names = set(acti.interface_name for acti in acti_ifaces if not acti.netns_name)
+        netns_names = set(acti.interface_name for acti in acti_ifaces if acti.netns_name)
+
+        self.assertTrue(root_names)
+        self.assertTrue(netns_names)
+
+        # Interfaces with the names of those in other namespaces
+        # should not be removed from the root namespace.
+        ipdb = StubIPDB()
+        ipdb.add("eth0", "dummy")
+        for name in sorted(root_names | netns_names):
+            ipdb.add(name)
+
+        # Only the root namespace interfaces are removed
+        # by the overlay itself, using the stub netlink socket.
+        daem.fast_stop = True
+        ove.dry_run = False
+        with mock.patch("pyroute2.IPRoute", return_value=ipdb.nl):
+            daem.stop()
+        daem.remove()
+
+        self.assertEqual(ipdb.nl.dumps, 1)
+        self.assertEqual(len(ipdb.nl.removed), len(root_names))
+        self.assertEqual(
+            set(key for key in ipdb.interfaces if isinstance(key, str)),
+            set(["eth0"]) | netns_names,
+        )
+
+
+    def test_bird_empty_config_stop(self):
+        '''
+        Test that starting a BGP process whose BIRD configuration for an
+        address family is empty, such as the one replacing a running BGP
+        process on reload, stops the BIRD daemon left running for it.
+        '''
+
+        overlay_conf_dir = os.path.join(self.tmp_dir, "overlays")
+        util.directory_create(overlay_conf_dir)
+
+        with open(os.path.join(overlay_conf_dir, "test-bird-stop.conf"), "w") as fil:
+            fil.write(OVERLAY_CONF % ("test-bird-stop", 65000, "198.51.100.0/31"))
+
+        glob = self.global_conf.copy()
+        glob["overlay_conf_dir"] = overlay_conf_dir
+        glob["overlay_conf"] = None
+
+        daem = daemon.read(glob)
+        daem.setup()
+        daem.start()
+
+        ove = daem.overlays["test-bird-stop"]
+
+        # The new BGP process has nothing to configure
+        # for either address family.
+        process = bgp.create(daem, ove)
+        process.setup()
+        process.bird_config.clear()
+        process.dry_run = False
+
+        bird_proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        self.addCleanup(bird_proc.kill)
+        threading.Thread(target=bird_proc.wait, daemon=True).start()
+
+        util.directory_create(process.bird_pid_dir)
+        with open(process.bird_pid, "w") as fil:
+            fil.write("%i\n" % bird_proc.pid)
+
+        util.directory_create(process.bird_conf_dir)
+        with open(process.bird_conf, "w") as fil:
+            fil.write("# previous configuration\n")
+
+        process.start()
+
+        self.assertFalse(util.pid_exists(pid=bird_proc.pid))
+        self.assertFalse(os.path.exists(process.bird_conf))
+
+        daem.stop()
+        daem.remove()
+
+
+    def linked_overlays_write(self):
+        '''
+        Write the configuration for four overlays, where 'test-linked-1'
+        and 'test-linked-3' link to 'test-linked-2', and return a global
+        configuration using it.
+        '''
+
+        overlay_conf_dir = os.path.join(self.tmp_dir, "overlays")
+        util.directory_create(overlay_conf_dir)
+
+        for i in range(1, 5):
+            with open(os.path.join(overlay_conf_dir, "test-linked-%i.conf" % i), "w") as fil:
+                fil.write(OVERLAY_CONF % (
+                    "test-linked-%i" % i,
+                    65000 + i,
+                    "198.51.100.%i/31" % (i * 2),
+                ))
+                if i in (1, 3):
+                    fil.write(OVERLAY_LINK_CONF % (
+                        "link-%i" % i,
+                        "203.0.113.%i" % (i * 2),
+                        "203.0.113.%i" % (i * 2 + 1),
+                        "test-linked-2",
+                    ))
+
+        glob = self.global_conf.copy()
+        glob["overlay_conf_dir"] = overlay_conf_dir
+        glob["overlay_conf"] = None
+
+        return glob
+
+
+    def test_overlays_dependencies(self):
+        '''
+        Test that overlays depend on the overlays they link to, and that
+        the overlays linked to are sorted before the overlays linking to them.
+        '''
+
+        glob = self.linked_overlays_write()
+        daem = daemon.read(glob)
+        linked = [daem.overlays["test-linked-%i" % i] for i in range(1, 5)]
+
+        for ove in (linked[0], linked[2]):
+            self.assertLess(
+                daem.sorted_overlays.index(linked[1]),
+                daem.sorted_overlays.index(ove),
+            )
+
+        self.assertEqual(daem.overlay_dependencies, {
+            linked[0]: set([linked[1]]),
+            linked[1]: set(),
+            linked[2]: set([linked[1]]),
+            linked[3]: set(),
+        })
+        self.assertEqual(daem.overlay_dependents, {
+            linked[0]: set(),
+            linked[1]: set([linked[0], linked[2]]),
+            linked[2]: set(),
+            linked[3]: set(),
+        })
+
+
+    def overlay_stop_record(self, daem):
+        '''
+        Replace the given daemon's overlay stop method with one which
+        records the order overlays are stopped in, and the maximum
+        number of overlays stopped concurrently.
+        '''
+
+        lock = threading.Lock()
+        record = {"started": [], "finished": [], "running": 0, "max-running": 0}
+
+        # pylint: disable=protected-access
+        overlay_stop = daem._overlay_stop
+
+        def _overlay_stop(ove):
+            '''
+            Record the given overlay being stopped, and stop it.
+            '''
+            with lock:
+                record["started"].append(ove.name)
+                record["running"] += 1
+                record["max-running"] = max(record["max-running"], record["running"])
+            time.sleep(0.05)
+            overlay_stop(ove)
+            with lock:
+                record["running"] -= 1
+                record["finished"].append(ove.name)
+
+        daem._overlay_stop = _overlay_stop
+
+        return record
+
+
+    def assert_stopped_after(self, record, name, *dependents):
+        '''
+        Test that the given overlay was stopped only after
+        the given overlays linking to it had been stopped.
+        '''
+
+        for dependent in dependents:
+            self.assertLess(
+                record["finished"].index(dependent),
+                record["started"].index(name),
+                "'%s' stopped before '%s', which links to it" % (name, dependent),
+            )
+
+
+    def test_stop_order(self):
+        '''
+        Test that overlays are stopped concurrently, on at most stop_workers
+        threads, and only after the overlays linking to them are stopped.
+        '''
+
+        glob = self.linked_overlays_write()
+        daem = daemon.read(glob)
+        daem.stop_workers = 2
+        daem.setup()
+        daem.start()
+
+        record = self.overlay_stop_record(daem)
+        daem.stop()
+        daem.remove()
+
+        self.assertEqual(
+            sorted(record["finished"]),
+            ["test-linked-%i" % i for i in range(1, 5)],
+        )
+        self.assert_stopped_after(record, "test-linked-2", "test-linked-1", "test-linked-3")
+        self.assertEqual(record["max-running"], 2)
+
+
+    def test_reload_stop_order(self):
+        '''
+        Test that reloading a daemon stops the overlays linked to a changed
+        overlay before it, and leaves the other overlays running.
+        '''
+
+        glob = self.linked_overlays_write()
+        daem = daemon.read(glob)
+        daem.setup()
+        daem.start()
+
+        conf = os.path.join(glob["overlay_conf_dir"], "test-linked-2.conf")
+        with open(conf) as fil:
+            config = fil.read()
+        with open(conf, "w") as fil:
+            fil.write(config.replace("asn=65002", "asn=65102"))
+
+        new_daem = daemon.read(glob)
+        new_daem.stop_workers = 2
+
+        record = self.overlay_stop_record(daem)
+        self.assertTrue(daem.reload(new_daem))
+
+        self.assertEqual(
+            sorted(record["finished"]),
+            ["test-linked-1", "test-linked-2", "test-linked-3"],
+        )
+        self.assert_stopped_after(record, "test-linked-2", "test-linked-1", "test-linked-3")
+        self.assertEqual(record["max-running"], 2)
+
+        daem.stop()
+        daem.remove()
+
+
+    def test_shared_tunnel(self):
+        '''
+        Test that overlays using the shared mesh datapath share one tunnel
+        per physical link, and require unique mesh VLAN IDs.
+        '''
+
+        overlay_conf_dir = os.path.join(self.tmp_dir, "overlays")
+        util.directory_create(overlay_conf_dir)
+
+        def overlay_conf_write(name, asn, linknet_pool, vlan_id):
+            '''
+            Write an overlay configuration file for the test.
+            '''
+            with open(os.path.join(overlay_conf_dir, "%s.conf" % name), "w") as fil:
+                fil.write(OVERLAY_CONF % (name, asn, linknet_pool))
+                fil.write("mesh-datapath=shared\nmesh-vlan-id=%i\n" % vlan_id)
+
+        overlay_conf_write("test-shared-1", 65000, "198.51.100.0/31", 100)
+        overlay_conf_write("test-shared-2", 65001, "198.51.100.2/31", 101)
+
+        glob = self.global_conf.copy()
+        glob["overlay_conf_dir"] = overlay_conf_dir
+        glob["overlay_conf"] = None
+
+        daem = daemon.read(glob)
+        daem.setup()
+
+        self.assertEqual(len(daem.shared_tunnels), 1)
+        shared_names = set(tun["name"] for tun in daem.shared_tunnels.values())
+        self.assertEqual(
+            set(
+                mesh.shared_name
+                for ove in daem.overlays.values()
+                for mesh in ove.mesh_tunnels
+            ),
+            shared_names,
+        )
+        self.assertTrue(shared_names <= daem.interface_names)
+
+        daem.start()
+        daem.stop()
+        daem.remove()
+
+        self.assertFalse(daem.shared_tunnels)
+        self.assertFalse(shared_names & daem.interface_names)
+
+        overlay_conf_write("test-shared-2", 65001, "198.51.100.2/31", 100)
+
+        daem = daemon.read(glob)
+        with self.assertRaises(daemon.VLANAddedTwiceError):
+            daem.setup()
+
+
+    def test_reload(self):
+        '''
+        Test that reloading a running daemon only restarts the overlays
+        which have changed, and reloads overlays with changed mesh nodes
+        and static interfaces in place.
+        '''
+
+        overlay_conf_dir = os.path.join(self.tmp_dir, "overlays")
+        util.directory_create(overlay_conf_dir)
+
+        def overlay_conf_write(name, asn, linknet_pool, extra=""):
+            '''
+            Write an overlay configuration file for the test.
+            '''
+            with open(os.path.join(overlay_conf_dir, "%s.conf" % name), "w") as fil:
+                fil.write(OVERLAY_CONF % (name, asn, linknet_pool))
+                fil.write(extra)
+
+        overlay_conf_write("test-reload-1", 65000, "198.51.100.0/31")
+        overlay_conf_write("test-reload-2", 65001, "198.51.100.2/31")
+        overlay_conf_write("test-reload-3", 65002, "198.51.100.4/31")
+
+        glob = self.global_conf.copy()
+        glob["overlay_conf_dir"] = overlay_conf_dir
+        glob["overlay_conf"] = None
+
+        daem = daemon.read(glob)
+        daem.setup()
+        daem.start()
+
+        overlays = daem.overlays.copy()
+
+        overlay_conf_write(
+            "test-reload-1", 65000, "198.51.100.0/31",
+            extra="[static-dummy:test-dummy]\naddress=192.0.2.10\nnetmask=32\n",
+        )
+        overlay_conf_write("test-reload-2", 65003, "198.51.100.2/31")
+
+        self.assertTrue(daem.reload(daemon.read(glob)))
+
+        self.assertIs(daem.overlays["test-reload-1"], overlays["test-reload-1"])
+        self.assertEqual(len(daem.overlays["test-reload-1"].static_interfaces), 1)
+        self.assertIsNot(daem.overlays["test-reload-2"], overlays["test-reload-2"])
+        self.assertEqual(daem.overlays["test-reload-2"].asn, 65003)
+        self.assertTrue(daem.overlays["test-reload-2"].is_started())
+        self.assertIs(daem.overlays["test-reload-3"], overlays["test-reload-3"])
+
+        # Test that changed static interfaces release their interface
+        # names, and get the same names when set up again.
+        dummy_name = daem.overlays["test-reload-1"].static_interfaces[0].dummy_name
+        interface_names = set(daem.interface_names)
+
+        for address in ("192.0.2.11", "192.0.2.12"):
+            overlay_conf_write(
+                "test-reload-1", 65000, "198.51.100.0/31",
+                extra="[static-dummy:test-dummy]\naddress=%s\nnetmask=32\n" % address,
+            )
+            self.assertTrue(daem.reload(daemon.read(glob)))
+
+            self.assertEqual(daem.overlays["test-reload-1"].static_interfaces[0].dummy_name, dummy_name)
+            self.assertEqual(daem.interface_names, interface_names)
+
+        # Test that adding a node only adds its mesh tunnel, and
+        # that removing it only removes its own mesh tunnel.
+        overlay_conf_write("test-reload-3", 65002, "198.51.100.4/30")
+        self.assertTrue(daem.reload(daemon.read(glob)))
+
+        ove = daem.overlays["test-reload-3"]
+        mesh_tunnels = ove.mesh_tunnels
+
+        overlay_conf_write("test-reload-3", 65002, "198.51.100.4/30", extra="node-2=test-3 192.0.2.3\n")
+        self.assertTrue(daem.reload(daemon.read(glob)))
+
+        self.assertIs(daem.overlays["test-reload-3"], ove)
+        self.assertEqual(len(ove.mesh_tunnels), 2)
+        self.assertIs(ove.mesh_tunnels[0], mesh_tunnels[0])
+        self.assertEqual(ove.mesh_tunnels[1].node_remote, "test-3")
+        mesh_link = (ipaddress.ip_address("192.0.2.1"), ipaddress.ip_address("192.0.2.3"))
+        self.assertIn(mesh_link, daem.mesh_links)
+
+        overlay_conf_write("test-reload-3", 65002, "198.51.100.4/30")
+        self.assertTrue(daem.reload(daemon.read(glob)))
+
+        self.assertIs(daem.overlays["test-reload-3"], ove)
+        self.assertEqual(ove.mesh_tunnels, mesh_tunnels)
+        self.assertNotIn(mesh_link, daem.mesh_links)
+
+        # Test that the BGP router ID stays the same when the mesh tunnel
+        # of the first node link is removed, leaving no mesh tunnels.
+        router_id = ove.bgp_process.router_id
+
+        with open(os.path.join(overlay_conf_dir, "test-reload-3.conf"), "w") as fil:
+            fil.write(OVERLAY_CONF.replace("node-1=test-2 192.0.2.2\n", "") %
+                      ("test-reload-3", 65002, "198.51.100.4/30"))
+        self.assertTrue(daem.reload(daemon.read(glob)))
+
+        self.assertIs(daem.overlays["test-reload-3"], ove)
+        self.assertFalse(ove.mesh_tunnels)
+        self.assertEqual(ove.bgp_process.router_id, router_id)
+
+        # Changing the global configuration requires a full restart.
+        glob["log_level"] = "INFO"
+        self.assertFalse(daem.reload(daemon.read(glob)))
+
+        daem.stop()
+        daem.remove()
@@ -0,0 +1,411 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/__init__.py - network unit test stubs
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Stub IPDB, interface and logger objects for network unit tests, which
+record the changes made to them instead of making them to the system.
+'''
+
+
+import errno
+import itertools
+
+import pyroute2
+
+from pyroute2.netlink.rtnl.ifinfmsg import IFF_UP
+from pyroute2.netlink.rtnl.ifinfmsg import ifinfmsg
+
+
+class StubLogger(object):
+    '''
+    Logger which discards all messages.
+    '''
+
+
+    def debug(self, *args, **kwargs):
+        '''
+        Discard a debug message.
+        '''
+        pass
+
+    info = debug
+    warning = debug
+    error = debug
+
+
+class StubInterface(object):
+    '''
+    IPDB interface stub. Changes are collected in a transaction, and
+    applied to the interface when committed, like IPDB interfaces.
+    '''
+
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, ipdb, index, ifname, kind=None, **kwargs):
+        '''
+        Set up the interface stub, with the given attributes.
+        '''
+
+        self.ipdb = ipdb
+        self.index = index
+        self.ifname = ifname
+        self.kind = kind
+
+        self.ifalias = None
+        self.flags = 0
+        self.mtu = 1500
+        self.ipaddr = set()
+        self.ports = []
+
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+        # Pending changes, and the number of commits which applied any.
+        self.changes = []
+        self.commits = 0
+
+
+    def __contains__(self, key):
+        '''
+        Return True if the interface has the given attribute.
+        '''
+
+        return hasattr(self, key)
+
+
+    def __getitem__(self, key):
+        '''
+        Return the given interface attribute.
+        '''
+
+        return getattr(self, key)
+
+
+    def get(self, key, default=None):
+        '''
+        Return the given interface attribute, or the default if it is not set.
+        '''
+
+        return getattr(self, key, default)
+
+
+    def _change(self, *change):
+        '''
+        Collect a change to the interface.
+        '''
+
+        self.changes.append(change)
+        return self
+
+
+    def add_ip(self, ip_string):
+        '''
+        Add an IP address.
+        '''
+
+        address, netmask = ip_string.split("/")
+        return self._change("add_ip", (address, int(netmask)))
+
+
+    def del_ip(self, ip_string):
+        '''
+        Remove an IP address.
+        '''
+
+        address, netmask = ip_string.split("/")
+        return self._change("del_ip", (address, int(netmask)))
+
+
+    def add_port(self, port):
+        '''
+        Enslave an interface.
+        '''
+
+        return self._change("add_port", port.index)
+
+
+    def del_port(self, port):
+        '''
+        Release an interface, given either the interface or its index.
+        '''
+
+        return self._change("del_port", port if isinstance(port, int) else port.index)
+
+
+    def set_ifalias(self, ifalias):
+        '''
+        Set the interface alias.
+        '''
+
+        return self._change("ifalias", ifalias)
+
+
+    def set_mtu(self, mtu):
+        '''
+        Set the MTU.
+        '''
+
+        return self._change("mtu", mtu)
+
+
+    # pylint: disable=invalid-name
+    def up(self):
+        '''
+        Bring the interface up.
+        '''
+
+        return self._change("up", None)
+
+
+    def down(self):
+        '''
+        Bring the interface down.
+        '''
+
+        return self._change("down", None)
+
+
+    def remove(self):
+        '''
+        Remove the interface.
+        '''
+
+        return self._change("remove", None)
+
+
+    @property
+    def current_tx(self):
+        '''
+        The pending changes, or None if there are none.
+        '''
+
+        return self.changes if self.changes else None
+
+
+    def drop(self):
+        '''
+        Drop the pending changes.
+        '''
+
+        if not self.changes:
+            raise TypeError("no transaction")
+
+        self.changes = []
+
+
+    def commit(self):
+        '''
+        Apply the pending changes to the interface.
+        '''
+
+        # pylint: disable=too-many-branches
+        if not self.changes:
+            return self
+
+        self.commits += 1
+
+        for change, value in self.changes:
+            if change == "add_ip":
+                self.ipaddr.add(value)
+            elif change == "del_ip":
+                self.ipaddr.discard(value)
+            elif change == "add_port":
+                self.ports.append(value)
+            elif change == "del_port":
+                self.ports.remove(value)
+            elif change == "ifalias":
+                self.ifalias = value
+            elif change == "mtu":
+                self.mtu = value
+            elif change == "up":
+                self.flags |= IFF_UP
+            elif change == "down":
+                self.flags &= ~IFF_UP
+            elif change == "remove":
+                self.ipdb.interfaces.pop(self.ifname, None)
+                self.ipdb.interfaces.pop(self.index, None)
+
+        self.changes = []
+
+        return self
+
+
+class StubIPDB(object):
+    '''
+    IPDB stub, with an interfaces dictionary indexed by both name and index.
+    '''
+
+
+    def __init__(self):
+        '''
+        Set up the IPDB stub.
+        '''
+
+        self.interfaces = {}
+        self.indexes = itertools.count(1)
+        self.created = []
+
+        self.nl = StubNetlink(self)
+
+        self.callbacks = {}
+        self.cuids = itertools.count(1)
+
+
+    def add(self, ifname, kind=None, **kwargs):
+        '''
+        Add an existing interface to the IPDB stub, and return it.
+        '''
+
+        iface = StubInterface(self, next(self.indexes), ifname, kind, **kwargs)
+
+        self.interfaces[iface.ifname] = iface
+        self.interfaces[iface.index] = iface
+
+        return iface
+
+
+    def create(self, ifname, kind, **kwargs):
+        '''
+        Create an interface in the IPDB stub, and return it.
+        '''
+
+        self.created.append(ifname)
+        return self.add(ifname, kind, **kwargs)
+
+
+    def register_callback(self, callback):
+        '''
+        Register an IPDB callback, called by notify().
+        '''
+
+        cuid = next(self.cuids)
+        self.callbacks[cuid] = callback
+        return cuid
+
+
+    def unregister_callback(self, cuid):
+        '''
+        Unregister an IPDB callback.
+        '''
+
+        del self.callbacks[cuid]
+
+
+    def notify(self):
+        '''
+        Call the registered callbacks, as if IPDB processed a netlink message.
+        '''
+
+        for callback in list(self.callbacks.values()):
+            callback(self, None, None)
+
+
+class StubNetlink(object):
+    '''
+    Netlink socket stub, returning link messages for the interfaces
+    in the given IPDB stub, and removing interfaces from it.
+    '''
+
+
+    def __init__(self, ipdb):
+        '''
+        Set up the netlink socket stub.
+        '''
+
+        self.ipdb = ipdb
+
+        # Number of link dumps, and the indexes of the removed interfaces.
+        self.dumps = 0
+        self.removed = []
+
+        self.closed = False
+
+
+    def get_links(self, *indexes):
+        '''
+        Return link messages for the interfaces with the given indexes,
+        or for all interfaces if no indexes are given.
+        '''
+
+        if not indexes:
+            self.dumps += 1
+            indexes = sorted(key for key in self.ipdb.interfaces if isinstance(key, int))
+
+        return [self._link_msg(self.ipdb.interfaces[index]) for index in indexes]
+
+
+    def link(self, command, index):
+        '''
+        Remove the interface with the given index. Removing a veth
+        interface also removes its peer, if it is in the IPDB stub.
+        '''
+
+        assert command == "del"
+
+        iface = self.ipdb.interfaces.get(index)
+        if iface is None:
+            raise pyroute2.NetlinkError(errno.ENODEV, "No such device")
+
+        self.removed.append(index)
+
+        for removed_if in (iface, self.ipdb.interfaces.get(iface.get("link"))):
+            if removed_if is not None:
+                self.ipdb.interfaces.pop(removed_if.ifname, None)
+                self.ipdb.interfaces.pop(removed_if.index, None)
+
+
+    def close(self):
+        '''
+        Close the netlink socket stub.
+        '''
+
+        self.closed = True
+
+
+    @staticmethod
+    def _link_msg(iface):
+        '''
+        Return a link message for the given interface, including its
+        alias, and the tun/tap owner and group, if set on the interface.
+        '''
+
+        data = []
+        if iface.get("tun_owner") is not None:
+            data.append(("IFLA_TUN_OWNER", iface.tun_owner))
+        if iface.get("tun_group") is not None:
+            data.append(("IFLA_TUN_GROUP", iface.tun_group))
+
+        msg = ifinfmsg()
+        msg["index"] = iface.index
+        msg["attrs"] = [("IFLA_IFNAME", iface.ifname)]
+        if iface.ifalias is not None:
+            msg["attrs"].append(("IFLA_IFALIAS", iface.ifalias))
+        if iface.kind is not None:
+            linkinfo = [("IFLA_INFO_KIND", iface.kind)]
+            if data:
+                linkinfo.append(("IFLA_INFO_DATA", {"attrs": data}))
+            msg["attrs"].append(("IFLA_LINKINFO", {"attrs": linkinfo}))
+        msg.encode()
+
+        # Decode the encoded message, as received from the kernel.
+        decoded_msg = ifinfmsg(msg.data)
+        decoded_msg.decode()
+
+        return decoded_msg
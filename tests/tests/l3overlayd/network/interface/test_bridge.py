@@ -0,0 +1,98 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/interface/test_bridge.py - unit test for bridge interfaces
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for bridge interfaces.
+'''
+
+
+import unittest
+
+from l3overlay.l3overlayd.network import interface
+
+from l3overlay.l3overlayd.network.interface import bridge
+
+from tests.l3overlayd.network import StubIPDB
+from tests.l3overlayd.network import StubLogger
+
+
+class BridgeTest(unittest.TestCase):
+    '''
+    l3overlay unit test for bridge interfaces.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.logger = StubLogger()
+        self.ipdb = StubIPDB()
+
+        self.port_ifs = []
+        for name in ("test0", "test1", "test2"):
+            self.ipdb.add(name, "dummy")
+            self.port_ifs.append(interface.get(False, self.logger, name, root_ipdb=self.ipdb))
+
+
+    def create(self):
+        '''
+        Create the test bridge in the stub IPDB.
+        '''
+
+        return bridge.create(False, self.logger, "testbr0", root_ipdb=self.ipdb)
+
+
+    def test_create(self):
+        '''
+        Test that an existing bridge is reused, and an existing
+        interface of any other kind gets replaced.
+        '''
+
+        existing_if = self.ipdb.add("testbr0", "bridge")
+        self.assertIs(self.create().interface, existing_if)
+        self.assertFalse(self.ipdb.created)
+
+        existing_if.kind = "dummy"
+        self.assertIsNot(self.create().interface, existing_if)
+        self.assertEqual(self.ipdb.created, ["testbr0"])
+
+
+    def test_ports_set(self):
+        '''
+        Test that only the ports which differ are added and removed,
+        and that a bridge which already has the given ports is untouched.
+        '''
+
+        port_0, port_1, port_2 = self.port_ifs
+        indexes = [port_if.interface.index for port_if in self.port_ifs]
+
+        bridge_if = self.create()
+        bridge_if.ports_set(port_0, port_1)
+
+        self.assertEqual(sorted(bridge_if.interface.ports), indexes[:2])
+        self.assertEqual(bridge_if.interface.commits, 2)
+
+        bridge_if.ports_set(port_0, port_1)
+        self.assertEqual(bridge_if.interface.commits, 2)
+
+        bridge_if.ports_set(port_1, port_2)
+        self.assertEqual(sorted(bridge_if.interface.ports), indexes[1:])
+        self.assertEqual(bridge_if.interface.commits, 4)
@@ -0,0 +1,250 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/interface/test_interface.py - unit test for network interfaces
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for network interfaces.
+'''
+
+
+import threading
+import time
+import unittest
+
+from l3overlay.l3overlayd.network import interface
+
+from l3overlay.l3overlayd.network.interface.base import OWNER_PREFIX
+
+from l3overlay.l3overlayd.network.interface.exception import NotFoundError
+from l3overlay.l3overlayd.network.interface.exception import UnexpectedTypeError
+from l3overlay.l3overlayd.network.interface.exception import WaitTimeoutError
+
+from tests.l3overlayd.network import StubIPDB
+from tests.l3overlayd.network import StubLogger
+
+
+class InterfaceTest(unittest.TestCase):
+    '''
+    l3overlay unit test for network interfaces.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.logger = StubLogger()
+        self.ipdb = StubIPDB()
+
+        self.stub_if = self.ipdb.add("test0", "dummy")
+        self.iface = interface.get(False, self.logger, "test0", root_ipdb=self.ipdb)
+
+
+    def test_get(self):
+        '''
+        Test that interfaces are looked up by name, and that interfaces
+        of an unexpected type or which do not exist are not returned.
+        '''
+
+        self.assertIs(interface.interface_get("test0", self.ipdb), self.stub_if)
+        self.assertIs(interface.interface_get("test0", self.ipdb, "dummy", "veth"), self.stub_if)
+        self.assertIsNone(interface.interface_get("test1", self.ipdb, "dummy"))
+
+        with self.assertRaises(UnexpectedTypeError):
+            interface.interface_get("test0", self.ipdb, "bridge")
+
+        with self.assertRaises(NotFoundError):
+            interface.get(False, self.logger, "test1", root_ipdb=self.ipdb)
+
+
+    def test_owner(self):
+        '''
+        Test that interfaces are tagged with their owner, which can be
+        read back from the interface alias, and that interfaces already
+        tagged with the given owner are left untouched.
+        '''
+
+        self.iface.owner_set("test")
+
+        self.assertEqual(self.stub_if.ifalias, "%stest" % OWNER_PREFIX)
+        self.assertEqual(interface.owner_get(self.stub_if.ifalias), "test")
+        self.assertEqual(self.stub_if.commits, 1)
+
+        self.iface.owner_set("test")
+        self.assertEqual(self.stub_if.commits, 1)
+
+        self.iface.owner_set("other")
+        self.assertEqual(interface.owner_get(self.stub_if.ifalias), "other")
+        self.assertEqual(self.stub_if.commits, 2)
+
+        self.assertIsNone(interface.owner_get(None))
+        self.assertIsNone(interface.owner_get("some other alias"))
+
+
+    def test_state(self):
+        '''
+        Test that the interface state is only changed if it differs
+        from the given state.
+        '''
+
+        self.iface.up()
+        self.iface.up()
+        self.assertEqual(self.stub_if.commits, 1)
+
+        self.iface.set_mtu(1500)
+        self.assertEqual(self.stub_if.commits, 1)
+        self.iface.set_mtu(1400)
+        self.iface.set_mtu(1400)
+        self.assertEqual(self.stub_if.commits, 2)
+
+        self.iface.ips_set(("192.0.2.1", 32), ("fe80::1", 64))
+        self.iface.ips_set(("192.0.2.1", 32), ("fe80::1", 64))
+        self.assertEqual(self.stub_if.commits, 3)
+
+        # Kernel-assigned IPv6 link-local addresses are kept.
+        self.iface.ips_set(("192.0.2.2", 32))
+        self.assertEqual(self.stub_if.ipaddr, set([("192.0.2.2", 32), ("fe80::1", 64)]))
+        self.assertEqual(self.stub_if.commits, 4)
+
+        self.iface.down()
+        self.iface.down()
+        self.assertEqual(self.stub_if.commits, 5)
+
+
+    def test_batch(self):
+        '''
+        Test that changes made in a batch are applied in one commit.
+        '''
+
+        with interface.batch(self.iface):
+            self.iface.add_ip("192.0.2.1", 32)
+            self.iface.set_mtu(1400)
+            self.iface.up()
+            self.assertFalse(self.stub_if.commits)
+
+        self.assertEqual(self.stub_if.commits, 1)
+        self.assertEqual(self.stub_if.ipaddr, set([("192.0.2.1", 32)]))
+        self.assertEqual(self.stub_if.mtu, 1400)
+        self.assertFalse(self.iface.batched)
+        self.assertFalse(self.iface.pending)
+
+
+    def test_batch_abort(self):
+        '''
+        Test that changes made in a batch which raises an exception
+        are dropped, and not applied by a later commit.
+        '''
+
+        with self.assertRaises(RuntimeError):
+            with interface.batch(self.iface):
+                self.iface.add_ip("192.0.2.1", 32)
+                raise RuntimeError()
+
+        self.assertFalse(self.iface.batched)
+        self.assertFalse(self.iface.pending)
+        self.assertFalse(self.stub_if.changes)
+
+        self.iface.set_mtu(1400)
+
+        self.assertEqual(self.stub_if.commits, 1)
+        self.assertFalse(self.stub_if.ipaddr)
+
+
+    def test_batch_commit_error(self):
+        '''
+        Test that if applying the changes to an interface in a batch fails,
+        the error is re-raised, and the changes to the interfaces after it
+        are dropped, leaving none of them collecting changes.
+        '''
+
+        self.ipdb.add("test1", "dummy")
+        other_if = interface.get(False, self.logger, "test1", root_ipdb=self.ipdb)
+
+        def commit():
+            '''
+            Fail to apply the changes to the interface.
+            '''
+            raise RuntimeError()
+
+        self.stub_if.commit = commit
+
+        with self.assertRaises(RuntimeError):
+            with interface.batch(self.iface, other_if):
+                self.iface.set_mtu(1400)
+                other_if.set_mtu(1400)
+
+        for iface in (self.iface, other_if):
+            self.assertFalse(iface.batched)
+            self.assertFalse(iface.pending)
+            self.assertFalse(iface.interface.changes)
+
+        other_if.up()
+
+        self.assertEqual(other_if.interface.commits, 1)
+        self.assertEqual(other_if.interface.mtu, 1500)
+
+
+    def test_wait(self):
+        '''
+        Test that waiting for a condition wakes up when the IPDB
+        processes a message, rather than waiting for the timeout.
+        '''
+
+        done = threading.Event()
+
+        def notify():
+            '''
+            Make the condition true, and notify the IPDB callbacks.
+            '''
+            done.set()
+            self.ipdb.notify()
+
+        timer = threading.Timer(0.05, notify)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        start = time.monotonic()
+        # pylint: disable=protected-access
+        self.assertTrue(self.iface._wait(self.ipdb, done.is_set, 10.0, "to be done"))
+
+        self.assertLess(time.monotonic() - start, 5.0)
+        self.assertFalse(self.ipdb.callbacks)
+
+
+    def test_wait_timeout(self):
+        '''
+        Test that waiting for a condition which never becomes true
+        returns False after the timeout, even if IPDB processes messages,
+        and that wait() raises WaitTimeoutError instead.
+        '''
+
+        timer = threading.Timer(0.01, self.ipdb.notify)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        start = time.monotonic()
+        # pylint: disable=protected-access
+        self.assertFalse(self.iface._wait(self.ipdb, lambda: False, 0.1, "to be done"))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertFalse(self.ipdb.callbacks)
+
+        with self.assertRaises(WaitTimeoutError):
+            self.iface.wait(self.ipdb, lambda: False, 0.01, "to be done")
+        self.iface.wait(self.ipdb, lambda: True, 0.01, "to be done")
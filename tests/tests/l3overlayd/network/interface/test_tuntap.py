@@ -0,0 +1,97 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/interface/test_tuntap.py - unit test for tun/tap interfaces
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for tun/tap interfaces.
+'''
+
+
+import unittest
+
+from l3overlay.l3overlayd.network.interface import tuntap
+
+from tests.l3overlayd.network import StubIPDB
+from tests.l3overlayd.network import StubLogger
+
+
+class TuntapTest(unittest.TestCase):
+    '''
+    l3overlay unit test for tun/tap interfaces.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.logger = StubLogger()
+        self.ipdb = StubIPDB()
+
+
+    def create(self):
+        '''
+        Create the test tap interface in the stub IPDB.
+        '''
+
+        return tuntap.create(False, self.logger, "testtap0", "tap", 1000, 100,
+                             root_ipdb=self.ipdb)
+
+
+    def add(self, **kwargs):
+        '''
+        Add an existing tap interface to the stub IPDB.
+        '''
+
+        return self.ipdb.add("testtap0", "tun", ifi_type=tuntap.ARPHRD_TYPES["tap"], **kwargs)
+
+
+    def test_create_reuse(self):
+        '''
+        Test that a tap interface owned by the given user and group is reused.
+        '''
+
+        existing_if = self.add(tun_owner=1000, tun_group=100)
+
+        self.assertEqual(tuntap.owner_get(self.ipdb, existing_if), (1000, 100))
+        self.assertIs(self.create().interface, existing_if)
+        self.assertFalse(self.ipdb.created)
+
+
+    def test_create_replace(self):
+        '''
+        Test that tap interfaces with a different owner, whose owner
+        is not reported, or which are in tun mode, are replaced.
+        '''
+
+        for kwargs in (
+                {"tun_owner": 0, "tun_group": 100},
+                {"tun_owner": 1000, "tun_group": 0},
+                {},
+        ):
+            existing_if = self.add(**kwargs)
+            self.assertIsNot(self.create().interface, existing_if)
+
+        existing_if = self.ipdb.add(
+            "testtap0", "tun",
+            ifi_type=tuntap.ARPHRD_TYPES["tun"], tun_owner=1000, tun_group=100,
+        )
+        self.assertIsNot(self.create().interface, existing_if)
+
+        self.assertEqual(self.ipdb.created, ["testtap0"] * 4)
@@ -0,0 +1,155 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/interface/test_veth.py - unit test for veth interfaces
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for veth interfaces.
+'''
+
+
+import threading
+import unittest
+
+from unittest import mock
+
+from l3overlay.l3overlayd.network.interface import veth
+
+from l3overlay.l3overlayd.network.interface.exception import WaitTimeoutError
+
+from tests.l3overlayd.network import StubIPDB
+from tests.l3overlayd.network import StubLogger
+
+
+class StubNetNS(object):
+    '''
+    Network namespace stub, with its own IPDB stub.
+    '''
+
+    def __init__(self, name):
+        '''
+        Set up the network namespace stub.
+        '''
+
+        self.name = name
+        self.description = "network namespace '%s'" % name
+
+        self.ipdb = StubIPDB()
+
+
+class VETHTest(unittest.TestCase):
+    '''
+    l3overlay unit test for veth interfaces.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.logger = StubLogger()
+        self.ipdb = StubIPDB()
+        self.netns = StubNetNS("test")
+
+        self.peer_specs = []
+
+        # Create the peer in the peer namespace asynchronously,
+        # as the kernel does.
+        ipdb_create = self.ipdb.create
+
+        def create(ifname, kind, peer, **kwargs):
+            '''
+            Create a veth interface in the stub IPDB, and its peer in
+            the stub network namespace.
+            '''
+
+            self.peer_specs.append(peer)
+
+            def peer_create():
+                '''
+                Create the peer, and notify the network namespace IPDB.
+                '''
+                self.netns.ipdb.add(peer["ifname"], "veth")
+                self.netns.ipdb.notify()
+
+            timer = threading.Timer(0.01, peer_create)
+            timer.start()
+            self.addCleanup(timer.cancel)
+
+            return ipdb_create(ifname, kind, **kwargs)
+
+        self.ipdb.create = create
+
+
+    def create(self):
+        '''
+        Create the test veth pair, with the peer in the stub network namespace.
+        '''
+
+        return veth.create(False, self.logger, "testveth0", "testveth1",
+                           root_ipdb=self.ipdb, peer_netns=self.netns)
+
+
+    def test_create_peer_netns(self):
+        '''
+        Test that the peer is created directly in the peer namespace,
+        and that creation waits for it to appear there.
+        '''
+
+        veth_if = self.create()
+
+        self.assertEqual(self.ipdb.created, ["testveth0"])
+        self.assertEqual(self.peer_specs, [{"ifname": "testveth1", "net_ns_fd": "test"}])
+        self.assertIn("testveth1", self.netns.ipdb.interfaces)
+        self.assertNotIn("testveth1", self.ipdb.interfaces)
+
+        peer_if = veth_if.peer_get(peer_netns=self.netns)
+        self.assertIs(peer_if.interface, self.netns.ipdb.interfaces["testveth1"])
+        self.assertIs(peer_if.netns, self.netns)
+
+
+    def test_create_peer_timeout(self):
+        '''
+        Test that creation fails if the peer never appears
+        in the peer namespace.
+        '''
+
+        # Create the veth interface without its peer.
+        del self.ipdb.create
+
+        with mock.patch.object(veth, "PEER_CREATE_WAIT_MAX", 0.05):
+            with self.assertRaises(WaitTimeoutError):
+                self.create()
+
+
+    def test_create_reuse(self):
+        '''
+        Test that an existing veth pair linked to the peer in the peer
+        namespace is reused, and that an unlinked pair gets replaced.
+        '''
+
+        peer_if = self.netns.ipdb.add("testveth1", "veth")
+        existing_if = self.ipdb.add("testveth0", "veth", link=peer_if.index)
+
+        self.assertIs(self.create().interface, existing_if)
+        self.assertFalse(self.ipdb.created)
+
+        existing_if.link = None
+        self.assertIsNot(self.create().interface, existing_if)
+        self.assertEqual(self.ipdb.created, ["testveth0"])
+        self.assertIsNot(self.netns.ipdb.interfaces["testveth1"], peer_if)
@@ -0,0 +1,102 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/interface/test_vrf.py - unit test for vrf interfaces
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for vrf interfaces.
+'''
+
+
+import unittest
+
+from l3overlay.l3overlayd.network.interface import vrf
+
+from l3overlay.l3overlayd.network.interface.base import OWNER_PREFIX
+
+from l3overlay.l3overlayd.network.interface.exception import NotOwnedError
+
+from tests.l3overlayd.network import StubIPDB
+from tests.l3overlayd.network import StubLogger
+
+
+class VRFTest(unittest.TestCase):
+    '''
+    l3overlay unit test for vrf interfaces.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.logger = StubLogger()
+        self.ipdb = StubIPDB()
+
+
+    def create(self):
+        '''
+        Create the test VRF in the stub IPDB.
+        '''
+
+        return vrf.create(False, self.logger, "testvrf0", 100, "test", root_ipdb=self.ipdb)
+
+
+    def test_create(self):
+        '''
+        Test that a VRF is created if no interface with its name exists.
+        '''
+
+        vrf_if = self.create()
+
+        self.assertEqual(self.ipdb.created, ["testvrf0"])
+        self.assertIs(vrf_if.interface, self.ipdb.interfaces["testvrf0"])
+
+
+    def test_create_owned(self):
+        '''
+        Test that an owned VRF using the same routing table is reused,
+        and an owned interface of any other kind gets replaced.
+        '''
+
+        existing_if = self.ipdb.add(
+            "testvrf0", "vrf", vrf_table=100, ifalias="%stest" % OWNER_PREFIX,
+        )
+        self.assertIs(self.create().interface, existing_if)
+        self.assertFalse(self.ipdb.created)
+
+        existing_if.vrf_table = 200
+        self.assertIsNot(self.create().interface, existing_if)
+        self.assertEqual(self.ipdb.created, ["testvrf0"])
+
+
+    def test_create_not_owned(self):
+        '''
+        Test that interfaces which are not owned by the VRF owner
+        are never reused or removed.
+        '''
+
+        for ifalias in (None, "%sother" % OWNER_PREFIX):
+            existing_if = self.ipdb.add("testvrf0", "vrf", vrf_table=100, ifalias=ifalias)
+
+            with self.assertRaises(NotOwnedError):
+                self.create()
+
+            self.assertIs(self.ipdb.interfaces["testvrf0"], existing_if)
+            self.assertFalse(existing_if.commits)
+            self.assertFalse(self.ipdb.created)
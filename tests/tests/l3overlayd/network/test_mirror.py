@@ -0,0 +1,73 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/test_mirror.py - unit test for IPDB network state mirrors
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for IPDB network state mirrors.
+'''
+
+
+import unittest
+
+from unittest import mock
+
+from l3overlay.l3overlayd.network import mirror
+
+from tests.l3overlayd.network import StubIPDB
+
+
+class MirrorTest(unittest.TestCase):
+    '''
+    l3overlay unit test for IPDB network state mirrors.
+    '''
+
+    def test_ipdb_create(self):
+        '''
+        Test that IPDB objects are created with only the interfaces
+        plugin, subscribed to the interface netlink groups.
+        '''
+
+        nsr = object()
+
+        with mock.patch("pyroute2.IPDB") as ipdb_class:
+            ipdb = mirror.ipdb_create(nsr)
+
+        self.assertIs(ipdb, ipdb_class.return_value)
+        ipdb_class.assert_called_once_with(
+            nl=nsr,
+            plugins=("interfaces",),
+            nl_bind_groups=mirror.IPDB_GROUPS,
+        )
+
+
+    def test_interface_lookup(self):
+        '''
+        Test that interfaces are looked up by either name or index.
+        '''
+
+        ipdb = StubIPDB()
+        stub_if = ipdb.add("test0", "dummy")
+
+        self.assertIs(mirror.interface_lookup(ipdb, "test0"), stub_if)
+        self.assertIs(mirror.interface_lookup(ipdb, stub_if.index), stub_if)
+        self.assertIsNone(mirror.interface_lookup(ipdb, "test1"))
+
+        self.assertTrue(mirror.interface_exists(ipdb, "test0"))
+        self.assertTrue(mirror.interface_exists(ipdb, stub_if.index))
+        self.assertFalse(mirror.interface_exists(ipdb, "test1"))
@@ -0,0 +1,175 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/network/test_netns.py - unit test for network namespace pools
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for network namespace pools.
+'''
+
+
+import time
+import unittest
+
+from unittest import mock
+
+from l3overlay.l3overlayd.network import netns
+
+from tests.l3overlayd.network import StubLogger
+
+
+class PoolTest(unittest.TestCase):
+    '''
+    l3overlay unit test for network namespace pools, using stub
+    handles instead of opening network namespaces.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.opened = []
+        self.closed = []
+
+        patches = (
+            mock.patch.object(netns, "_open", side_effect=self._open),
+            mock.patch.object(netns, "_close", side_effect=self._close),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.pool = netns.Pool(StubLogger(), idle_timeout=0.05)
+        self.addCleanup(self.pool.close)
+
+
+    # pylint: disable=unused-argument
+    def _open(self, logger, name, backend="process"):
+        '''
+        Open a stub handle for the given network namespace.
+        '''
+
+        nsr = object()
+        self.opened.append(nsr)
+        return (nsr, object())
+
+
+    def _close(self, nsr, ipdb):
+        '''
+        Close a stub handle.
+        '''
+
+        self.closed.append(nsr)
+
+
+    def wait_idle(self):
+        '''
+        Wait for the pool idle timeout to expire.
+        '''
+
+        time.sleep(self.pool.idle_timeout * 5)
+
+
+    def test_refcount(self):
+        '''
+        Test that a handle is shared between acquirers, and only
+        closed after it is unused for the idle timeout.
+        '''
+
+        handle = self.pool.acquire("test")
+        self.assertIs(self.pool.acquire("test"), handle)
+        self.assertEqual(handle.refcount, 2)
+        self.assertEqual(len(self.opened), 1)
+
+        self.pool.release(handle)
+        self.wait_idle()
+        self.assertFalse(self.closed)
+
+        self.pool.release(handle)
+        self.assertFalse(self.closed)
+
+        self.wait_idle()
+        self.assertEqual(self.closed, [handle.netns])
+        self.assertNotIn("test", self.pool.handles)
+
+
+    def test_reuse(self):
+        '''
+        Test that a handle released and acquired again within the
+        idle timeout is reused, and not closed.
+        '''
+
+        handle = self.pool.acquire("test")
+        self.pool.release(handle)
+
+        self.assertIs(self.pool.acquire("test"), handle)
+        self.assertIsNone(handle.timer)
+
+        self.wait_idle()
+        self.assertFalse(self.closed)
+        self.assertEqual(len(self.opened), 1)
+
+        self.pool.release(handle)
+        self.wait_idle()
+
+        other_handle = self.pool.acquire("test")
+        self.assertIsNot(other_handle, handle)
+        self.assertEqual(len(self.opened), 2)
+        self.pool.release(other_handle)
+
+
+    def test_discard(self):
+        '''
+        Test that an unused handle is closed when discarded.
+        '''
+
+        handle = self.pool.acquire("test")
+        self.pool.release(handle)
+
+        self.pool.discard("test")
+        self.assertEqual(self.closed, [handle.netns])
+        self.assertNotIn("test", self.pool.handles)
+
+        self.wait_idle()
+        self.assertEqual(self.closed, [handle.netns])
+
+
+    def test_discard_referenced(self):
+        '''
+        Test that a handle discarded while in use is closed when the
+        last reference is released, and not reused by later acquirers.
+        '''
+
+        handle = self.pool.acquire("test")
+        self.pool.acquire("test")
+
+        self.pool.discard("test")
+        self.assertFalse(self.closed)
+
+        other_handle = self.pool.acquire("test")
+        self.assertIsNot(other_handle, handle)
+
+        self.pool.release(handle)
+        self.assertFalse(self.closed)
+        self.pool.release(handle)
+        self.assertEqual(self.closed, [handle.netns])
+
+        self.pool.release(other_handle)
+        self.assertEqual(self.closed, [handle.netns])
+        self.assertIs(self.pool.handles["test"], other_handle)
@@ -0,0 +1,99 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/overlay/static_interface/test_static_overlay_link.py - unit test for static overlay links
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+
+'''
+Unit tests for reading static overlay links.
+'''
+
+
+import os
+
+from l3overlay.l3overlayd import overlay
+
+from tests.l3overlayd.overlay.static_interface import StaticInterfaceBaseTest
+
+
+class StaticOverlayLinkTest(StaticInterfaceBaseTest):
+    '''
+    Unit test for reading static overlay links.
+    '''
+
+    name = "test_static_overlay_link"
+    conf_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), name)
+
+
+    #
+    ##
+    #
+
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        super().setUp()
+
+        self.overlay_conf[self.section] = {
+            "outer-address": "201.0.113.1",
+            "inner-address": "201.0.113.2",
+            "inner-overlay-name": "test-inner-overlay",
+            "netmask": "31",
+        }
+
+
+    #
+    ##
+    #
+
+
+    def test_outer_interface_bridged(self):
+        '''
+        Test that 'outer-interface-bridged' is properly handled by the static overlay link.
+        '''
+
+        self.assert_boolean(self.section, "outer-interface-bridged", test_default=True)
+
+
+    def test_outer_interface_bridged_write(self):
+        '''
+        Test that 'outer-interface-bridged' is written by the static overlay link,
+        and read back with the same value.
+        '''
+
+        for value in (None, "true", "false"):
+            over = self.config_get(self.section, "outer-interface-bridged", value=value)
+
+            config = {}
+            overlay.write(self.object_get(conf=over), config)
+
+            self.assertEqual(
+                config[self.section]["outer-interface-bridged"],
+                value if value else "true",
+            )
+            self.assertEqual(
+                self.value_get(
+                    self.section,
+                    "outer-interface-bridged",
+                    obj=self.object_get(conf=config),
+                ),
+                value != "false",
+            )
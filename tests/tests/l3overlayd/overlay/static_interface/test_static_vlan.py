@@ -84,3 +84,11 @@ class StaticVLANTest(StaticInterfaceBaseTest):
         '''
 
         self.assert_address_netmask(self.section, "address", "netmask")
+
+
+    def test_datapath(self):
+        '''
+        Test that 'datapath' is properly handled by the static vlan interface.
+        '''
+
+        self.assert_enum(self.section, "datapath", enum=["bridged", "direct"], test_default=True)
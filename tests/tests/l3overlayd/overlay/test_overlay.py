@@ -91,6 +91,277 @@ class OverlayTest(OverlayBaseTest):
         self.assert_ip_network("overlay", "linknet-pool")
 
 
+    def test_linknet_allocation(self):
+        '''
+        Test that 'linknet-allocation' is properly handled by the overlay.
+        '''
+
+        self.assert_enum(
+            "overlay",
+            "linknet-allocation",
+            enum=["sequential", "stable"],
+            test_default=True,
+        )
+
+        over = self.config_get("overlay", "linknet-allocation", value="stable")
+        for key in over["overlay"].copy():
+            if key.startswith("node-"):
+                del over["overlay"][key]
+        over["overlay"]["this-node"] = "test-3"
+        over["overlay"]["node-0"] = "test-1 192.0.2.1"
+        over["overlay"]["node-1"] = "test-2 192.0.2.2"
+        over["overlay"]["node-3"] = "test-3 192.0.2.3"
+
+        # Test that links get the same index whichever other nodes are
+        # in the node list, and that removing a node frees its slots.
+        # pylint: disable=protected-access
+        self.assertEqual(
+            list(self.object_get(conf=over)._this_node_links()),
+            [(7, ("test-3", "test-1")), (9, ("test-3", "test-2"))],
+        )
+
+        del over["overlay"]["node-1"]
+        self.assertEqual(
+            list(self.object_get(conf=over)._this_node_links()),
+            [(7, ("test-3", "test-1"))],
+        )
+
+        over["overlay"]["node-1"] = "test-4 192.0.2.4"
+        self.assertEqual(
+            list(self.object_get(conf=over)._this_node_links()),
+            [(7, ("test-3", "test-1")), (9, ("test-3", "test-4"))],
+        )
+
+        # Test invalid node keys.
+        self.assert_fail(
+            "overlay",
+            "node-%s" % util.random_string(6),
+            value="test-5 192.0.2.5",
+            exception=util.GetError,
+            conf=over,
+        )
+        self.assert_fail(
+            "overlay",
+            "node-01",
+            value="test-5 192.0.2.5",
+            exception=overlay.LinknetSlotError,
+            conf=over,
+        )
+
+
+    def test_mesh_datapath(self):
+        '''
+        Test that 'mesh-datapath' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "mesh-vlan-id", value=100)
+
+        self.assert_enum(
+            "overlay",
+            "mesh-datapath",
+            enum=["bridged", "direct", "shared"],
+            test_default=True,
+            conf=over,
+        )
+
+
+    def test_mesh_vlan_id(self):
+        '''
+        Test that 'mesh-vlan-id' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "mesh-datapath", value="shared")
+
+        self.assert_integer("overlay", "mesh-vlan-id", minval=1, maxval=4094, conf=over)
+
+        # Test that the shared mesh datapath requires a VLAN ID.
+        self.assert_fail("overlay", "mesh-vlan-id", exception=overlay.NoMeshVLANIDError, conf=over)
+
+
+    def test_backend(self):
+        '''
+        Test that 'backend' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "vrf-table", value=100)
+
+        self.assert_enum("overlay", "backend", enum=["netns", "vrf"], test_default=True, conf=over)
+
+
+    def test_vrf_table(self):
+        '''
+        Test that 'vrf-table' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "backend", value="vrf")
+
+        self.assert_integer("overlay", "vrf-table", minval=1, maxval=4294967295, conf=over)
+
+        # Test that overlays using the VRF backend require a usable routing table.
+        self.assert_fail("overlay", "vrf-table", exception=overlay.VRFConfigError, conf=over)
+        self.assert_fail(
+            "overlay",
+            "vrf-table",
+            value=254,
+            exception=overlay.VRFConfigError,
+            conf=over,
+        )
+
+        # Test the options unsupported by the VRF backend.
+        over = self.config_get("overlay", "vrf-table", value=100, conf=over)
+
+        self.assert_fail(
+            "overlay",
+            "mesh-datapath",
+            value="bridged",
+            exception=overlay.VRFConfigError,
+            conf=over,
+        )
+        self.assert_fail(
+            "overlay",
+            "fwbuilder-script",
+            value="test_fwbuilder_script.conf",
+            exception=overlay.VRFConfigError,
+            conf=over,
+        )
+
+
+    def test_topology(self):
+        '''
+        Test that 'topology' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "hubs", value="test-1")
+        over = self.config_get("overlay", "adjacency-0", value="test-1 test-2", conf=over)
+
+        self.assert_enum(
+            "overlay",
+            "topology",
+            enum=["full-mesh", "hub-and-spoke", "partial-mesh"],
+            test_default=True,
+            conf=over,
+        )
+
+
+    def test_hubs(self):
+        '''
+        Test that 'hubs' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "topology", value="hub-and-spoke")
+        over["overlay"]["node-2"] = "test-3 192.0.2.3"
+        over["overlay"]["node-3"] = "test-4 192.0.2.4"
+
+        self.assert_success("overlay", "hubs", value="test-1", expected_value=("test-1",), conf=over)
+        self.assert_success(
+            "overlay",
+            "hubs",
+            value="test-1  test-2",
+            expected_value=("test-1", "test-2"),
+            conf=over,
+        )
+
+        # Test that spokes are only linked to hubs.
+        over["overlay"]["hubs"] = "test-1"
+        # pylint: disable=protected-access
+        node_links = list(self.object_get(conf=over)._node_links())
+        self.assertEqual(len(node_links), 6)
+        self.assertTrue(all("test-1" in node_link for node_link in node_links))
+
+        # Test invalid values.
+        self.assert_fail("overlay", "hubs", exception=overlay.TopologyError, conf=over)
+        self.assert_fail(
+            "overlay",
+            "hubs",
+            value=util.random_string(6),
+            exception=overlay.TopologyError,
+            conf=over,
+        )
+
+
+    def test_adjacency(self):
+        '''
+        Test that 'adjacency-*' is properly handled by the overlay.
+        '''
+
+        over = self.config_get("overlay", "topology", value="partial-mesh")
+        over["overlay"]["node-2"] = "test-3 192.0.2.3"
+
+        self.assert_success(
+            "overlay",
+            "adjacency-0",
+            value="test-2 test-1 test-3",
+            conf=over,
+        )
+
+        # Test that only adjacent nodes are linked.
+        over["overlay"]["adjacency-0"] = "test-2 test-1 test-3"
+        # pylint: disable=protected-access
+        self.assertEqual(
+            list(self.object_get(conf=over)._node_links()),
+            [("test-1", "test-2"), ("test-2", "test-1"), ("test-2", "test-3"), ("test-3", "test-2")],
+        )
+
+        # Test invalid values.
+        self.assert_fail("overlay", "adjacency-0", exception=overlay.TopologyError, conf=over)
+        self.assert_fail(
+            "overlay",
+            "adjacency-0",
+            value="test-1",
+            exception=overlay.TopologyError,
+            conf=over,
+        )
+        self.assert_fail(
+            "overlay",
+            "adjacency-0",
+            value="test-1 %s" % util.random_string(6),
+            exception=overlay.TopologyError,
+            conf=over,
+        )
+
+
+    def test_node_links(self):
+        '''
+        Test that node links are enumerated in a stable order, and that
+        the links of this node are indexed correctly for large overlays.
+        '''
+
+        over = self.config_get()
+        for key in over["overlay"].copy():
+            if key.startswith("node-"):
+                del over["overlay"][key]
+        for i in range(1000):
+            over["overlay"]["node-%i" % i] = "test-%i 10.%i.%i.1" % (i + 1, i // 256, i % 256)
+
+        # pylint: disable=protected-access
+        ove = self.object_get(conf=over)
+        node_links = list(ove._node_links())
+
+        self.assertEqual(len(node_links), 1000 * 999)
+        self.assertEqual(
+            node_links[:6],
+            [
+                ("test-1", "test-2"), ("test-2", "test-1"),
+                ("test-1", "test-3"), ("test-3", "test-1"),
+                ("test-2", "test-3"), ("test-3", "test-2"),
+            ],
+        )
+
+        # Test that adding a node appends its links to the end of the list.
+        over["overlay"]["node-1000"] = "test-1001 10.3.232.1"
+        added_node_links = list(self.object_get(conf=over)._node_links())
+        self.assertEqual(added_node_links[:len(node_links)], node_links)
+
+        # Test that the links of this node have the same index in the list
+        # of all node links.
+        for this_node in ("test-1", "test-500", "test-1000"):
+            over["overlay"]["this-node"] = this_node
+            this_node_links = list(self.object_get(conf=over)._this_node_links())
+            self.assertEqual(len(this_node_links), 1000)
+            for i, node_link in this_node_links:
+                self.assertEqual(added_node_links[i], node_link)
+
+
     def test_this_node(self):
         '''
         Test that 'this-node' is properly handled by the overlay.
@@ -183,6 +454,16 @@ class OverlayTest(OverlayBaseTest):
             conf=over,
         )
 
+        # Test that node names must be unique.
+        over["overlay"]["node-1"] = "%s 192.0.2.1" % self.overlay_conf["overlay"]["this-node"]
+        self.assert_fail(
+            "overlay",
+            "node-2",
+            value="%s 192.0.2.2" % self.overlay_conf["overlay"]["this-node"],
+            exception=overlay.DuplicateNodeError,
+            conf=over,
+        )
+
         # Test that 'this-node' is missing, by having a single-node list
         # that does not contain 'this-node'.
         self.assert_fail(
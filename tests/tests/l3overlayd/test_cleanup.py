@@ -0,0 +1,224 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/l3overlayd/test_cleanup.py - unit tests for the cleanup planner
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit tests for the cleanup planner.
+'''
+
+
+import errno
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import types
+
+from unittest import mock
+
+import pyroute2
+
+from l3overlay import util
+
+from l3overlay.l3overlayd import cleanup
+
+from l3overlay.util import logger
+
+from tests.l3overlayd import L3overlaydBaseTest
+
+from tests.l3overlayd.network import StubIPDB
+from tests.l3overlayd.network import StubLogger
+
+
+OVERLAY_CONF = """[overlay]
+name = test-cleanup
+enabled = true
+active = true
+asn = 65000
+linknet-pool = 198.51.100.0/31
+this-node = test-1
+node-0 = test-1 192.0.2.1
+node-1 = test-2 192.0.2.2
+
+[static-veth:test-veth]
+inner-address = 192.0.2.10
+netmask = 32
+inner-namespace = test-namespace
+
+[static-overlay-link:test-link]
+outer-address = 192.0.2.11
+inner-address = 192.0.2.12
+netmask = 31
+inner-overlay-name = test-inner
+
+[active-interface:m65000l0br]
+interface-name = m65000l0br
+
+[active-interface:test-veth-inner]
+interface-name = testveth0v0
+netns-name = test-namespace
+
+[active-interface:test-veth-outer]
+interface-name = testveth0v1
+netns-name = test-cleanup
+
+"""
+
+
+class CleanupTest(L3overlaydBaseTest):
+    '''
+    l3overlay unit test for the cleanup planner.
+    '''
+
+    name = "test_cleanup"
+
+
+    #
+    ##
+    #
+
+
+    def test_read(self):
+        '''
+        Test that the saved running configuration of an overlay is
+        read into the correct cleanup plan.
+        '''
+
+        overlays_dir = os.path.join(self.tmp_dir, "overlays")
+        root_dir = os.path.join(overlays_dir, "test-cleanup")
+        util.directory_create(root_dir)
+
+        with open(os.path.join(root_dir, "overlay.conf"), "w") as fil:
+            fil.write(OVERLAY_CONF)
+
+        # Overlay directories without a saved configuration are skipped.
+        util.directory_create(os.path.join(overlays_dir, "test-missing"))
+
+        logg = logger.create(None, "DEBUG", "l3overlay", self.name)
+        logg.start()
+
+        running_overlays = cleanup.read(logg, overlays_dir)
+
+        logg.stop()
+
+        self.assertEqual(set(running_overlays.keys()), {"test-cleanup"})
+
+        ove = running_overlays["test-cleanup"]
+
+        self.assertEqual(ove.root_dir, root_dir)
+        self.assertEqual(
+            ove.config_hash,
+            hashlib.sha256(OVERLAY_CONF.encode("UTF-8")).hexdigest(),
+        )
+        self.assertEqual(ove.links, {"test-namespace", "test-inner"})
+        self.assertEqual(
+            set(ove.interfaces),
+            {
+                ("m65000l0br", None),
+                ("testveth0v0", "test-namespace"),
+                ("testveth0v1", "test-cleanup"),
+            },
+        )
+
+
+    def test_root_interfaces_remove(self):
+        '''
+        Test that root namespace interfaces are removed in one pass, and
+        that interfaces which no longer exist are ignored.
+        '''
+
+        ipdb = StubIPDB()
+        ipdb.add("eth0", "dummy")
+        ipdb.add("m65000l0br", "bridge")
+        veth_if = ipdb.add("m65000l0v0", "veth")
+        peer_if = ipdb.add("m65000l0v1", "veth", link=veth_if.index)
+        veth_if.link = peer_if.index
+
+        with mock.patch("pyroute2.IPRoute", return_value=ipdb.nl):
+            cleanup.root_interfaces_remove(
+                StubLogger(),
+                {"m65000l0br", "m65000l0v0", "m65000l0v1", "m65000l1br"},
+            )
+
+        # The veth peer is removed along with the other end,
+        # so removing it fails with ENODEV, which is ignored.
+        self.assertEqual(ipdb.nl.dumps, 1)
+        self.assertEqual(len(ipdb.nl.removed), 2)
+        self.assertEqual(set(key for key in ipdb.interfaces if isinstance(key, str)), {"eth0"})
+        self.assertTrue(ipdb.nl.closed)
+
+
+    def test_root_interfaces_remove_error(self):
+        '''
+        Test that errors other than ENODEV when removing
+        root namespace interfaces are raised.
+        '''
+
+        ipdb = StubIPDB()
+        ipdb.add("m65000l0br", "bridge")
+
+        def link(command, index):
+            '''
+            Fail to remove an interface.
+            '''
+            raise pyroute2.NetlinkError(errno.EPERM, "Operation not permitted")
+
+        ipdb.nl.link = link
+
+        with mock.patch("pyroute2.IPRoute", return_value=ipdb.nl):
+            with self.assertRaises(pyroute2.NetlinkError):
+                cleanup.root_interfaces_remove(StubLogger(), {"m65000l0br"})
+
+        self.assertTrue(ipdb.nl.closed)
+
+
+    def test_bird_kill(self):
+        '''
+        Test that the BIRD daemons of running overlays are all signalled,
+        and waited for until they terminate.
+        '''
+
+        procs = []
+        bird_pids = []
+
+        for i in range(2):
+            proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+            self.addCleanup(proc.kill)
+            procs.append(proc)
+
+            # Reap the process when it terminates, as the BIRD daemons
+            # are not children of l3overlayd.
+            threading.Thread(target=proc.wait, daemon=True).start()
+
+            bird_pid = os.path.join(self.tmp_dir, "bird-%i.pid" % i)
+            with open(bird_pid, "w") as fil:
+                fil.write("%i\n" % proc.pid)
+            bird_pids.append(bird_pid)
+
+        ove = types.SimpleNamespace(
+            name="test-cleanup",
+            bird_pids=bird_pids + [os.path.join(self.tmp_dir, "bird-missing.pid")],
+        )
+
+        # pylint: disable=protected-access
+        cleanup._bird_kill(StubLogger(), [ove])
+
+        for proc in procs:
+            self.assertFalse(util.pid_exists(pid=proc.pid))
@@ -0,0 +1,174 @@
+#
+# IPsec overlay network manager (l3overlay)
+# tests/util/test_scheduler.py - unit test for the dependency graph scheduler
+#
+# Copyright (c) 2017 Catalyst.net Ltd
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''
+Unit test for the dependency graph scheduler.
+'''
+
+
+import threading
+import time
+import unittest
+
+from l3overlay.util import scheduler
+
+
+class SchedulerTest(unittest.TestCase):
+    '''
+    l3overlay unit test for the dependency graph scheduler.
+    '''
+
+    def setUp(self):
+        '''
+        Set up the unit test runtime state.
+        '''
+
+        self.lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        '''
+        Reset the record of processed items.
+        '''
+
+        self.started = []
+        self.finished = []
+
+        self.running = 0
+        self.max_running = 0
+
+
+    def function(self, item):
+        '''
+        Record the given item being processed, taking long enough for
+        other items to be processed concurrently.
+        '''
+
+        with self.lock:
+            self.started.append(item)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        time.sleep(0.02)
+
+        with self.lock:
+            self.running -= 1
+            self.finished.append(item)
+
+
+    def assert_order(self, dependencies):
+        '''
+        Test that every item was processed, and only after
+        the items it depends on had finished.
+        '''
+
+        for item, deps in dependencies.items():
+            self.assertIn(item, self.finished)
+            for dep in deps:
+                self.assertLess(
+                    self.finished.index(dep),
+                    self.started.index(item),
+                    "'%s' started before its dependency '%s' finished" % (item, dep),
+                )
+
+
+    def test_dependencies(self):
+        '''
+        Test that items given before the items they depend on wait for
+        them, with any number of workers.
+        '''
+
+        dependencies = {
+            "a": set(),
+            "b": set(["c"]),
+            "c": set(["a"]),
+            "d": set(["b", "c"]),
+            "e": set(),
+        }
+
+        for max_workers in (1, 2, 5):
+            self.reset()
+            scheduler.run(["d", "b", "c", "a", "e"], dependencies, self.function,
+                          max_workers=max_workers)
+            self.assert_order(dependencies)
+
+        scheduler.run(["d", "c"], {"d": set(["c"])}, self.function)
+        self.assertEqual(self.started[-2:], ["c", "d"])
+
+
+    def test_max_workers(self):
+        '''
+        Test that independent items are processed concurrently,
+        on at most max_workers threads.
+        '''
+
+        scheduler.run(range(8), {}, self.function, max_workers=3)
+
+        self.assertEqual(sorted(self.finished), list(range(8)))
+        self.assertEqual(self.max_running, 3)
+
+        self.reset()
+        scheduler.run(range(4), {}, self.function)
+
+        self.assertEqual(self.finished, list(range(4)))
+        self.assertEqual(self.max_running, 1)
+
+
+    def test_error(self):
+        '''
+        Test that the first exception raised is re-raised, that items
+        already running are allowed to finish, and that no more items
+        are started after it was raised.
+        '''
+
+        def function(item):
+            '''
+            Raise an exception for item 'b', while item 'a' is running.
+            '''
+            if item == "b":
+                raise ValueError(item)
+            self.function(item)
+
+        for max_workers in (1, 2):
+            self.reset()
+            with self.assertRaises(ValueError) as context:
+                scheduler.run(["a", "b", "c", "d"], {}, function, max_workers=max_workers)
+
+            self.assertEqual(str(context.exception), "b")
+            self.assertEqual(self.finished, ["a"])
+            self.assertEqual(self.started, ["a"])
+
+
+    def test_cycle(self):
+        '''
+        Test that items in a dependency cycle are not processed, and
+        raise a DependencyCycleError once all other items are processed.
+        '''
+
+        dependencies = {"a": set(["c"]), "b": set(["a"]), "c": set(["b"])}
+
+        for max_workers in (1, 2):
+            self.reset()
+            with self.assertRaises(scheduler.DependencyCycleError):
+                scheduler.run(["a", "b", "c", "d"], dependencies, self.function,
+                              max_workers=max_workers)
+
+            self.assertEqual(self.finished, ["d"])